@@ -0,0 +1,67 @@
+'''
+    Synthetic benchmark for building the task order of large generated task graphs.
+
+    usage: python -m benchmarks.bench_graph [--tasks 10000] [--fan-in 4] [--repeat 5]
+'''
+from argparse import ArgumentParser
+from typing import Any, Dict, List, Optional
+import random
+import time
+
+from borca.parsing import Parser
+
+
+def generateGraph(task_count: int, fan_in: int, seed: int = 0, fan_out: Optional[int] = None) -> Dict[str, Any]:
+    '''
+        Generates a connected task graph where every task depends on up to `fan_in` randomly chosen earlier tasks,
+            with the last task depending on every task that nothing else depends on. With `fan_out`, no task has more
+            than that many dependents (apart from the last task).
+    '''
+    rng = random.Random(seed)
+    tasks: List[Dict[str, Any]] = []
+    depended_on: Dict[str, int] = {}
+    candidates: List[int] = []
+
+    for i in range(task_count - 1):
+        if fan_out is None:
+            deps = sorted(set(f"task-{rng.randrange(i)}" for _ in range(min(i, fan_in))))
+        else:
+            picked = [candidates[rng.randrange(len(candidates))] for _ in range(fan_in)] if candidates else []
+            deps = sorted(set(f"task-{index}" for index in picked))
+            for dep in deps:
+                if depended_on.get(dep, 0) + 1 >= fan_out:
+                    candidates.remove(int(dep.split("-")[1]))
+            candidates.append(i)
+
+        for dep in deps:
+            depended_on[dep] = depended_on.get(dep, 0) + 1
+        tasks.append({"name": f"task-{i}", "commands": ["true"], "depends_on": deps})
+
+    leaves = [task["name"] for task in tasks if task["name"] not in depended_on]
+    tasks.append({"name": "all", "commands": ["true"], "depends_on": leaves})
+
+    return {"tool": {"borca": {"default_task": "all", "tasks": tasks}}}
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark task graph ordering.")
+    parser.add_argument("--tasks", type=int, default=10000, help="number of tasks in the graph (default 10000)")
+    parser.add_argument("--fan-in", type=int, default=4, help="dependencies per task (default 4)")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed repetitions (default 5)")
+    args = parser.parse_args()
+
+    toml_data = generateGraph(args.tasks, args.fan_in)
+    config = {"task-name": None, "no_hash": False, "toml_path": "pyproject.toml", "verbosity": 0}
+
+    timings = []
+    for _ in range(args.repeat):
+        started_at = time.perf_counter()
+        ordered = Parser(config, toml_data).orderedTasks()
+        timings.append(time.perf_counter() - started_at)
+
+    print(f"tasks: {len(ordered)}, fan-in: {args.fan_in}")
+    print(f"best: {min(timings) * 1000:.1f} ms, worst: {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
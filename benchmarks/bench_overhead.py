@@ -0,0 +1,214 @@
+'''
+    Benchmark suite for borca's own overhead on a generated project, where every command is a no-op so only the cost
+        of orchestration is measured: parsing and ordering the task graph, globbing, hashing, cache I/O and scheduling.
+        Every run happens in a fresh interpreter and reports its peak RSS. The scenarios are:
+
+        - parse: loading, validating and ordering the pyproject.toml file (in-process)
+        - cold: a run without any cache
+        - warm: a run right after the previous one, where every task is up-to-date
+        - change: a run after a single input file changed
+
+    The results can be saved as JSON and compared with those of another commit.
+
+    usage: python -m benchmarks.bench_overhead [--tasks 1000] [--fan-in 4] [--fan-out 8] [--files 2000]
+        [--file-size 4096] [--file-groups 16] [--jobs 4] [--repeat 5] [--output results.json]
+        [--compare baseline.json]
+'''
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess  # nosec
+import sys
+import tempfile
+import time
+
+import toml
+
+from borca import __version__
+from benchmarks.bench_graph import generateGraph
+
+RUN_SCRIPT = '''
+import contextlib, io, json, resource, sys, time
+started_at = time.perf_counter()
+from borca.orchestrator import Orchestrator
+orchestrator = Orchestrator(json.loads(sys.argv[1]))
+loaded_at = time.perf_counter()
+with contextlib.redirect_stdout(io.StringIO()):
+    orchestrator.run()
+finished_at = time.perf_counter()
+# kilobytes on Linux, bytes on macOS
+peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+print(json.dumps({"seconds": finished_at - started_at, "load_seconds": loaded_at - started_at, "peak_rss": peak_rss}))
+'''
+
+
+def generateProject(
+    project: Path,
+    task_count: int,
+    fan_in: int,
+    fan_out: Optional[int],
+    file_count: int,
+    file_size: int,
+    file_groups: int,
+) -> List[Path]:
+    '''
+        Writes a project with the generated task graph and input files, returning the paths of the input files. The
+            files are spread over `file_groups` directory trees, and every task takes one of the trees as its inputs
+            through a `**` glob.
+    '''
+    rng = random.Random(0)
+    data = generateGraph(task_count, fan_in, fan_out=fan_out)
+
+    for index, task in enumerate(data["tool"]["borca"]["tasks"]):
+        task["input_paths"] = [f"src/group-{index % file_groups}/**/*.dat"]
+
+    files = []
+    for index in range(file_count):
+        path = project / "src" / f"group-{index % file_groups}" / f"dir-{rng.randrange(8)}" / f"file-{index}.dat"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(rng.getrandbits(file_size * 8).to_bytes(file_size, "little") if file_size > 0 else b"")
+        files.append(path)
+
+    (project / "pyproject.toml").write_text(toml.dumps(data))
+    return files
+
+
+def timeRun(project: Path, jobs: int) -> Dict[str, float]:
+    '''
+        Will run the project's default task in a new interpreter, measuring everything from importing borca onwards.
+    '''
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(Path(__file__).resolve().parents[1])] + sys.path))
+    config = {"task-name": None, "no_hash": False, "toml_path": "pyproject.toml", "verbosity": 0, "jobs": jobs}
+
+    output = subprocess.run(
+        [sys.executable, "-c", RUN_SCRIPT, json.dumps(config)], cwd=project, env=env, check=True, stdout=subprocess.PIPE
+    )  # nosec
+    return json.loads(output.stdout.decode().splitlines()[-1])
+
+
+def timeParse(project: Path) -> Dict[str, float]:
+    from borca.parsing import Parser
+
+    started_at = time.perf_counter()
+    toml_data = toml.loads((project / "pyproject.toml").read_text())
+    Parser({"task-name": None, "verbosity": 0}, toml_data).orderedTasks()
+    return {"seconds": time.perf_counter() - started_at}
+
+
+def summarize(samples: List[Dict[str, float]]) -> Dict[str, Any]:
+    seconds = [sample["seconds"] for sample in samples]
+    summary: Dict[str, Any] = {"best": min(seconds), "median": statistics.median(seconds), "samples": seconds}
+
+    if "peak_rss" in samples[0]:
+        summary["load_median"] = statistics.median(sample["load_seconds"] for sample in samples)
+        summary["peak_rss"] = max(sample["peak_rss"] for sample in samples)
+
+    return summary
+
+
+def runScenarios(project: Path, files: List[Path], jobs: int, repeat: int) -> Dict[str, Dict[str, Any]]:
+    samples: Dict[str, List[Dict[str, float]]] = {"parse": [], "cold": [], "warm": [], "change": []}
+
+    for iteration in range(repeat):
+        samples["parse"].append(timeParse(project))
+
+        shutil.rmtree(project / ".borca_cache", ignore_errors=True)
+        samples["cold"].append(timeRun(project, jobs))
+        samples["warm"].append(timeRun(project, jobs))
+
+        with open(files[iteration % len(files)], "ab") as changed:
+            changed.write(b"\0")
+        samples["change"].append(timeRun(project, jobs))
+
+    return {scenario: summarize(scenario_samples) for scenario, scenario_samples in samples.items()}
+
+
+def gitCommit() -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            check=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )  # nosec
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return output.stdout.decode().strip()
+
+
+def printResults(results: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]) -> None:
+    for scenario, summary in results.items():
+        line = f"{scenario:>6}: best: {summary['best'] * 1000:9.1f} ms, median: {summary['median'] * 1000:9.1f} ms"
+        if "peak_rss" in summary:
+            line += f", peak RSS: {summary['peak_rss'] / 1024 ** 2:7.1f} MiB"
+
+        previous = None if baseline is None else baseline["results"].get(scenario)
+        if previous is not None:
+            line += f", median vs baseline: {summary['median'] / previous['median']:.2f}x"
+
+        print(line)
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the overhead of borca on a generated project.")
+    parser.add_argument("--tasks", type=int, default=1000, help="number of tasks in the project (default 1000)")
+    parser.add_argument("--fan-in", type=int, default=4, help="dependencies per task (default 4)")
+    parser.add_argument("--fan-out", type=int, help="maximum dependents per task (default unlimited)")
+    parser.add_argument("--files", type=int, default=2000, help="number of input files (default 2000)")
+    parser.add_argument("--file-size", type=int, default=4096, help="size of every input file in bytes (default 4096)")
+    parser.add_argument("--file-groups", type=int, default=16, help="directory trees the files are spread over")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="tasks run in parallel")
+    parser.add_argument("--repeat", type=int, default=5, help="number of timed repetitions (default 5)")
+    parser.add_argument("--output", type=str, help="save the results as JSON to this file")
+    parser.add_argument("--compare", type=str, help="compare the results with those saved by an earlier run")
+    args = parser.parse_args()
+
+    parameters = {
+        "tasks": args.tasks,
+        "fan_in": args.fan_in,
+        "fan_out": args.fan_out,
+        "files": args.files,
+        "file_size": args.file_size,
+        "file_groups": args.file_groups,
+        "jobs": args.jobs,
+        "repeat": args.repeat,
+    }
+
+    baseline = None
+    if args.compare is not None:
+        baseline = json.loads(Path(args.compare).read_text())
+        if baseline["parameters"] != parameters:
+            print(f"warning: the baseline was measured with other parameters ({baseline['parameters']})")
+
+    with tempfile.TemporaryDirectory() as directory:
+        project = Path(directory)
+        files = generateProject(
+            project, args.tasks, args.fan_in, args.fan_out, args.files, args.file_size, args.file_groups
+        )
+        results = runScenarios(project, files, args.jobs, args.repeat)
+
+    print(", ".join(f"{name}: {value}" for name, value in parameters.items()))
+    printResults(results, baseline)
+
+    if args.output is not None:
+        report = {
+            "version": __version__,
+            "commit": gitCommit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": parameters,
+            "results": results,
+        }
+        Path(args.output).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+'''
+    Benchmark for the startup time of borca on a generated project, i.e. everything a run does before its first
+        task: importing borca, loading the task graph and opening the cache. Each repetition is a fresh interpreter.
+        A cold start parses, validates and orders the pyproject.toml file, while a warm start loads the graph compiled
+        by the previous run from `.borca_cache`.
+
+    usage: python -m benchmarks.bench_startup [--tasks 1000] [--fan-in 4] [--repeat 10]
+'''
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import List
+import os
+import shutil
+import subprocess  # nosec
+import sys
+import tempfile
+
+import toml
+
+from benchmarks.bench_graph import generateGraph
+
+STARTUP_SCRIPT = '''
+import time
+started_at = time.perf_counter()
+from borca.orchestrator import Orchestrator
+Orchestrator({"task-name": None, "no_hash": False, "toml_path": "pyproject.toml", "verbosity": 0, "jobs": 1})
+print(time.perf_counter() - started_at)
+'''
+
+
+def timeStartups(project: Path, repeat: int, cold: bool) -> List[float]:
+    '''
+        Will time the startup of borca in a new interpreter for every repetition, leaving out the startup of the
+            interpreter itself.
+    '''
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([str(Path(__file__).resolve().parents[1])] + sys.path))
+    timings = []
+
+    for _ in range(repeat):
+        if cold:
+            shutil.rmtree(project / ".borca_cache", ignore_errors=True)
+
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT], cwd=project, env=env, check=True, stdout=subprocess.PIPE
+        )  # nosec
+        timings.append(float(output.stdout))
+
+    return timings
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Benchmark the startup time of borca.")
+    parser.add_argument("--tasks", type=int, default=1000, help="number of tasks in the project (default 1000)")
+    parser.add_argument("--fan-in", type=int, default=4, help="dependencies per task (default 4)")
+    parser.add_argument("--repeat", type=int, default=10, help="number of timed repetitions (default 10)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        project = Path(directory)
+        (project / "pyproject.toml").write_text(toml.dumps(generateGraph(args.tasks, args.fan_in)))
+
+        print(f"tasks: {args.tasks}, fan-in: {args.fan_in}")
+        for title, cold in (("cold", True), ("warm", False)):
+            timings = timeStartups(project, args.repeat, cold)
+            print(f"{title}: best: {min(timings) * 1000:.1f} ms, worst: {max(timings) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,11 @@
 __version__ = '2020.5'
 
-from borca.orchestrator import Orchestrator
+
+def __getattr__(name: str):
+    # the orchestrator pulls in every subsystem, so it is only imported once it is actually used
+    if name == "Orchestrator":
+        from borca.orchestrator import Orchestrator
+
+        return Orchestrator
+
+    raise AttributeError(f"module 'borca' has no attribute '{name}'")
@@ -1,12 +1,10 @@
 from argparse import ArgumentParser
-from borca import Orchestrator
+from typing import List, Optional
+import os
+import sys
 
 
-def main() -> None:
-    parser = ArgumentParser(description="Python build orchestration tool.")
-
-    parser.add_argument("task-name", nargs='?', help="name of the task to execute")
-    parser.add_argument("--no-hash", action="store_true", help="does not use or generate task I/O hash")
+def addProjectArguments(parser: ArgumentParser) -> None:
     parser.add_argument(
         "--toml-path", type=str, default="pyproject.toml", help="specify alternate path to pyproject.toml file"
     )
@@ -14,8 +12,162 @@ def main() -> None:
         "--verbosity", type=int, default=1, choices=(0, 1, 2), help="specify verbosity 0, 1, or 2 (default 1)"
     )
 
-    orchestrator = Orchestrator(vars(parser.parse_args()))
-    orchestrator.run()
+
+def addJobsArgument(parser: ArgumentParser) -> None:
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="maximum number of tasks to run in parallel (default is the number of CPUs)",
+    )
+
+
+def stats(args: List[str]) -> None:
+    parser = ArgumentParser(
+        prog="borca stats", description="Report the critical path of a task graph from the recorded run history."
+    )
+
+    parser.add_argument("task-name", nargs='*', help="names of the tasks to report on (default is the default task)")
+    addProjectArguments(parser)
+
+    config = vars(parser.parse_args(args))
+    config.update(no_hash=False, jobs=None)
+
+    from borca.orchestrator import Orchestrator
+
+    Orchestrator(config).stats()
+
+
+def daemon(args: List[str]) -> None:
+    parser = ArgumentParser(
+        prog="borca daemon",
+        description="Keep the task graph of a project in memory and serve runs of its tasks to the borca command.",
+    )
+
+    parser.add_argument("--stop", action="store_true", help="stop the daemon serving the project")
+    addJobsArgument(parser)
+    addProjectArguments(parser)
+
+    config = vars(parser.parse_args(args))
+    config.update(no_hash=False)
+
+    if config["stop"]:
+        from borca.daemon import requestStop
+
+        if requestStop(config["toml_path"]) is None:
+            sys.exit(f"No daemon is serving {config['toml_path']} from this directory.")
+        return
+
+    from borca.daemon import Daemon
+
+    Daemon(config).run()
+
+
+def explain(args: List[str]) -> None:
+    parser = ArgumentParser(
+        prog="borca explain",
+        description="Report whether each task would run and why, listing every changed file, without running any.",
+    )
+
+    parser.add_argument("task-name", nargs='*', help="names of the tasks to explain (default is the default task)")
+    addProjectArguments(parser)
+
+    config = vars(parser.parse_args(args))
+    config.update(no_hash=False, jobs=None)
+
+    from borca.orchestrator import Orchestrator
+
+    Orchestrator(config).explain(every_path=True)
+
+
+def cache(args: List[str]) -> None:
+    parser = ArgumentParser(
+        prog="borca cache", description="Report the usage of the task cache, or bound it by collecting its garbage."
+    )
+
+    parser.add_argument("action", choices=("gc", "stats"), help="collect the garbage in the cache, or report its usage")
+    parser.add_argument("--max-size", type=str, help="evict least recently used outputs beyond this size (e.g. 2GB)")
+    parser.add_argument("--max-age", type=str, help="evict outputs unused for longer than this (e.g. 30d)")
+    addProjectArguments(parser)
+
+    config = vars(parser.parse_args(args))
+    config.update(no_hash=False, jobs=None)
+    config["task-name"] = None
+
+    from borca.orchestrator import Orchestrator
+    from borca.parsing import parseSize, parseAge
+
+    try:
+        max_size = None if config["max_size"] is None else parseSize(config["max_size"])
+        max_age = None if config["max_age"] is None else parseAge(config["max_age"])
+    except ValueError as e:
+        parser.error(f"{e}")
+
+    if config["action"] == "gc":
+        Orchestrator(config).collectGarbage(max_size, max_age)
+    else:
+        Orchestrator(config).cacheStats()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv[:1] == ["stats"]:
+        return stats(argv[1:])
+
+    if argv[:1] == ["daemon"]:
+        return daemon(argv[1:])
+
+    if argv[:1] == ["explain"]:
+        return explain(argv[1:])
+
+    if argv[:1] == ["cache"]:
+        return cache(argv[1:])
+
+    parser = ArgumentParser(
+        description="Python build orchestration tool.",
+        epilog="use \"borca stats [task-name ...]\" to report the critical path from the recorded run history, "
+        "\"borca explain [task-name ...]\" to report why tasks would run, \"borca cache gc|stats\" to bound or report "
+        "the task cache, and \"borca daemon\" to serve runs from a resident process",
+    )
+
+    parser.add_argument(
+        "task-name", nargs='*', help="names of the tasks to execute in a single run (default is the default task)"
+    )
+    parser.add_argument("--no-hash", action="store_true", help="does not use or generate task I/O hash")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="report which tasks would run and why, without running any of them"
+    )
+    parser.add_argument(
+        "--watch", action="store_true", help="keep running and re-run affected tasks when their input files change"
+    )
+    parser.add_argument(
+        "--trace", type=str, metavar="TRACE_PATH", help="write a Chrome trace-event profile of the run to this file"
+    )
+    addJobsArgument(parser)
+    addProjectArguments(parser)
+
+    config = vars(parser.parse_args(argv))
+
+    if not (config["watch"] or config["trace"] or config["no_hash"] or config["dry_run"]):
+        from borca.daemon import requestRun
+
+        # a running daemon takes over the run, with its own --jobs and --verbosity
+        status = requestRun(config)
+        if status is not None:
+            if status != 0:
+                sys.exit(status)
+            return
+
+    # imported after parsing the arguments, so --help and usage errors do not pay for it
+    from borca.orchestrator import Orchestrator
+
+    orchestrator = Orchestrator(config)
+    if config["dry_run"]:
+        orchestrator.explain()
+    else:
+        orchestrator.run()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+from borca.caching.database import CacheDatabase, TaskRunRecord, TaskInputs
+from borca.caching.git_index import GitIndex
+from borca.caching.file_index import FileIndex
+from borca.caching.backends import CacheBackend, LocalBackend, DirectoryBackend, createBackend
+from borca.caching.artifacts import ArtifactStore
+from borca.caching.collection import GarbageCollector
@@ -0,0 +1,63 @@
+from typing import List, Optional, Tuple
+from pathlib import Path
+import stat
+
+from borca.caching.backends import CacheBackend
+
+
+class ArtifactStore:
+    '''
+        A content-addressed store of task output files. File contents are kept once per digest, while a manifest lists
+            which files a task produced for a given fingerprint. Both live in the configured cache backend.
+    '''
+
+    def __init__(self, backend: CacheBackend, root_path: Path) -> None:
+        self.__backend = backend
+        self.__root_path = root_path
+
+    def store(self, task_name: str, fingerprint: bytes, files: List[Tuple[Path, bytes]]) -> bool:
+        '''
+            Stores the given (path, digest) output files of a task under its fingerprint. Nothing is stored when a file
+                lies outside of the project root, since such a manifest could not be restored reliably.
+        '''
+        entries = []
+        for path, digest in files:
+            try:
+                relative_path = path.relative_to(self.__root_path)
+            except ValueError:
+                return False
+
+            self.__backend.putObject(digest, path)
+            entries.append((relative_path.as_posix(), digest, stat.S_IMODE(path.stat().st_mode)))
+
+        self.__backend.putManifest(task_name, fingerprint, entries)
+        return True
+
+    def available(self, task_name: str, fingerprint: bytes) -> Optional[List[Tuple[Path, bytes]]]:
+        '''
+            Will gather the (path, digest) output files that would be restored for a task with the given fingerprint,
+                or None when they can not be restored.
+        '''
+        entries = self.__backend.getManifest(task_name, fingerprint)
+        if entries is None or not all(self.__backend.hasObject(digest) for _, digest, _ in entries):
+            return None
+
+        return [(self.__root_path / relative_path, digest) for relative_path, digest, _ in entries]
+
+    def restore(self, task_name: str, fingerprint: bytes) -> bool:
+        '''
+            Will attempt to restore the output files stored for a task under its fingerprint, returning whether they
+                were restored. Files are only written once every stored object is known to be present.
+        '''
+        entries = self.__backend.getManifest(task_name, fingerprint)
+        if entries is None:
+            return False
+
+        if not all(self.__backend.hasObject(digest) for _, digest, _ in entries):
+            return False
+
+        for relative_path, digest, mode in entries:
+            self.__backend.getObject(digest, self.__root_path / relative_path, mode)
+
+        self.__backend.touchManifest(task_name, fingerprint)
+        return True
@@ -0,0 +1,260 @@
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+from pathlib import Path
+from hashlib import sha256
+import json
+import os
+import shutil
+import stat
+import uuid
+
+from borca.caching.database import CacheDatabase, ManifestEntry
+from borca.parsing import CacheSettings
+
+# ioctl request for cloning a whole file on copy-on-write filesystems (btrfs, xfs)
+FICLONE = 0x40049409
+
+OBJECT_MODE = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+
+
+def cloneFile(source: Path, destination: Path) -> None:
+    '''
+        Copies a file, sharing its data blocks through a reflink when the filesystem supports it. Hardlinks are not
+            used on purpose, since a task rewriting a restored output in place would corrupt the stored object.
+    '''
+    try:
+        import fcntl
+
+        with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        return
+    except (ImportError, OSError):
+        pass
+
+    shutil.copyfile(source, destination)
+
+
+def placeFile(source: Path, destination: Path, mode: int) -> None:
+    '''
+        Atomically replaces the destination with a copy of the source, so concurrent readers (possibly on other hosts
+            sharing the same directory) never observe a partial file.
+    '''
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_file = destination.with_name(f".{destination.name}.{uuid.uuid4().hex}.borca.tmp")
+    try:
+        cloneFile(source, temp_file)
+        os.chmod(temp_file, mode)
+        os.replace(temp_file, destination)
+    finally:
+        if temp_file.exists():
+            temp_file.unlink()
+
+
+class CacheBackend(ABC):
+    '''
+        The interface for where artifact manifests (the output files a task produced for a given fingerprint) and the
+            content-addressed objects they reference are kept.
+    '''
+
+    @abstractmethod
+    def getManifest(self, task_name: str, fingerprint: bytes) -> Optional[List[ManifestEntry]]:
+        pass
+
+    @abstractmethod
+    def putManifest(self, task_name: str, fingerprint: bytes, entries: List[ManifestEntry]) -> None:
+        pass
+
+    @abstractmethod
+    def touchManifest(self, task_name: str, fingerprint: bytes) -> None:
+        pass
+
+    @abstractmethod
+    def manifestUses(self) -> List[Tuple[str, bytes, float]]:
+        pass
+
+    @abstractmethod
+    def removeManifests(self, keys: List[Tuple[str, bytes]]) -> None:
+        pass
+
+    @abstractmethod
+    def hasObject(self, digest: bytes) -> bool:
+        pass
+
+    @abstractmethod
+    def getObject(self, digest: bytes, destination: Path, mode: int) -> None:
+        pass
+
+    @abstractmethod
+    def putObject(self, digest: bytes, source: Path) -> None:
+        pass
+
+    @abstractmethod
+    def objects(self) -> List[Tuple[bytes, int, float]]:
+        pass
+
+    @abstractmethod
+    def removeObject(self, digest: bytes) -> None:
+        pass
+
+
+class ObjectDirectory:
+    '''
+        Content-addressed objects stored as read-only files under a directory, sharded by the first digest byte.
+    '''
+
+    def __init__(self, directory: Path) -> None:
+        self.__directory = directory
+
+    def objectPath(self, digest: bytes) -> Path:
+        digest_hex = digest.hex()
+        return self.__directory / digest_hex[:2] / digest_hex[2:]
+
+    def hasObject(self, digest: bytes) -> bool:
+        return self.objectPath(digest).is_file()
+
+    def getObject(self, digest: bytes, destination: Path, mode: int) -> None:
+        placeFile(self.objectPath(digest), destination, mode)
+
+    def putObject(self, digest: bytes, source: Path) -> None:
+        # objects are immutable, so an object written concurrently by someone else is just as good
+        if not self.hasObject(digest):
+            placeFile(source, self.objectPath(digest), OBJECT_MODE)
+
+    def objects(self) -> List[Tuple[bytes, int, float]]:
+        '''
+            Will gather the digest, size and modification time of every stored object.
+        '''
+        found: List[Tuple[bytes, int, float]] = []
+        try:
+            shards = list(os.scandir(self.__directory))
+        except OSError:
+            return found
+
+        for shard in shards:
+            if len(shard.name) != 2 or not shard.is_dir():
+                continue
+            with os.scandir(shard.path) as entries:
+                for entry in entries:
+                    # temporary files of writes in progress start with a dot
+                    if entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    try:
+                        digest = bytes.fromhex(shard.name + entry.name)
+                        stat_result = entry.stat()
+                    except (ValueError, OSError):
+                        continue
+                    found.append((digest, stat_result.st_size, stat_result.st_mtime))
+
+        return found
+
+    def removeObject(self, digest: bytes) -> None:
+        try:
+            self.objectPath(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class LocalBackend(ObjectDirectory, CacheBackend):
+    '''
+        The default backend, keeping manifests in the project's cache database and objects in `.borca_cache/objects`.
+    '''
+
+    def __init__(self, database: CacheDatabase, objects_directory: Path) -> None:
+        super().__init__(objects_directory)
+        self.__database = database
+
+    def getManifest(self, task_name: str, fingerprint: bytes) -> Optional[List[ManifestEntry]]:
+        return self.__database.getManifest(task_name, fingerprint)
+
+    def putManifest(self, task_name: str, fingerprint: bytes, entries: List[ManifestEntry]) -> None:
+        self.__database.putManifest(task_name, fingerprint, entries)
+
+    def touchManifest(self, task_name: str, fingerprint: bytes) -> None:
+        self.__database.touchManifest(task_name, fingerprint)
+
+    def manifestUses(self) -> List[Tuple[str, bytes, float]]:
+        return self.__database.manifestUses()
+
+    def removeManifests(self, keys: List[Tuple[str, bytes]]) -> None:
+        self.__database.removeManifests(keys)
+
+
+class DirectoryBackend(ObjectDirectory, CacheBackend):
+    '''
+        A backend on a directory shared between worktrees, CI jobs or hosts (e.g. an NFS mount or a CI cache volume).
+            Manifests are plain JSON files next to the objects, and every write goes through a uniquely named
+            temporary file followed by an atomic rename, so concurrent writers never corrupt each other.
+    '''
+
+    def __init__(self, directory: Path) -> None:
+        super().__init__(directory / "objects")
+        self.__manifest_directory = directory / "manifests"
+
+    def __manifestPath(self, task_name: str, fingerprint: bytes) -> Path:
+        # task names may contain any character, so they are hashed into a safe directory name
+        task_key = sha256(task_name.encode()).hexdigest()[:32]
+        return self.__manifest_directory / task_key / f"{fingerprint.hex()}.json"
+
+    def getManifest(self, task_name: str, fingerprint: bytes) -> Optional[List[ManifestEntry]]:
+        try:
+            data = json.loads(self.__manifestPath(task_name, fingerprint).read_text())
+        except (OSError, ValueError):
+            return None
+
+        return [(entry["path"], bytes.fromhex(entry["digest"]), entry["mode"]) for entry in data["files"]]
+
+    def putManifest(self, task_name: str, fingerprint: bytes, entries: List[ManifestEntry]) -> None:
+        manifest_path = self.__manifestPath(task_name, fingerprint)
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+        data = {
+            "task": task_name,
+            "files": [{"path": path, "digest": digest.hex(), "mode": mode} for path, digest, mode in entries],
+        }
+
+        temp_file = manifest_path.with_name(f".{manifest_path.name}.{uuid.uuid4().hex}.borca.tmp")
+        try:
+            temp_file.write_text(json.dumps(data))
+            os.replace(temp_file, manifest_path)
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
+
+    def touchManifest(self, task_name: str, fingerprint: bytes) -> None:
+        # the modification time of a manifest doubles as the time it was last used
+        try:
+            os.utime(self.__manifestPath(task_name, fingerprint))
+        except OSError:
+            pass
+
+    def manifestUses(self) -> List[Tuple[str, bytes, float]]:
+        uses = []
+        for manifest_path in self.__manifest_directory.glob("*/*.json"):
+            try:
+                used_at = manifest_path.stat().st_mtime
+                task_name = json.loads(manifest_path.read_text())["task"]
+                uses.append((task_name, bytes.fromhex(manifest_path.stem), used_at))
+            except (OSError, ValueError, KeyError):
+                continue
+
+        return uses
+
+    def removeManifests(self, keys: List[Tuple[str, bytes]]) -> None:
+        for task_name, fingerprint in keys:
+            try:
+                self.__manifestPath(task_name, fingerprint).unlink()
+            except FileNotFoundError:
+                pass
+
+
+def createBackend(settings: CacheSettings, database: CacheDatabase, root_path: Path) -> CacheBackend:
+    '''
+        Creates the cache backend selected by the `[tool.borca.cache]` settings.
+    '''
+    if settings.backend == "directory" and settings.path is not None:
+        directory = Path(settings.path).expanduser()
+        if not directory.is_absolute():
+            directory = root_path / directory
+        return DirectoryBackend(directory)
+
+    return LocalBackend(database, root_path / ".borca_cache" / "objects")
@@ -0,0 +1,94 @@
+from typing import Dict, List, Optional, Set, Tuple
+import time
+
+from borca.caching.backends import CacheBackend
+from borca.caching.database import CacheDatabase
+from borca.parsing import CacheSettings
+
+# objects no manifest refers to are only removed once they are this old, since their manifest may still be written
+OBJECT_GRACE_SECONDS = 60 * 60
+
+
+class GarbageCollector:
+    '''
+        Bounds the footprint of the cache. Everything recorded about tasks that are no longer defined is removed, along
+            with stored outputs unused for longer than `max_age`. While the stored objects still take up more than
+            `max_size`, the outputs that were used least recently are evicted. Objects are only removed once no
+            remaining manifest refers to them.
+    '''
+
+    def __init__(
+        self, backend: CacheBackend, database: CacheDatabase, settings: CacheSettings, hash_algorithm: str
+    ) -> None:
+        self.__backend = backend
+        self.__database = database
+        self.__settings = settings
+        self.__hash_algorithm = hash_algorithm
+
+    def collect(self, task_names: Optional[Set[str]] = None) -> Dict[str, int]:
+        '''
+            Collects the garbage in the cache, returning what was removed and what was kept. Unless the names of all
+                defined tasks are given, tasks are never considered stale.
+        '''
+        now = time.time()
+        report = {"tasks": 0, "runs": 0, "files": 0}
+
+        if task_names is not None:
+            report["tasks"] = len(self.__database.pruneTasks(task_names))
+        if self.__settings.max_age is not None:
+            report["runs"] = self.__database.pruneRuns(now - self.__settings.max_age)
+        report["files"] = self.__database.pruneFiles(self.__hash_algorithm)
+
+        # least recently used first
+        uses = sorted(self.__backend.manifestUses(), key=lambda use: use[2])
+        removed: List[Tuple[str, bytes]] = []
+        kept: Dict[Tuple[str, bytes], Set[bytes]] = {}
+
+        # objects referred to before this collection can go as soon as nothing refers to them anymore
+        released: Set[bytes] = set()
+
+        for task_name, fingerprint, used_at in uses:
+            entries = self.__backend.getManifest(task_name, fingerprint)
+            released.update(digest for _, digest, _ in entries or [])
+            expired = self.__settings.max_age is not None and used_at < now - self.__settings.max_age
+            if entries is None or expired:
+                removed.append((task_name, fingerprint))
+            else:
+                kept[(task_name, fingerprint)] = set(digest for _, digest, _ in entries)
+
+        sizes = {digest: (size, modified_at) for digest, size, modified_at in self.__backend.objects()}
+        references: Dict[bytes, int] = {}
+        for digests in kept.values():
+            for digest in digests:
+                references[digest] = references.get(digest, 0) + 1
+
+        stored_bytes = sum(size for digest, (size, _) in sizes.items() if digest in references)
+
+        if self.__settings.max_size is not None:
+            for key in list(kept):
+                if stored_bytes <= self.__settings.max_size:
+                    break
+
+                for digest in kept.pop(key):
+                    references[digest] -= 1
+                    if references[digest] == 0 and digest in sizes:
+                        stored_bytes -= sizes[digest][0]
+                removed.append(key)
+
+        self.__backend.removeManifests(removed)
+        report["manifests"] = len(removed)
+
+        report["objects"] = report["freed_bytes"] = 0
+        for digest, (size, modified_at) in sizes.items():
+            if references.get(digest, 0) > 0:
+                continue
+            if digest in released or modified_at < now - OBJECT_GRACE_SECONDS:
+                self.__backend.removeObject(digest)
+                report["objects"] += 1
+                report["freed_bytes"] += size
+
+        report["kept_manifests"] = len(kept)
+        report["kept_objects"] = len(sizes) - report["objects"]
+        report["kept_bytes"] = sum(sizes[digest][0] for digest in sizes) - report["freed_bytes"]
+
+        return report
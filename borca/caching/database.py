@@ -0,0 +1,447 @@
+from typing import Dict, List, Set, Tuple, Optional
+from pathlib import Path
+from threading import Lock
+import json
+import os
+import sqlite3
+import time
+
+SCHEMA_VERSION = 8
+
+# number of recent durations per task kept for estimating how long it takes
+HISTORY_SAMPLES = 5
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    name TEXT PRIMARY KEY,
+    fingerprint BLOB NOT NULL,
+    output_hash BLOB NOT NULL,
+    duration REAL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_inputs (
+    task TEXT PRIMARY KEY,
+    definition TEXT NOT NULL,
+    environment TEXT NOT NULL,
+    dependencies TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS input_files (
+    task TEXT NOT NULL,
+    path TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    PRIMARY KEY (task, path)
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    recorded_ns INTEGER NOT NULL,
+    algorithm TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tool_probes (
+    command TEXT PRIMARY KEY,
+    executable TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    digest BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS manifests (
+    task TEXT NOT NULL,
+    fingerprint BLOB NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (task, fingerprint)
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    task TEXT NOT NULL,
+    fingerprint BLOB NOT NULL,
+    path TEXT NOT NULL,
+    digest BLOB NOT NULL,
+    mode INTEGER NOT NULL,
+    PRIMARY KEY (task, fingerprint, path)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    duration REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS task_runs (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    task TEXT NOT NULL,
+    duration REAL NOT NULL,
+    exit_status INTEGER,
+    outcome TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS task_runs_by_task ON task_runs (task, run_id);
+'''
+
+FileEntry = Tuple[int, int, int, bytes, int]
+TaskRunRecord = Tuple[str, float, Optional[int], str]
+ManifestEntry = Tuple[str, bytes, int]
+# the executable a tool probe ran, its mtime_ns and size at the time, and the digest of what the probe printed
+ProbeEntry = Tuple[str, int, int, bytes]
+
+# the tables holding task state, along with the column naming the task
+TASK_COLUMNS = (
+    ("tasks", "name"),
+    ("task_inputs", "task"),
+    ("input_files", "task"),
+    ("manifests", "task"),
+    ("artifacts", "task"),
+    ("task_runs", "task"),
+)
+
+# what a task's fingerprint was computed from: its definition, the digests of the parts of the environment it depends on
+# by name, the fingerprints of its dependencies by name and the digests of its input files by relative path
+TaskInputs = Tuple[str, Dict[str, bytes], Dict[str, bytes], Dict[str, bytes]]
+
+
+class CacheDatabase:
+    '''
+        A single-file SQLite store for everything borca caches between runs. Reads go straight to the database, while
+            writes are buffered in memory and committed together in a single transaction by `commit()`, so a run that
+            is killed midway leaves the previous state untouched. Only the pruning done by garbage collection is
+            written immediately.
+    '''
+
+    def __init__(self, database_file: Path, read_only: bool = False) -> None:
+        self.__lock = Lock()
+        if read_only:
+            self.__connection = self.__openReadOnly(database_file)
+        else:
+            database_file.parent.mkdir(parents=True, exist_ok=True)
+            self.__connection = sqlite3.connect(str(database_file), timeout=30, check_same_thread=False)
+            self.__createSchema()
+
+        self.__pending_tasks: Dict[str, Tuple[bytes, bytes, Optional[float], float]] = {}
+        self.__pending_inputs: Dict[str, TaskInputs] = {}
+        self.__pending_files: Dict[str, Tuple[FileEntry, str]] = {}
+        self.__pending_probes: Dict[str, ProbeEntry] = {}
+        self.__pending_manifests: Dict[Tuple[str, bytes], List[ManifestEntry]] = {}
+        self.__pending_uses: Dict[Tuple[str, bytes], float] = {}
+        self.__pending_runs: List[Tuple[float, float, List[TaskRunRecord]]] = []
+
+    def __createSchema(self) -> None:
+        version = self.__connection.execute("PRAGMA user_version").fetchone()[0]
+        with self.__connection:
+            if version != SCHEMA_VERSION:
+                # it is only a cache, so an unknown layout is dropped rather than migrated
+                # tables of SQLite itself (such as sqlite_sequence) can not be dropped, nor do they need to be
+                tables = self.__connection.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"
+                ).fetchall()
+                for (table,) in tables:
+                    self.__connection.execute(f'DROP TABLE "{table}"')
+                self.__connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self.__connection.executescript(SCHEMA)
+
+    @staticmethod
+    def __openReadOnly(database_file: Path) -> sqlite3.Connection:
+        '''
+            Opens the database without ever writing to it, for looking at the cache without changing it. A database
+                that does not exist (or has another layout) is taken to be empty, by using an empty one in memory.
+        '''
+        if database_file.is_file():
+            connection = sqlite3.connect(
+                f"{database_file.resolve().as_uri()}?mode=ro", uri=True, timeout=30, check_same_thread=False
+            )
+            try:
+                if connection.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION:
+                    return connection
+            except sqlite3.Error:
+                pass
+            connection.close()
+
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        connection.executescript(SCHEMA)
+        return connection
+
+    def getTaskHash(self, task_name: str) -> Tuple[bytes, bytes]:
+        '''
+            Will gather the fingerprint and output hash recorded for a given task name, defaulting to empty byte
+                strings when the task has never been recorded.
+        '''
+        with self.__lock:
+            pending = self.__pending_tasks.get(task_name)
+            if pending is not None:
+                return pending[0], pending[1]
+
+            row = self.__connection.execute(
+                "SELECT fingerprint, output_hash FROM tasks WHERE name = ?", (task_name,)
+            ).fetchone()
+
+        if row is None:
+            return b"", b""
+
+        return bytes(row[0]), bytes(row[1])
+
+    def putTaskHash(
+        self, task_name: str, fingerprint: bytes, output_hash: bytes, duration: Optional[float] = None
+    ) -> None:
+        with self.__lock:
+            self.__pending_tasks[task_name] = (fingerprint, output_hash, duration, time.time())
+
+    def getTaskInputs(self, task_name: str) -> Optional[TaskInputs]:
+        '''
+            Will gather what the fingerprint recorded for a given task name was computed from, or None when it was never
+                recorded.
+        '''
+        with self.__lock:
+            pending = self.__pending_inputs.get(task_name)
+            if pending is not None:
+                return pending
+
+            row = self.__connection.execute(
+                "SELECT definition, environment, dependencies FROM task_inputs WHERE task = ?", (task_name,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            files = self.__connection.execute(
+                "SELECT path, digest FROM input_files WHERE task = ?", (task_name,)
+            ).fetchall()
+
+        environment = {name: bytes.fromhex(digest) for name, digest in json.loads(row[1]).items()}
+        dependencies = {name: bytes.fromhex(fingerprint) for name, fingerprint in json.loads(row[2]).items()}
+        return row[0], environment, dependencies, {path: bytes(digest) for path, digest in files}
+
+    def putTaskInputs(self, task_name: str, inputs: TaskInputs) -> None:
+        with self.__lock:
+            self.__pending_inputs[task_name] = inputs
+
+    def fileEntries(self, algorithm: str) -> Dict[str, FileEntry]:
+        '''
+            Will gather the stat data and digest of every file hashed with the given algorithm, keyed by path.
+        '''
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT path, size, mtime_ns, inode, digest, recorded_ns FROM files WHERE algorithm = ?", (algorithm,)
+            ).fetchall()
+
+        return {row[0]: (row[1], row[2], row[3], bytes(row[4]), row[5]) for row in rows}
+
+    def putFileEntries(self, entries: Dict[str, FileEntry], algorithm: str) -> None:
+        with self.__lock:
+            self.__pending_files.update((path, (entry, algorithm)) for path, entry in entries.items())
+
+    def toolProbes(self) -> Dict[str, ProbeEntry]:
+        '''
+            Will gather the recorded result of every tool probe, keyed by the probe's command.
+        '''
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT command, executable, mtime_ns, size, digest FROM tool_probes"
+            ).fetchall()
+
+        probes = {row[0]: (row[1], row[2], row[3], bytes(row[4])) for row in rows}
+        probes.update(self.__pending_probes)
+        return probes
+
+    def putToolProbes(self, probes: Dict[str, ProbeEntry]) -> None:
+        with self.__lock:
+            self.__pending_probes.update(probes)
+
+    def getManifest(self, task_name: str, fingerprint: bytes) -> Optional[List[ManifestEntry]]:
+        '''
+            Will gather the (path, digest, mode) entries of the output files stored for a task with the given
+                fingerprint, or None when no outputs were stored for it.
+        '''
+        with self.__lock:
+            pending = self.__pending_manifests.get((task_name, fingerprint))
+            if pending is not None:
+                return pending
+
+            rows = self.__connection.execute(
+                "SELECT path, digest, mode FROM artifacts WHERE task = ? AND fingerprint = ?", (task_name, fingerprint)
+            ).fetchall()
+
+        if len(rows) == 0:
+            return None
+
+        return [(row[0], bytes(row[1]), row[2]) for row in rows]
+
+    def putManifest(self, task_name: str, fingerprint: bytes, entries: List[ManifestEntry]) -> None:
+        with self.__lock:
+            self.__pending_manifests[(task_name, fingerprint)] = entries
+            self.__pending_uses[(task_name, fingerprint)] = time.time()
+
+    def touchManifest(self, task_name: str, fingerprint: bytes) -> None:
+        '''
+            Records that the outputs stored for a task with the given fingerprint were just used.
+        '''
+        with self.__lock:
+            self.__pending_uses[(task_name, fingerprint)] = time.time()
+
+    def manifestUses(self) -> List[Tuple[str, bytes, float]]:
+        '''
+            Will gather the task name, fingerprint and time of last use of every stored manifest.
+        '''
+        with self.__lock:
+            rows = self.__connection.execute("SELECT task, fingerprint, used_at FROM manifests").fetchall()
+
+        return [(row[0], bytes(row[1]), row[2]) for row in rows]
+
+    def removeManifests(self, keys: List[Tuple[str, bytes]]) -> None:
+        with self.__lock:
+            with self.__connection:
+                for statement in ("DELETE FROM manifests", "DELETE FROM artifacts"):
+                    self.__connection.executemany(f"{statement} WHERE task = ? AND fingerprint = ?", keys)
+
+    def pruneTasks(self, task_names: Set[str]) -> List[str]:
+        '''
+            Removes everything recorded about tasks other than the given ones (e.g. tasks that were renamed or
+                removed), returning the names of the tasks that were removed.
+        '''
+        with self.__lock:
+            with self.__connection:
+                recorded: Set[str] = set()
+                for table, column in TASK_COLUMNS:
+                    recorded.update(
+                        row[0] for row in self.__connection.execute(f"SELECT DISTINCT {column} FROM {table}")
+                    )
+
+                removed = sorted(recorded - task_names)
+                for table, column in TASK_COLUMNS:
+                    self.__connection.executemany(
+                        f"DELETE FROM {table} WHERE {column} = ?", [(task_name,) for task_name in removed]
+                    )
+
+        return removed
+
+    def pruneRuns(self, before: float) -> int:
+        '''
+            Removes the history of the runs started before the given time, returning the number of removed runs.
+        '''
+        with self.__lock:
+            with self.__connection:
+                self.__connection.execute(
+                    "DELETE FROM task_runs WHERE run_id IN (SELECT id FROM runs WHERE started_at < ?)", (before,)
+                )
+                return self.__connection.execute("DELETE FROM runs WHERE started_at < ?", (before,)).rowcount
+
+    def pruneFiles(self, algorithm: str) -> int:
+        '''
+            Removes the entries of files that no longer exist or were hashed with another algorithm, returning the
+                number of removed entries.
+        '''
+        with self.__lock:
+            with self.__connection:
+                rows = self.__connection.execute("SELECT path, algorithm FROM files").fetchall()
+                stale = [
+                    (path,) for path, file_algorithm in rows if file_algorithm != algorithm or not os.path.exists(path)
+                ]
+                self.__connection.executemany("DELETE FROM files WHERE path = ?", stale)
+
+        return len(stale)
+
+    def outcomeCounts(self) -> Dict[str, Dict[str, int]]:
+        '''
+            Will count how often each task was found up-to-date, run or failed over the recorded runs.
+        '''
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT task, outcome, COUNT(*) FROM task_runs GROUP BY task, outcome"
+            ).fetchall()
+
+        counts: Dict[str, Dict[str, int]] = {}
+        for task_name, outcome, count in rows:
+            counts.setdefault(task_name, {})[outcome] = count
+
+        return counts
+
+    def taskHistory(self) -> Dict[str, List[float]]:
+        '''
+            Will gather the most recent durations of each task from the runs in which it was executed (rather than
+                found up-to-date or failed), newest first.
+        '''
+        with self.__lock:
+            rows = self.__connection.execute(
+                "SELECT task, duration FROM task_runs WHERE outcome = 'completed' ORDER BY run_id DESC"
+            ).fetchall()
+
+        history: Dict[str, List[float]] = {}
+        for task_name, duration in rows:
+            durations = history.setdefault(task_name, [])
+            if len(durations) < HISTORY_SAMPLES:
+                durations.append(duration)
+
+        return history
+
+    def runCount(self) -> int:
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def putRun(self, started_at: float, duration: float, records: List[TaskRunRecord]) -> None:
+        '''
+            Records a run along with the (task name, duration, exit status, outcome) of every task in it.
+        '''
+        with self.__lock:
+            self.__pending_runs.append((started_at, duration, records))
+
+    def commit(self) -> None:
+        with self.__lock:
+            with self.__connection:
+                self.__connection.executemany(
+                    "INSERT OR REPLACE INTO tasks (name, fingerprint, output_hash, duration, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(name,) + values for name, values in self.__pending_tasks.items()],
+                )
+                for task_name, (definition, environment, dependencies, files) in self.__pending_inputs.items():
+                    self.__connection.execute(
+                        "INSERT OR REPLACE INTO task_inputs (task, definition, environment, dependencies) "
+                        "VALUES (?, ?, ?, ?)",
+                        (
+                            task_name,
+                            definition,
+                            json.dumps({name: digest.hex() for name, digest in environment.items()}),
+                            json.dumps({name: fingerprint.hex() for name, fingerprint in dependencies.items()}),
+                        ),
+                    )
+                    self.__connection.execute("DELETE FROM input_files WHERE task = ?", (task_name,))
+                    self.__connection.executemany(
+                        "INSERT INTO input_files (task, path, digest) VALUES (?, ?, ?)",
+                        [(task_name, path, digest) for path, digest in files.items()],
+                    )
+                self.__connection.executemany(
+                    "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, digest, recorded_ns, algorithm) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(path,) + entry + (algorithm,) for path, (entry, algorithm) in self.__pending_files.items()],
+                )
+                self.__connection.executemany(
+                    "INSERT OR REPLACE INTO tool_probes (command, executable, mtime_ns, size, digest) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(command,) + entry for command, entry in self.__pending_probes.items()],
+                )
+                for started_at, duration, records in self.__pending_runs:
+                    run_id = self.__connection.execute(
+                        "INSERT INTO runs (started_at, duration) VALUES (?, ?)", (started_at, duration)
+                    ).lastrowid
+                    self.__connection.executemany(
+                        "INSERT INTO task_runs (run_id, task, duration, exit_status, outcome) VALUES (?, ?, ?, ?, ?)",
+                        [(run_id,) + record for record in records],
+                    )
+                self.__connection.executemany(
+                    "INSERT OR REPLACE INTO manifests (task, fingerprint, used_at) VALUES (?, ?, ?)",
+                    [key + (used_at,) for key, used_at in self.__pending_uses.items()],
+                )
+                for (task_name, fingerprint), entries in self.__pending_manifests.items():
+                    self.__connection.execute(
+                        "DELETE FROM artifacts WHERE task = ? AND fingerprint = ?", (task_name, fingerprint)
+                    )
+                    self.__connection.executemany(
+                        "INSERT INTO artifacts (task, fingerprint, path, digest, mode) VALUES (?, ?, ?, ?, ?)",
+                        [(task_name, fingerprint) + entry for entry in entries],
+                    )
+
+            self.__pending_tasks.clear()
+            self.__pending_inputs.clear()
+            self.__pending_files.clear()
+            self.__pending_probes.clear()
+            self.__pending_manifests.clear()
+            self.__pending_uses.clear()
+            self.__pending_runs.clear()
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+import hashlib
+import os
+import time
+
+from borca.caching.database import CacheDatabase, FileEntry
+from borca.caching.git_index import GitIndex, hashBlob
+
+# algorithms prefixed with this hash files as git blobs, so their digests match those in the git index
+GIT_PREFIX = "git-"
+
+# a file modified this close to the moment it was hashed may change again without its stat data changing
+RACY_WINDOW_NS = 2_000_000_000
+
+# size of the chunks files are read in, so huge files are never held in memory whole
+CHUNK_BYTES = 1024 * 1024
+
+_hash_pool: Optional[ThreadPoolExecutor] = None
+_hash_pool_lock = Lock()
+
+
+def getHashPool() -> ThreadPoolExecutor:
+    '''
+        The pool of worker threads files are hashed on. hashlib releases the GIL while hashing (as does reading a
+            file), so these threads make use of every core.
+    '''
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            _hash_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="borca-hash")
+        return _hash_pool
+
+
+def hashFile(path: Path, algorithm: str) -> bytes:
+    if algorithm.startswith(GIT_PREFIX):
+        return hashBlob(path, algorithm[len(GIT_PREFIX) :], CHUNK_BYTES)
+
+    file_hash = hashlib.new(algorithm)
+
+    with open(path, "rb", buffering=0) as file:
+        while True:
+            chunk = file.read(CHUNK_BYTES)
+            if not chunk:
+                break
+            file_hash.update(chunk)
+
+    return file_hash.digest()
+
+
+class FileIndex:
+    '''
+        A persistent index of file digests keyed by path. Each entry remembers the stat data (size, mtime_ns and
+            inode) of the file at the time it was hashed, so a file whose stat data has not changed since reuses its
+            stored digest instead of being read again. Given a git index, files are hashed as git blobs and the
+            digests of tracked files git knows to be unmodified are taken from the index instead.
+    '''
+
+    def __init__(self, database: CacheDatabase, algorithm: str, git_index: Optional[GitIndex] = None) -> None:
+        self.__lock = Lock()
+        self.__git_index = git_index
+        self.__algorithm = algorithm if git_index is None else GIT_PREFIX + git_index.object_format
+        self.__entries: Dict[str, FileEntry] = database.fileEntries(self.__algorithm)
+        self.__updated: Dict[str, FileEntry] = {}
+
+    @property
+    def algorithm(self) -> str:
+        return self.__algorithm
+
+    def digest(self, path: Path) -> bytes:
+        stat = path.stat()
+        return self.__stored(path, stat) or self.__indexed(path, stat) or self.__hash(path, stat)
+
+    def digests(self, paths: List[Path]) -> List[bytes]:
+        '''
+            Will produce the digests of the given files, in the same order. The stat data of every file is checked
+                on the calling thread, while the files that have to be read are hashed on the hash pool.
+        '''
+        results: List[Optional[bytes]] = []
+        missing: List[Tuple[int, Path, os.stat_result]] = []
+
+        for path in paths:
+            stat = path.stat()
+            digest = self.__stored(path, stat) or self.__indexed(path, stat)
+            if digest is None:
+                missing.append((len(results), path, stat))
+            results.append(digest)
+
+        if len(missing) == 1:
+            index, path, stat = missing[0]
+            results[index] = self.__hash(path, stat)
+        elif len(missing) > 1:
+            hashed = getHashPool().map(lambda file: self.__hash(file[1], file[2]), missing)
+            for (index, _, _), digest in zip(missing, hashed):
+                results[index] = digest
+
+        return results  # type: ignore
+
+    def __stored(self, path: Path, stat: os.stat_result) -> Optional[bytes]:
+        with self.__lock:
+            entry = self.__entries.get(str(path))
+
+        if entry is not None:
+            size, mtime_ns, inode, digest, recorded_ns = entry
+            if (
+                size == stat.st_size
+                and mtime_ns == stat.st_mtime_ns
+                and inode == stat.st_ino
+                and mtime_ns + RACY_WINDOW_NS < recorded_ns
+            ):
+                return digest
+
+        return None
+
+    def __indexed(self, path: Path, stat: os.stat_result) -> Optional[bytes]:
+        if self.__git_index is None:
+            return None
+
+        file_digest = self.__git_index.digest(path, stat)
+        if file_digest is not None:
+            self.__record(path, stat, file_digest)
+
+        return file_digest
+
+    def __hash(self, path: Path, stat: os.stat_result) -> bytes:
+        file_digest = hashFile(path, self.__algorithm)
+        self.__record(path, stat, file_digest)
+        return file_digest
+
+    def __record(self, path: Path, stat: os.stat_result, file_digest: bytes) -> None:
+        with self.__lock:
+            entry = (stat.st_size, stat.st_mtime_ns, stat.st_ino, file_digest, time.time_ns())
+            self.__entries[str(path)] = entry
+            self.__updated[str(path)] = entry
+
+    def save(self, database: CacheDatabase) -> None:
+        '''
+            Hands the entries updated since the last save over to the database, to be written on its next commit.
+        '''
+        with self.__lock:
+            database.putFileEntries(self.__updated, self.__algorithm)
+            self.__updated = {}
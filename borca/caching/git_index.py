@@ -0,0 +1,224 @@
+from typing import Dict, Optional, Tuple
+from pathlib import Path
+import hashlib
+import logging
+import os
+import re
+import struct
+
+# regular files, as opposed to symlinks, submodules and sparse directories, whose blobs are not file contents
+REGULAR_FILE_MODES = (0o100644, 0o100755)
+
+# flags of an index entry that make its blob unusable: a merge stage, or (in the extended flags) an entry that is not
+# checked out or only marked as to be added
+STAGE_MASK = 0x3000
+EXTENDED_FLAG = 0x4000
+SKIP_WORKTREE_FLAG = 0x4000
+INTENT_TO_ADD_FLAG = 0x2000
+
+# an entry's stat data, as git records it: size, mtime (seconds and nanoseconds) and inode, all truncated to 32 bits
+IndexStat = Tuple[int, int, int, int]
+
+
+def findGitDirectory(start: Path) -> Optional[Tuple[Path, Path]]:
+    '''
+        Will find the work tree containing the given directory and its git directory, following the `.git` files of
+            linked work trees and submodules.
+    '''
+    for directory in [start, *start.parents]:
+        dot_git = directory / ".git"
+        if dot_git.is_dir():
+            return directory, dot_git
+
+        if dot_git.is_file():
+            try:
+                match = re.match(r"gitdir: (.*)", dot_git.read_text().strip())
+            except OSError:
+                return None
+            if match is None:
+                return None
+            return directory, (directory / match.group(1)).resolve()
+
+    return None
+
+
+def objectFormat(git_directory: Path) -> str:
+    '''
+        The hash algorithm of the repository's objects, which is SHA-1 unless configured otherwise.
+    '''
+    common_directory = git_directory
+    try:
+        common_directory = (git_directory / (git_directory / "commondir").read_text().strip()).resolve()
+    except OSError:
+        pass
+
+    try:
+        config = (common_directory / "config").read_text()
+    except OSError:
+        return "sha1"
+
+    match = re.search(r"^\s*objectformat\s*=\s*(\w+)", config, re.IGNORECASE | re.MULTILINE)
+    return "sha256" if match is not None and match.group(1).lower() == "sha256" else "sha1"
+
+
+def hashBlob(path: Path, object_format: str, chunk_bytes: int) -> bytes:
+    '''
+        Hashes a file the way git hashes a blob, so its digest matches the one recorded in the git index.
+    '''
+    with open(path, "rb", buffering=0) as file:
+        size = os.fstat(file.fileno()).st_size
+        blob_hash = hashlib.new(object_format, f"blob {size}\0".encode())
+        while True:
+            chunk = file.read(chunk_bytes)
+            if not chunk:
+                break
+            blob_hash.update(chunk)
+
+    return blob_hash.digest()
+
+
+def readVarint(data: bytes, offset: int) -> Tuple[int, int]:
+    '''
+        Reads the offset encoded variable-length integer of index version 4, returning it and the offset after it.
+    '''
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+
+    return value, offset
+
+
+class GitIndex:
+    '''
+        The blob hashes and stat data git records in its index for every tracked file, read straight from the index
+            file (versions 2 to 4). A file whose stat data still matches its entry is unmodified since it was staged,
+            so its blob hash can stand in for hashing its contents, as long as the file is not racily clean (modified
+            within the same moment the index was written).
+    '''
+
+    def __init__(self, work_tree: Path, git_directory: Path, logger: logging.Logger) -> None:
+        self.__work_tree = work_tree
+        self.__index_path = git_directory / "index"
+        self.__logger = logger
+        self.object_format = objectFormat(git_directory)
+        self.__entries: Optional[Dict[str, Tuple[IndexStat, bytes]]] = None
+        self.__index_mtime_ns = 0
+
+    @staticmethod
+    def find(start: Path, logger: logging.Logger) -> Optional["GitIndex"]:
+        found = findGitDirectory(start)
+        if found is None:
+            return None
+
+        return GitIndex(found[0], found[1], logger)
+
+    def refresh(self) -> None:
+        '''
+            Makes sure the index is read again before its next use if git has rewritten it since it was last read.
+        '''
+        try:
+            changed = self.__index_path.stat().st_mtime_ns != self.__index_mtime_ns
+        except OSError:
+            changed = True
+
+        if changed:
+            self.__entries = None
+
+    def digest(self, path: Path, stat: os.stat_result) -> Optional[bytes]:
+        '''
+            Will return the blob hash of a file when git knows it to be unmodified, or None when it has to be hashed.
+        '''
+        if self.__entries is None:
+            self.__entries = self.__load()
+
+        try:
+            relative_path = path.relative_to(self.__work_tree).as_posix()
+        except ValueError:
+            return None
+
+        entry = self.__entries.get(relative_path)
+        if entry is None:
+            return None
+
+        (size, mtime_s, mtime_ns, inode), blob = entry
+        if (
+            size != stat.st_size & 0xFFFFFFFF
+            or mtime_s != (stat.st_mtime_ns // 1_000_000_000) & 0xFFFFFFFF
+            or mtime_ns != stat.st_mtime_ns % 1_000_000_000
+            or (inode != 0 and inode != stat.st_ino & 0xFFFFFFFF)
+            or stat.st_mtime_ns >= self.__index_mtime_ns
+        ):
+            return None
+
+        return blob
+
+    def __load(self) -> Dict[str, Tuple[IndexStat, bytes]]:
+        try:
+            self.__index_mtime_ns = self.__index_path.stat().st_mtime_ns
+            data = self.__index_path.read_bytes()
+            entries = self.__parse(data)
+        except (OSError, ValueError, struct.error, IndexError) as e:
+            self.__logger.warning(f"Unable to read the git index at {self.__index_path}: {e}")
+            return {}
+
+        self.__logger.debug(f"Read {len(entries)} entries from the git index at {self.__index_path}")
+        return entries
+
+    def __parse(self, data: bytes) -> Dict[str, Tuple[IndexStat, bytes]]:
+        signature, version, count = struct.unpack_from(">4sII", data, 0)
+        if signature != b"DIRC" or version not in (2, 3, 4):
+            raise ValueError(f"unsupported index format (version {version})")
+
+        hash_size = 32 if self.object_format == "sha256" else 20
+        entries: Dict[str, Tuple[IndexStat, bytes]] = {}
+        offset = 12
+        path = b""
+
+        for _ in range(count):
+            start = offset
+            fields = struct.unpack_from(">10I", data, offset)
+            offset += 40
+            blob = data[offset : offset + hash_size]
+            offset += hash_size
+            (flags,) = struct.unpack_from(">H", data, offset)
+            offset += 2
+
+            extended_flags = 0
+            if flags & EXTENDED_FLAG:
+                (extended_flags,) = struct.unpack_from(">H", data, offset)
+                offset += 2
+
+            if version == 4:
+                # the path is stored as the number of bytes to drop from the previous one, followed by a suffix
+                strip, offset = readVarint(data, offset)
+                end = data.index(b"\0", offset)
+                path = path[: len(path) - strip] + data[offset:end]
+                offset = end + 1
+            else:
+                end = data.index(b"\0", offset)
+                path = data[offset:end]
+                # entries are padded with one to eight NUL bytes to a multiple of eight bytes
+                offset = start + ((end - start) // 8 + 1) * 8
+
+            _, _, mtime_s, mtime_ns, _, inode, mode, _, _, size = fields
+            if (
+                mode not in REGULAR_FILE_MODES
+                or flags & STAGE_MASK
+                or extended_flags & (SKIP_WORKTREE_FLAG | INTENT_TO_ADD_FLAG)
+            ):
+                continue
+
+            entries[path.decode("utf-8", errors="surrogateescape")] = ((size, mtime_s, mtime_ns, inode), blob)
+
+        # with a split index, most entries live in a shared index this one only records changes to
+        while offset + 8 <= len(data) - hash_size:
+            extension, extension_size = struct.unpack_from(">4sI", data, offset)
+            if extension == b"link":
+                raise ValueError("split indexes are not supported")
+            offset += 8 + extension_size
+
+        return entries
@@ -0,0 +1,11 @@
+from borca.daemon.client import socketPath, sendRequest, requestRun, requestStop
+
+
+def __getattr__(name: str):
+    # the daemon needs all of borca, while the client is imported by every invocation and has to stay light
+    if name == "Daemon":
+        from borca.daemon.server import Daemon
+
+        return Daemon
+
+    raise AttributeError(f"module 'borca.daemon' has no attribute '{name}'")
@@ -0,0 +1,81 @@
+from typing import Any, Dict, Optional
+from pathlib import Path
+from hashlib import md5
+import json
+import os
+import socket
+import sys
+import tempfile
+
+# longest socket path accepted everywhere (the limit is 104 bytes on macOS and 108 bytes on Linux)
+MAX_SOCKET_PATH = 100
+
+
+def socketPath(toml_path: str) -> Path:
+    '''
+        The Unix domain socket a project's daemon listens on, which lives in the project's `.borca_cache` unless that
+            path is too long for a socket.
+    '''
+    root = Path(toml_path).resolve().parent
+    path = root / ".borca_cache" / "daemon.sock"
+
+    if len(os.fsencode(path)) > MAX_SOCKET_PATH:
+        path = Path(tempfile.gettempdir()) / f"borca-{md5(os.fsencode(root)).hexdigest()}.sock"  # nosec
+
+    return path
+
+
+def sendRequest(toml_path: str, request: Dict[str, Any]) -> Optional[int]:
+    '''
+        Sends a request to the daemon serving the project, relaying the output it produces to this process. Returns
+            the exit status of the request, or None when no daemon is running or it refused the request.
+    '''
+    path = socketPath(toml_path)
+    if not hasattr(socket, "AF_UNIX") or not path.exists():
+        return None
+
+    request = dict(request, cwd=os.getcwd(), toml_path=str(Path(toml_path).resolve()))
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # type: ignore
+    answered = False
+
+    try:
+        connection.connect(str(path))
+        connection.sendall(json.dumps(request).encode() + b"\n")
+
+        with connection.makefile("rb") as responses:
+            for line in responses:
+                response = json.loads(line)
+                answered = True
+
+                if "stdout" in response:
+                    sys.stdout.write(response["stdout"])
+                    sys.stdout.flush()
+                elif "stderr" in response:
+                    sys.stderr.write(response["stderr"])
+                    sys.stderr.flush()
+                elif "refused" in response:
+                    return None
+                elif "exit" in response:
+                    return response["exit"]
+
+    except (OSError, ValueError):
+        pass
+
+    finally:
+        connection.close()
+
+    if not answered:
+        # e.g. a socket left behind by a daemon that did not shut down cleanly
+        return None
+
+    print("[BORCA] ERROR - Lost the connection to the daemon before it finished.", file=sys.stderr)
+    return 1
+
+
+def requestRun(config: Dict) -> Optional[int]:
+    # the tasks depend on the environment of the command line, not the daemon's
+    return sendRequest(config["toml_path"], {"task-name": config["task-name"], "env": dict(os.environ)})
+
+
+def requestStop(toml_path: str) -> Optional[int]:
+    return sendRequest(toml_path, {"stop": True})
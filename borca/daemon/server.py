@@ -0,0 +1,215 @@
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+from pathlib import Path
+from threading import Lock
+import json
+import os
+import socket
+import sys
+import time
+
+from borca.orchestrator import Orchestrator
+from borca.caching.file_index import RACY_WINDOW_NS
+from borca.daemon.client import socketPath
+from borca.parsing import requestedTasks
+from borca.watching import Snapshot, takeSnapshot, snapshotChanges
+from borca.util import createLogger
+from borca.exceptions import BorcaException, DaemonError
+
+
+class ClientConnection:
+    '''
+        A connected client, which is sent the output of the request it made as newline-delimited JSON messages.
+    '''
+
+    def __init__(self, connection: socket.socket) -> None:
+        self.__connection = connection
+        self.__lock = Lock()
+        self.__open = True
+
+    def send(self, **message: Any) -> None:
+        with self.__lock:
+            if not self.__open:
+                return
+
+            try:
+                self.__connection.sendall(json.dumps(message).encode() + b"\n")
+            except OSError:
+                # the client went away, but the run it started is finished regardless
+                self.__open = False
+
+
+class OutputRelay:
+    '''
+        Stands in for the daemon's stdout or stderr, passing everything written to it on to the client being served.
+    '''
+
+    def __init__(self, stream_name: str, fallback: TextIO) -> None:
+        self.__stream_name = stream_name
+        self.__fallback = fallback
+        self.client: Optional[ClientConnection] = None
+
+    def write(self, text: str) -> int:
+        client = self.client
+        if client is None:
+            return self.__fallback.write(text)
+
+        client.send(**{self.__stream_name: text})
+        return len(text)
+
+    def flush(self) -> None:
+        if self.client is None:
+            self.__fallback.flush()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.__fallback, name)
+
+
+class Daemon:
+    '''
+        Serves runs of a project's tasks over a Unix domain socket, so the borca command line can hand its work to a
+            resident process instead of starting from scratch. The task graph, file digests and executor state of
+            every requested task stay in memory, and each request only fingerprints the input files whose stat data
+            changed since the previous one.
+    '''
+
+    def __init__(self, config: Dict) -> None:
+        self.__config = config
+        self.__toml = Path(config["toml_path"]).resolve()
+        self.__cwd = os.getcwd()
+        self.__socket_path = socketPath(config["toml_path"])
+
+        # installed before any logger is created, since logging handlers hold on to the stream they were given
+        self.__streams = (sys.stdout, sys.stderr)
+        self.__stdout = OutputRelay("stdout", sys.stdout)
+        self.__stderr = OutputRelay("stderr", sys.stderr)
+        sys.stdout, sys.stderr = self.__stdout, self.__stderr  # type: ignore
+
+        self.__logger = createLogger('borca.daemon.Daemon', config['verbosity'])
+
+        self.__toml_stat: Optional[Tuple[int, int, int, int]] = None
+        self.__served: Dict[Tuple[str, ...], Tuple[Orchestrator, List[str], Snapshot, int]] = {}
+
+    def run(self) -> None:
+        if self.__socket_path.exists():
+            self.__claimSocket()
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # type: ignore
+        try:
+            self.__socket_path.parent.mkdir(parents=True, exist_ok=True)
+            server.bind(str(self.__socket_path))
+            server.listen()
+
+            self.__logger.info(f"Serving {self.__toml} on {self.__socket_path}, press Ctrl+C to stop.")
+
+            while True:
+                connection, _ = server.accept()
+                with connection:
+                    if not self.__serve(connection):
+                        break
+
+            self.__logger.info("Stopped the daemon.")
+
+        except KeyboardInterrupt:
+            self.__logger.info("Stopped the daemon.")
+
+        finally:
+            server.close()
+            if self.__socket_path.exists():
+                self.__socket_path.unlink()
+            sys.stdout, sys.stderr = self.__streams
+
+    def __claimSocket(self) -> None:
+        '''
+            Removes the socket left behind by a daemon that is no longer running, throwing an error when it still is.
+        '''
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)  # type: ignore
+        try:
+            probe.connect(str(self.__socket_path))
+        except OSError:
+            self.__socket_path.unlink()
+            return
+        finally:
+            probe.close()
+
+        raise DaemonError(f"A daemon is already serving {self.__toml} on {self.__socket_path}")
+
+    def __serve(self, connection: socket.socket) -> bool:
+        '''
+            Handles a single request, returning whether the daemon should keep serving.
+        '''
+        with connection.makefile("rb") as requests:
+            try:
+                request = json.loads(requests.readline())
+            except ValueError:
+                return True
+
+        client = ClientConnection(connection)
+
+        if request.get("cwd") != self.__cwd or request.get("toml_path") != str(self.__toml):
+            # the tasks' paths are relative to the working directory, so the client has to run them itself
+            client.send(refused=f"The daemon serves {self.__toml} from {self.__cwd}")
+            return True
+
+        if request.get("stop"):
+            client.send(exit=0)
+            return False
+
+        self.__stdout.client = self.__stderr.client = client
+        try:
+            status = self.__runTasks(requestedTasks(request), request.get("env"))
+        finally:
+            self.__stdout.client = self.__stderr.client = None
+
+        client.send(exit=status)
+        return True
+
+    def __runTasks(self, task_names: List[str], environ: Optional[Dict[str, str]]) -> int:
+        '''
+            Runs the requested tasks in the environment of the client (or the daemon's own, when not given), reusing
+                what is known from previous requests for the same tasks unless the pyproject.toml file changed since.
+        '''
+        stat = self.__toml.stat()
+        toml_stat = (stat.st_size, stat.st_mtime_ns, stat.st_ino, time.time_ns())
+
+        if (
+            self.__toml_stat is None
+            or self.__toml_stat[:3] != toml_stat[:3]
+            or self.__toml_stat[1] + RACY_WINDOW_NS >= self.__toml_stat[3]
+        ):
+            self.__served.clear()
+            self.__toml_stat = toml_stat
+
+        try:
+            served = self.__served.get(tuple(task_names))
+
+            if served is None:
+                orchestrator = Orchestrator(dict(self.__config, **{"task-name": task_names}))
+                patterns = sorted(set(pattern for task in orchestrator.tasks() for pattern in task.input_paths))
+                snapshot, taken_ns = takeSnapshot(patterns, orchestrator.fileSettings()), time.time_ns()
+                orchestrator.run(None, environ)
+            else:
+                orchestrator, patterns, previous, previous_ns = served
+                snapshot, taken_ns = takeSnapshot(patterns, orchestrator.fileSettings()), time.time_ns()
+                _, changed_paths = snapshotChanges(previous, snapshot)
+
+                # a file modified this close to the previous snapshot may have changed again without its stat data
+                changed_paths.update(
+                    path
+                    for files in previous.values()
+                    for path, (_, mtime_ns, _) in files.items()
+                    if mtime_ns + RACY_WINDOW_NS >= previous_ns
+                )
+
+                self.__logger.debug(f"Found {len(changed_paths)} changed input file(s) since the last request")
+                orchestrator.run(changed_paths, environ)
+
+            self.__served[tuple(task_names)] = (orchestrator, patterns, snapshot, taken_ns)
+            return 0
+
+        except BorcaException as e:
+            self.__logger.error(f"{e}")
+        except Exception:
+            self.__logger.exception(f"Unexpected error while running {', '.join(task_names) or 'the default task'}")
+
+        self.__served.pop(tuple(task_names), None)
+        return 1
@@ -30,6 +30,12 @@ class InvalidTaskgraph(BorcaException):
     pass
 
 
+class DaemonError(BorcaException):
+    '''An exception denoting a failure to start or reach the borca daemon of a project.'''
+
+    pass
+
+
 def exception_guard(exception):
     def decorator(func):
         def runner(*args, **kwargs):
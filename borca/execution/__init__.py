@@ -1 +1,4 @@
 from borca.execution.executor import Executor
+from borca.execution.explain import Verdict
+from borca.execution.globbing import GlobFilter, PathMatcher
+from borca.execution.scheduling import estimateDurations, criticalPath
@@ -0,0 +1,211 @@
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+from multiprocessing.connection import Connection
+from pathlib import Path
+import asyncio
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import traceback
+
+from borca.execution.commands import CommandOutput, pumpLines
+
+if TYPE_CHECKING:
+    # there is no forkserver on Windows
+    from multiprocessing.context import ForkServerContext, SpawnContext
+
+# the environment variable handing the project and the modules to import over to the warm process, as JSON
+PRELOAD_VARIABLE = "BORCA_PRELOAD"
+
+# when the warm process started importing the project's modules, which is only set within it and the workers it forks
+preloaded_ns: Optional[int] = None
+
+
+def exitStatus(result: Any) -> int:
+    '''
+        Maps what a called function returned to an exit status: None and True mean success, False means failure and
+            an integer is the exit status itself. Anything else is printed to stderr as an error message, as
+            `sys.exit` does.
+    '''
+    if result is None or result is True:
+        return 0
+    if result is False:
+        return 1
+    if isinstance(result, int):
+        return result
+
+    print(result, file=sys.stderr)
+    return 1
+
+
+def projectModules(root_path: str) -> List[str]:
+    '''
+        The names of the imported modules that were found on the project's own path, i.e. whose top-level package (or
+            the module itself) lies directly in the project directory. Modules installed elsewhere, even in a virtual
+            environment within the project, are not among them.
+    '''
+    names = []
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if path is None:
+            continue
+
+        top_level = name.partition(".")[0]
+        if os.path.relpath(path, root_path).split(os.sep)[0] in (top_level, f"{top_level}.py"):
+            names.append(name)
+
+    return names
+
+
+def forgetChangedModules(root_path: str, since_ns: int) -> None:
+    '''
+        Forgets the project's modules once the source of any of them changed since the given time, so they are imported
+            again as they are now rather than run as the warm process found them. A changed module may be used by the
+            others, so all of them are forgotten together.
+    '''
+    names = projectModules(root_path)
+
+    def changed(name: str) -> bool:
+        try:
+            return os.stat(sys.modules[name].__file__).st_mtime_ns >= since_ns  # type: ignore
+        except OSError:
+            return True
+
+    if any(changed(name) for name in names):
+        for name in names:
+            del sys.modules[name]
+        importlib.invalidate_caches()
+
+
+def callTarget(
+    call: str, stdout: Connection, stderr: Connection, root_path: str, cwd: str, env: Optional[Dict[str, str]]
+) -> None:
+    '''
+        The entry point of a worker process, which imports and calls a task's function with its stdout and stderr
+            sent to the given pipes. Since the worker was forked from the warm process, the import is usually free.
+    '''
+    os.dup2(stdout.fileno(), 1)
+    os.dup2(stderr.fileno(), 2)
+    stdout.close()
+    stderr.close()
+
+    # the warm process may have been started for another project
+    if root_path not in sys.path:
+        sys.path.insert(0, root_path)
+    if preloaded_ns is not None:
+        forgetChangedModules(root_path, preloaded_ns)
+    os.chdir(cwd)
+    if env is not None:
+        os.environ.clear()
+        os.environ.update(env)
+
+    module_name, _, function_name = call.partition(":")
+    try:
+        function: Any = importlib.import_module(module_name)
+        for attribute in function_name.split("."):
+            function = getattr(function, attribute)
+        status = exitStatus(function())
+    except SystemExit as e:
+        # as with any script, `sys.exit(True)` is a failure
+        status = exitStatus(int(e.code) if isinstance(e.code, bool) else e.code)
+    except BaseException:
+        traceback.print_exc()
+        status = 1
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    sys.exit(status)
+
+
+async def readPipe(connection: Connection) -> asyncio.StreamReader:
+    '''
+        Hands the reading end of a pipe over to the running event loop, which closes it once the pipe is drained.
+    '''
+    pipe = os.fdopen(os.dup(connection.fileno()), "rb", buffering=0)
+    connection.close()
+
+    reader = asyncio.StreamReader()
+    await asyncio.get_event_loop().connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader
+
+
+class CallRunner:
+    '''
+        Runs the functions of tasks declared with `call` in worker processes, without a shell or a fresh interpreter.
+            Workers are forked from a warm process (the forkserver) that has already imported every module named
+            by a call, so each call starts in an isolated process with its imports done. Once a module of the project
+            is edited, workers import the project's modules again. Where there is no forkserver, workers are spawned
+            instead.
+    '''
+
+    def __init__(self, calls: List[str], root_path: str) -> None:
+        # the modules are found relative to the project, as commands find their scripts
+        self.__root_path = root_path
+
+        self.__context: Union["ForkServerContext", "SpawnContext"]
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self.__context = multiprocessing.get_context("forkserver")
+            self.__context.set_forkserver_preload(["borca.execution.preload"])
+            self.__startForkserver(sorted(set(call.partition(":")[0] for call in calls)))
+        else:
+            self.__context = multiprocessing.get_context("spawn")
+
+    def __startForkserver(self, modules: List[str]) -> None:
+        '''
+            Starts the warm process unless it is already running, having it import the given modules. It is a fresh
+                interpreter, which only finds borca and is told about the project through the environment it inherits
+                from this process as it starts, so that is only changed for that long. The project is never added to
+                our own `sys.path`, where it could shadow modules (such as those borca itself imports).
+        '''
+        from multiprocessing import forkserver
+
+        python_path = os.environ.get("PYTHONPATH")
+        borca_path = str(Path(__file__).resolve().parents[2])
+        os.environ["PYTHONPATH"] = os.pathsep.join(path for path in (borca_path, python_path) if path)
+        os.environ[PRELOAD_VARIABLE] = json.dumps(
+            {"root_path": self.__root_path, "modules": modules, "python_path": python_path}
+        )
+
+        try:
+            forkserver.ensure_running()
+        finally:
+            del os.environ[PRELOAD_VARIABLE]
+            if python_path is None:
+                del os.environ["PYTHONPATH"]
+            else:
+                os.environ["PYTHONPATH"] = python_path
+
+    async def run(self, call: str, output: CommandOutput, env: Optional[Dict[str, str]] = None) -> int:
+        '''
+            Calls a task's function in a worker process, passing its stdout and stderr to the given output as they
+                arrive, and returns its exit status (negative when the worker was killed by a signal).
+        '''
+        loop = asyncio.get_event_loop()
+        stdout_reader, stdout_writer = self.__context.Pipe(duplex=False)
+        stderr_reader, stderr_writer = self.__context.Pipe(duplex=False)
+
+        process = self.__context.Process(
+            target=callTarget,
+            args=(call, stdout_writer, stderr_writer, self.__root_path, os.getcwd(), env),
+            name=f"borca {call}",
+        )
+        try:
+            await loop.run_in_executor(None, process.start)
+        except Exception as e:
+            # e.g. the warm process went away, which fails this call rather than the whole run
+            stdout_reader.close()
+            stderr_reader.close()
+            output.write(f"Unable to start a worker process for {call}: {e!r}".encode(), True)
+            return 1
+        finally:
+            stdout_writer.close()
+            stderr_writer.close()
+
+        await asyncio.gather(
+            pumpLines(await readPipe(stdout_reader), output, False),
+            pumpLines(await readPipe(stderr_reader), output, True),
+        )
+        await loop.run_in_executor(None, process.join)
+
+        return process.exitcode  # type: ignore
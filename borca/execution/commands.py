@@ -0,0 +1,96 @@
+from typing import Deque, Dict, List, Optional, TextIO
+from collections import deque
+import asyncio
+import shlex
+import sys
+
+# number of recent output lines kept per task, to be shown when one of its commands fails
+TAIL_LINES = 50
+
+# size of the chunks read from a command's output pipes
+CHUNK_BYTES = 64 * 1024
+
+# output without a line break is emitted in pieces of at most this size, so memory stays bounded
+MAX_LINE_BYTES = 64 * 1024
+
+# replaced in a task's commands by the input files that changed since the task last completed
+CHANGED_INPUTS_PLACEHOLDER = "{changed_inputs}"
+
+# the environment variables naming the file that lists the changed input files, and telling whether that list is a
+# subset of the task's input files (1) or all of them (0)
+CHANGED_INPUTS_VARIABLE = "BORCA_CHANGED_INPUTS"
+INCREMENTAL_VARIABLE = "BORCA_INCREMENTAL"
+
+
+class CommandOutput:
+    '''
+        Collects the output of a task's commands line by line. Lines are optionally streamed with a `[task]` prefix,
+            and only the last few lines are kept in memory no matter how much a command prints.
+    '''
+
+    def __init__(
+        self, task_name: str, stream: bool, stdout: Optional[TextIO] = None, stderr: Optional[TextIO] = None
+    ) -> None:
+        self.__prefix = f"[{task_name}] "
+        self.__stream = stream
+        self.__stdout = stdout or sys.stdout
+        self.__stderr = stderr or sys.stderr
+        self.tail: Deque[str] = deque(maxlen=TAIL_LINES)
+
+    def write(self, line: bytes, is_stderr: bool) -> None:
+        text = line.decode(errors="replace").rstrip("\r")
+        self.tail.append(text)
+
+        if self.__stream:
+            destination = self.__stderr if is_stderr else self.__stdout
+            destination.write(f"{self.__prefix}{text}\n")
+            destination.flush()
+
+
+async def pumpLines(reader: asyncio.StreamReader, output: CommandOutput, is_stderr: bool) -> None:
+    pending = b""
+    while True:
+        chunk = await reader.read(CHUNK_BYTES)
+        if not chunk:
+            break
+
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            output.write(line, is_stderr)
+
+        while len(pending) > MAX_LINE_BYTES:
+            output.write(pending[:MAX_LINE_BYTES], is_stderr)
+            pending = pending[MAX_LINE_BYTES:]
+
+    if pending:
+        output.write(pending, is_stderr)
+
+
+def expandCommand(command: str, changed_inputs: List[str]) -> Optional[str]:
+    '''
+        Replaces the changed inputs placeholder in a command with the given paths, quoted for the shell. Nothing else
+            in the command is touched, so other braces (e.g. of awk programs or shell variables) keep their meaning.
+            A command with the placeholder but no paths to give it is not to be run, and None is returned, since
+            without arguments many tools work on the whole directory instead.
+    '''
+    if CHANGED_INPUTS_PLACEHOLDER not in command:
+        return command
+    if len(changed_inputs) == 0:
+        return None
+
+    return command.replace(CHANGED_INPUTS_PLACEHOLDER, " ".join(shlex.quote(path) for path in changed_inputs))
+
+
+async def runCommand(command: str, output: CommandOutput, env: Optional[Dict[str, str]] = None) -> int:
+    '''
+        Runs a shell command as a subprocess of the running event loop, passing its stdout and stderr to the given
+            output as they arrive, and returns its exit status.
+    '''
+    proc = await asyncio.create_subprocess_shell(
+        command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=env
+    )  # nosec
+
+    await asyncio.gather(pumpLines(proc.stdout, output, False), pumpLines(proc.stderr, output, True))  # type: ignore
+
+    return await proc.wait()
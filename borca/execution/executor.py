@@ -1,199 +1,662 @@
-from typing import List, Dict, Tuple, Union
+from typing import List, Dict, Tuple, Union, Optional, Set
 from pathlib import Path
-from hashlib import md5
-import subprocess  # nosec
-
-from borca.util import createLogger
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import heapq
+import os
+import sqlite3
+import tempfile
+import time
+
+from borca.util import createLogger, getTracer
+from borca.caching import (
+    TaskRunRecord,
+    TaskInputs,
+    CacheDatabase,
+    FileIndex,
+    GitIndex,
+    ArtifactStore,
+    GarbageCollector,
+    createBackend,
+)
+from borca.execution.commands import (
+    CommandOutput,
+    expandCommand,
+    runCommand,
+    CHANGED_INPUTS_VARIABLE,
+    INCREMENTAL_VARIABLE,
+)
+from borca.execution.globbing import PathMatcher
+from borca.execution.scheduling import estimateDurations, dependentsOf, remainingPathLengths
+from borca.execution.fingerprint import Fingerprinter, combine, relativePath, taskDefinition
+from borca.execution.probes import ToolProber
+from borca.execution.calls import CallRunner
+from borca.execution.explain import Reason, Verdict, fileChanges, inputChanges
 from borca.exceptions import BorcaException
-from borca.parsing import Task
+from borca.parsing import Task, CacheSettings, FileSettings
+
+
+# how often the cache is collected automatically when `max_size` or `max_age` is set
+COLLECTION_INTERVAL_SECONDS = 60 * 60
+
+
+class TaskOutcome:
+    COMPLETED = "completed"
+    CACHED = "cached"
+    FAILED = "failed"
 
 
 class Executor:
-    def __init__(self, config: Dict, tasks: List[Task]) -> None:
+    def __init__(
+        self,
+        config: Dict,
+        tasks: List[Task],
+        cache_settings: Optional[CacheSettings] = None,
+        file_settings: Optional[FileSettings] = None,
+    ) -> None:
         self.__config = config
         self.__tasks = tasks
+        self.__cache_settings = cache_settings or CacheSettings()
+        self.__file_settings = file_settings or FileSettings()
         self.__logger = createLogger('borca.execution.Executor', self.__config['verbosity'])
+        self.__tracer = getTracer()
         self.__root_path = Path(self.__config["toml_path"]).resolve().parent
         self.__cache_directory = Path(f"{self.__root_path}/.borca_cache").resolve()
+        self.__jobs = max(1, self.__config.get("jobs") or os.cpu_count() or 1)
+
+        # state kept in memory between runs of the same executor
+        self.__fingerprints: Dict[str, bytes] = {}
+        self.__inputs: Dict[str, TaskInputs] = {}
+        self.__git_index: Optional[GitIndex] = None
+        self.__call_runner: Optional[CallRunner] = None
+
+        # the file index and fingerprinter are created when the cache is first opened, and kept from then on
+        self.__cache_opened = False
+
+    def run(
+        self,
+        tasks: Optional[List[Task]] = None,
+        changed_paths: Optional[Set[Path]] = None,
+        environ: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, int, int]:
+        '''
+            Runs the given tasks (by default all of them), which must be ordered so every task comes after those of its
+                dependencies that are also given. Without `changed_paths` every file is fingerprinted afresh, while
+                with it only the given paths (and the outputs of the tasks being run) are re-evaluated. The tasks
+                depend on the given environment variables, by default those of this process.
+        '''
+        tasks = self.__tasks if tasks is None else tasks
+        self.__environ = dict(os.environ) if environ is None else environ
+        started_at = time.time()
+        self.__records: List[TaskRunRecord] = []
+        history: Dict[str, List[float]] = {}
 
-    def run(self) -> Tuple[int, int, int]:
-        completed_tasks: int = 0
-        cached_tasks: int = 0
-        check_cache = True
+        if not self.__config["no_hash"]:
+            self.__openCache(tasks, changed_paths)
+            history = self.__database.taskHistory()
+
+            self.__logger.info("Caching enabled for this execution.")
+
+        else:
+            self.__logger.info("Caching will neither be used or updated.")
+
+        completed_tasks, cached_tasks = self.__schedule(tasks, estimateDurations(tasks, history))
 
         if not self.__config["no_hash"]:
-            cached_project_hash_in, cached_project_hash_out = self.__getCachedTaskHash("project")
+            with self.__tracer.span("commit cache", "cache"):
+                self.__database.putRun(started_at, time.time() - started_at, self.__records)
+                self.__file_index.save(self.__database)
+                self.__prober.save(self.__database)
+                try:
+                    self.__database.commit()
+                except sqlite3.Error as e:
+                    self.__logger.warn(f"Unable to update the task cache: {e}")
 
             try:
-                current_project_hash_in, current_project_hash_out = self.__getCurrentTaskHash(
-                    "project", [self.__config["toml_path"]], []
-                )
+                self.__collectPeriodically()
+            except (OSError, sqlite3.Error) as e:
+                self.__logger.warn(f"Unable to collect the garbage in the task cache: {e}")
+            finally:
+                self.__database.close()
 
-                check_cache = (
-                    cached_project_hash_in == current_project_hash_in
-                    and cached_project_hash_out == current_project_hash_out
-                )
+        return len(tasks), completed_tasks, cached_tasks
 
-                if check_cache:
-                    self.__logger.info("Caching enabled for this execution.")
-                else:
-                    self.__logger.info(
-                        "Detected change in config file, therefore task caches will not be used, only updated."
-                    )
+    def explain(self, tasks: Optional[List[Task]] = None) -> List[Tuple[Task, str, List[Reason]]]:
+        '''
+            Will work out what a run of the given tasks (by default all of them) would do without running anything,
+                giving the verdict for every task along with the reasons it would not be found up-to-date. Outputs
+                are neither restored nor recorded, and nothing is written to the cache.
+        '''
+        tasks = self.__tasks if tasks is None else tasks
+        self.__environ = dict(os.environ)
+        explained: List[Tuple[Task, str, List[Reason]]] = []
 
-                self.__cacheTask("project", current_project_hash_in, current_project_hash_out)
+        if self.__config["no_hash"]:
+            return [(task, Verdict.RUN, [("caching is disabled", [])]) for task in tasks]
 
-            except BorcaException as e:
-                self.__logger.warn(
-                    f"Unable to calculate hash for the project config, task caches will not be used, only updated."
-                )
+        # a missing or outdated cache is left alone, so every task is found out of date
+        self.__openCache(tasks, None, read_only=True)
 
+        try:
+            for task in tasks:
+                self.__fingerprints.pop(task.name, None)
+                explained.append((task, *self.__explainTask(task)))
+        finally:
+            self.__database.close()
+
+        return explained
+
+    def __openCache(self, tasks: List[Task], changed_paths: Optional[Set[Path]], read_only: bool = False) -> None:
+        with self.__tracer.span("open cache", "cache"):
+            self.__database = CacheDatabase(self.__cache_directory / "cache.db", read_only)
+            self.__artifacts = ArtifactStore(
+                createBackend(self.__cache_settings, self.__database, self.__root_path), self.__root_path
+            )
+
+            if not self.__cache_opened:
+                self.__git_index = self.__findGitIndex()
+                self.__file_index = FileIndex(self.__database, self.__file_settings.hash_algorithm, self.__git_index)
+            elif self.__git_index is not None:
+                self.__git_index.refresh()
+
+            # tools may have been upgraded since a previous run of the same executor
+            self.__prober = ToolProber(self.__database, self.__logger, self.__environ)
+
+        if not self.__cache_opened or changed_paths is None:
+            self.__fingerprinter = Fingerprinter(self.__file_index, self.__logger, self.__file_settings)
         else:
-            self.__logger.info("Caching will neither be used or updated.")
+            self.__fingerprinter.forget(changed_paths)
+            self.__fingerprinter.invalidate([pattern for task in tasks for pattern in task.output_paths])
 
-        for task in self.__tasks:
-            if (not self.__config["no_hash"]) and (len(task.input_paths) + len(task.output_paths) > 0):
+        self.__cache_opened = True
 
-                try:
-                    current_task_hash_in, current_task_hash_out = self.__getCurrentTaskHash(
-                        task.name, task.input_paths, task.output_paths
-                    )
+    def __findGitIndex(self) -> Optional[GitIndex]:
+        if not self.__file_settings.git_index:
+            return None
+
+        git_index = GitIndex.find(self.__root_path, self.__logger)
+        if git_index is None:
+            self.__logger.info(f"No git repository found at {self.__root_path}, hashing every file from disk")
+        return git_index
+
+    def __fileAlgorithm(self) -> str:
+        '''
+            The algorithm file digests are stored under, which is git's own when they are taken from the git index.
+        '''
+        if self.__cache_opened:
+            return self.__file_index.algorithm
+
+        git_index = self.__findGitIndex()
+        return self.__file_settings.hash_algorithm if git_index is None else f"git-{git_index.object_format}"
 
-                    if check_cache:
-                        cached_task_hash_in, cached_task_hash_out = self.__getCachedTaskHash(task.name)
+    def collectGarbage(
+        self, task_names: Optional[Set[str]] = None, cache_settings: Optional[CacheSettings] = None
+    ) -> Dict[str, int]:
+        '''
+            Collects the garbage in the cache (see `GarbageCollector`), with the given settings in place of the
+                project's. Everything recorded about tasks other than the given ones is removed as well.
+        '''
+        self.__database = CacheDatabase(self.__cache_directory / "cache.db")
+        try:
+            return self.__collector(cache_settings or self.__cache_settings).collect(task_names)
+        finally:
+            self.__database.close()
+
+    def cacheUsage(self) -> Tuple[Dict[str, Dict[str, int]], int, int, int]:
+        '''
+            Will gather how often each task was found up-to-date, run or failed, along with the number of stored
+                manifests, the number of stored objects and their size in bytes.
+        '''
+        self.__database = CacheDatabase(self.__cache_directory / "cache.db")
+        try:
+            backend = createBackend(self.__cache_settings, self.__database, self.__root_path)
+            objects = backend.objects()
+            return (
+                self.__database.outcomeCounts(),
+                len(backend.manifestUses()),
+                len(objects),
+                sum(size for _, size, _ in objects),
+            )
+        finally:
+            self.__database.close()
+
+    def __collector(self, cache_settings: CacheSettings) -> GarbageCollector:
+        backend = createBackend(cache_settings, self.__database, self.__root_path)
+        return GarbageCollector(backend, self.__database, cache_settings, self.__fileAlgorithm())
+
+    def __collectPeriodically(self) -> None:
+        '''
+            Collects the garbage in the cache after a run when a limit is configured, at most once per interval.
+        '''
+        if self.__cache_settings.max_size is None and self.__cache_settings.max_age is None:
+            return
+
+        stamp = self.__cache_directory / "gc.stamp"
+        if stamp.exists() and stamp.stat().st_mtime > time.time() - COLLECTION_INTERVAL_SECONDS:
+            return
+        stamp.touch()
+
+        with self.__tracer.span("collect garbage", "cache"):
+            report = self.__collector(self.__cache_settings).collect()
+
+        self.__logger.info(
+            f"Collected the task cache: removed {report['manifests']} stored output(s) and {report['objects']} "
+            f"object(s), freeing {report['freed_bytes']} bytes"
+        )
 
-                        if (
-                            cached_task_hash_in == current_task_hash_in
-                            and cached_task_hash_out == current_task_hash_out
-                        ):
-                            self.__logger.info(f"Task {task.name} is up-to-date")
-                            cached_tasks += 1
-                            continue
+    def history(self) -> Tuple[int, Dict[str, List[float]]]:
+        '''
+            Will gather the number of recorded runs and the recent durations of each task from the cache database.
+        '''
+        if not (self.__cache_directory / "cache.db").exists():
+            return 0, {}
 
-                except BorcaException as e:
-                    self.__logger.warn(f"{e}")
+        database = CacheDatabase(self.__cache_directory / "cache.db")
+        try:
+            return database.runCount(), database.taskHistory()
+        finally:
+            database.close()
 
-            self.__logger.info(f"Executing task: {task.name}")
+    def __schedule(self, tasks: List[Task], durations: Dict[str, float]) -> Tuple[int, int]:
+        return asyncio.run(self.__scheduleTasks(tasks, durations))
+
+    async def __scheduleTasks(self, tasks: List[Task], durations: Dict[str, float]) -> Tuple[int, int]:
+        '''
+            Runs the task graph on an event loop, with commands as asynchronous subprocesses and hashing on a pool of
+                worker threads. A task is started as soon as all of its dependencies have finished, with at most `jobs`
+                tasks running at once. Among the ready tasks, the one with the longest estimated path to the end of
+                the graph goes first, so the critical path is never left waiting. After a failure no new tasks are
+                started, but the tasks already running are allowed to finish.
+        '''
+        completed_tasks: int = 0
+        cached_tasks: int = 0
+        failed = False
+
+        # dependencies outside of the given tasks are treated as already finished
+        dependents = dependentsOf(tasks)
+        remaining: Dict[str, int] = {task.name: 0 for task in tasks}
+        for task_dependents in dependents.values():
+            for dependent in task_dependents:
+                remaining[dependent.name] += 1
+
+        # ties are broken by the given order, keeping runs without history deterministic
+        path_lengths = remainingPathLengths(tasks, durations)
+        priority = {task.name: (-path_lengths[task.name], index) for index, task in enumerate(tasks)}
+
+        ready: List[Tuple[Tuple[float, int], Task]] = []
+        for task in tasks:
+            if remaining[task.name] == 0:
+                heapq.heappush(ready, (priority[task.name], task))
+
+        running: Dict[asyncio.Future, Task] = {}
+
+        self.__logger.debug(f"Running up to {self.__jobs} task(s) at once")
+
+        with ThreadPoolExecutor(max_workers=self.__jobs) as pool:
+            while ready or running:
+                while ready and not failed and len(running) < self.__jobs:
+                    _, task = heapq.heappop(ready)
+                    running[asyncio.ensure_future(self.__tracedTask(task, pool))] = task
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+
+                for future in done:
+                    task = running.pop(future)
+                    outcome = future.result()
+
+                    if outcome == TaskOutcome.FAILED:
+                        failed = True
+                        continue
+
+                    if outcome == TaskOutcome.CACHED:
+                        cached_tasks += 1
+                    else:
+                        completed_tasks += 1
+
+                    for dependent in dependents[task.name]:
+                        remaining[dependent.name] -= 1
+                        if remaining[dependent.name] == 0:
+                            heapq.heappush(ready, (priority[dependent.name], dependent))
+
+        return completed_tasks, cached_tasks
+
+    async def __tracedTask(self, task: Task, pool: ThreadPoolExecutor) -> str:
+        started_at = time.monotonic()
+
+        with self.__tracer.span(task.name, "task", track=task.name) as args:
+            outcome, exit_status = await self.__runTask(task, pool)
+            args["outcome"] = outcome
+
+        self.__records.append((task.name, time.monotonic() - started_at, exit_status, outcome))
+        return outcome
+
+    async def __runTask(self, task: Task, pool: ThreadPoolExecutor) -> Tuple[str, Optional[int]]:
+        '''
+            Runs a single task unless it is up-to-date, returning its outcome and the exit status of its commands.
+        '''
+        loop = asyncio.get_event_loop()
+
+        fingerprint, outcome = await loop.run_in_executor(pool, self.__checkTask, task)
+        if outcome is not None:
+            return outcome, None
+
+        self.__logger.info(f"Executing task: {task.name}")
+        started_at = time.monotonic()
+        output = CommandOutput(task.name, stream=self.__config["verbosity"] > 0)
+
+        changed_inputs: List[str] = []
+        changed_list_path: Optional[str] = None
+        env = dict(self.__environ)
+        if len(task.input_paths) > 0:
+            changed_inputs, incremental = await loop.run_in_executor(pool, self.__changedInputs, task)
+            changed_list, changed_list_path = tempfile.mkstemp(prefix="borca-changed-", suffix=".txt")
+            with os.fdopen(changed_list, "w") as changed_list_file:
+                changed_list_file.write("".join(f"{path}\n" for path in changed_inputs))
+            env.update({CHANGED_INPUTS_VARIABLE: changed_list_path, INCREMENTAL_VARIABLE: str(int(incremental))})
+
+        try:
+            if task.call is not None:
+                self.__logger.debug(f"Calling: {task.call}")
+
+                with self.__tracer.span(task.call, "call", track=task.name, task=task.name):
+                    returncode = await self.__callRunner().run(task.call, output, env)
+
+                if returncode != 0:
+                    self.__logger.error(
+                        f"Error occurred in calling \"{task.call}\" under task \"{task.name}.\"\n"
+                        f"Call '{task.call}' returned non-zero exit status {returncode}."
+                        + "".join(f"\n[{task.name}] {line}" for line in output.tail)
+                    )
+                    return TaskOutcome.FAILED, returncode
 
             for command in task.commands:
+                expanded = expandCommand(command, changed_inputs)
+                if expanded is None:
+                    self.__logger.debug(f"Skipping command without changed input files: {command}")
+                    continue
+
+                command = expanded
                 self.__logger.debug(f"Running command: {command}")
 
-                if self.__config["verbosity"] == 0:
-                    proc = subprocess.run(command, shell=True, capture_output=True)  # nosec
-                else:
-                    proc = subprocess.run(command, shell=True)  # nosec
+                with self.__tracer.span(command, "command", track=task.name, task=task.name):
+                    returncode = await runCommand(command, output, env)
 
-                try:
-                    proc.check_returncode()
-                except subprocess.CalledProcessError as e:
+                if returncode != 0:
                     self.__logger.error(
-                        f"Error occurred in running command \"{command}\" under task \"{task.name}.\"\n{e}"
+                        f"Error occurred in running command \"{command}\" under task \"{task.name}.\"\n"
+                        f"Command '{command}' returned non-zero exit status {returncode}."
+                        + "".join(f"\n[{task.name}] {line}" for line in output.tail)
                     )
-                    return len(self.__tasks), completed_tasks, cached_tasks
+                    return TaskOutcome.FAILED, returncode
 
                 self.__logger.debug(f"Completed command: {command}")
 
-            self.__logger.info(f"Completed task: {task.name}")
-            completed_tasks += 1
+        finally:
+            if changed_list_path is not None:
+                os.unlink(changed_list_path)
 
-            if (not self.__config["no_hash"]) and (len(task.input_paths) + len(task.output_paths) > 0):
+        self.__logger.info(f"Completed task: {task.name}")
 
-                try:
-                    current_task_hash_in, current_task_hash_out = self.__getCurrentTaskHash(
-                        task.name, task.input_paths, task.output_paths
-                    )
-                    self.__cacheTask(task.name, current_task_hash_in, current_task_hash_out)
+        if fingerprint is not None:
+            await loop.run_in_executor(pool, self.__recordTask, task, fingerprint, time.monotonic() - started_at)
 
-                except BorcaException as e:
-                    self.__logger.warn(f"{e}")
+        return TaskOutcome.COMPLETED, 0
 
-        return len(self.__tasks), completed_tasks, cached_tasks
+    def __callRunner(self) -> CallRunner:
+        '''
+            The runner of every task declared with `call`, whose warm process imports the modules of all of them.
+        '''
+        if self.__call_runner is None:
+            calls = [task.call for task in self.__tasks if task.call is not None]
+            self.__call_runner = CallRunner(calls, str(self.__root_path))
+        return self.__call_runner
 
-    def __getCachedTaskHash(self, task_name: str) -> Tuple[bytes, bytes]:
+    def __changedInputs(self, task: Task) -> Tuple[List[str], bool]:
         '''
-            Will attempt to gather input and output hashes for a given task name, will default to an empty
-                byte string if it failed for any reason, insinuating that it does not exist yet or may never.
+            Will gather the input files of a task that is about to run which changed (or were added) since it last
+                completed, along with whether that is a subset of its input files. When anything besides its input
+                files changed (its definition, the environment or an upstream task), or nothing is known about its
+                last run, all of its input files are given instead.
         '''
-        input_cache_file = Path(f"{self.__cache_directory}/{task_name}.in").resolve()
-        try:
-            input_cache = input_cache_file.read_bytes()
-        except:
-            # pretend that it doesn't exist for now
-            input_cache = b""
+        inputs = self.__inputs.get(task.name)
+
+        if inputs is None:
+            # without a fingerprint (e.g. with --no-hash) the input files are only globbed
+            matcher = PathMatcher(
+                task.input_paths,
+                self.__file_settings.exclude_paths + task.exclude_paths,
+                self.__file_settings.gitignore,
+            )
+            return [relativePath(path) for path in matcher.files()], False
+
+        current = sorted(inputs[3])
+        previous = self.__database.getTaskInputs(task.name)
+
+        if previous is None or previous[:3] != inputs[:3]:
+            self.__logger.debug(f"Passing all {len(current)} input file(s) to task {task.name}")
+            return current, False
+
+        changed = [path for path in current if previous[3].get(path) != inputs[3][path]]
+        if len(changed) == 0:
+            # e.g. only its outputs went missing, which the task can only rebuild from all of its inputs
+            return current, False
+
+        self.__logger.debug(f"Passing {len(changed)} of {len(current)} input file(s) to task {task.name}")
+        return changed, True
+
+    def __checkTask(self, task: Task) -> Tuple[Optional[bytes], Optional[str]]:
+        '''
+            Will fingerprint a task and compare it with the cache, restoring its outputs from the artifact cache when
+                possible. Returns the task's fingerprint (if it has one) and, when it does not need to be run, its
+                outcome.
+        '''
+        self.__fingerprints.pop(task.name, None)
+        self.__inputs.pop(task.name, None)
+
+        if self.__config["no_hash"]:
+            return None, None
 
-        output_cache_file = Path(f"{self.__cache_directory}/{task_name}.out").resolve()
         try:
-            output_cache = output_cache_file.read_bytes()
-        except:
-            # pretend that it doesn't exist for now
-            output_cache = b""
-
-        return input_cache, output_cache
-
-    def __getCurrentTaskHash(
-        self, task_name: str, input_patterns: List[str], output_patterns: List[str]
-    ) -> Tuple[bytes, bytes]:
-        '''
-            Will produce has byte strings for both input and output patterns. These byte strings will default to an
-                empty byte string when no patterns are specified and will throw an error when the all files of valid 
-                patterns fail to be hashed. 
-        '''
-
-        input_hash = md5()  # nosec
-        if len(input_patterns) > 0:
-            for pattern in input_patterns:
-                for path in Path(".").glob(pattern):
-                    path = path.resolve()
-                    if path.exists() and path.is_file():  # NOTE: this will disregard directory only paths
-                        try:
-                            input_hash.update(path.read_bytes())
-                        except:
-                            raise BorcaException(
-                                f"Unable to compute output hash for {path} on task {task_name}, caching for this task will be disabled."
-                            )
-                    else:
-                        self.__logger.warn(f"Input path {path} on task {task_name} is not a valid file.")
-                        # but allow other paths to create a hash
+            fingerprint = self.__taskFingerprint(task)
 
-            input_hash_bytes = input_hash.digest()
-        else:
-            input_hash_bytes = b""
-
-        output_hash = md5()  # nosec
-        if len(output_patterns) > 0:
-            for pattern in output_patterns:
-                for path in Path(".").glob(pattern):
-                    path = path.resolve()
-                    if path.exists() and path.is_file():  # NOTE: this will disregard directory only paths
-                        try:
-                            output_hash.update(path.read_bytes())
-                        except:
-                            raise BorcaException(
-                                f"Unable to compute output hash for {path} on task {task_name}, caching for this task will be disabled."
-                            )
-                    else:
-                        self.__logger.warn(f"Input path {path} on task {task_name} is not valid.")
-                        # but allow other paths to create a hash
+            if fingerprint is not None and len(task.input_paths) + len(task.output_paths) > 0:
+                current_task_hash_out = self.__fingerprinter.hashPatterns(
+                    task.name, task.output_paths, task.exclude_paths
+                )
+
+                cached_fingerprint, cached_task_hash_out = self.__database.getTaskHash(task.name)
+
+                if cached_fingerprint == fingerprint and cached_task_hash_out == current_task_hash_out:
+                    self.__logger.info(f"Task {task.name} is up-to-date")
+                    self.__fingerprints[task.name] = combine(fingerprint, current_task_hash_out)
+                    return fingerprint, TaskOutcome.CACHED
+
+                if self.__restoreOutputs(task, fingerprint):
+                    return fingerprint, TaskOutcome.CACHED
+
+            return fingerprint, None
 
-            output_hash_bytes = output_hash.digest()
+        except BorcaException as e:
+            self.__logger.warn(f"{e}")
+            return None, None
+
+    def __recordTask(self, task: Task, fingerprint: bytes, duration: float) -> None:
+        '''
+            Records the state a task was left in by running it, and stores its outputs in the artifact cache.
+        '''
+        if len(task.input_paths) + len(task.output_paths) == 0:
+            # nothing is known about the task's outputs, but downstream tasks can still rely on its definition
+            self.__fingerprints[task.name] = combine(fingerprint, b"")
+            return
+
+        # only the task's outputs may have been written, so its inputs keep the hash computed before it ran
+        self.__fingerprinter.invalidate(task.output_paths)
+
+        try:
+            output_files = self.__fingerprinter.matchedFiles(task.name, task.output_paths, task.exclude_paths)
+            current_task_hash_out = self.__fingerprinter.hashPatterns(
+                task.name, task.output_paths, task.exclude_paths
+            )
+            self.__database.putTaskHash(task.name, fingerprint, current_task_hash_out, duration)
+            self.__recordInputs(task)
+            self.__fingerprints[task.name] = combine(fingerprint, current_task_hash_out)
+
+            artifact_key = self.__artifactKey(task, fingerprint)
+            if artifact_key is not None and len(output_files) > 0:
+                with self.__tracer.span(f"store artifacts {task.name}", "cache", files=len(output_files)):
+                    self.__artifacts.store(task.name, artifact_key, output_files)
+
+        except BorcaException as e:
+            self.__logger.warn(f"{e}")
+        except OSError as e:
+            self.__logger.warn(f"Unable to store the outputs of task {task.name} in the artifact cache: {e}")
+
+    def __taskFingerprint(self, task: Task) -> Optional[bytes]:
+        '''
+            Will produce a task's fingerprint from its input files, its own definition, the environment and the
+                fingerprints of its dependencies, which in turn cover their definitions and the outputs they produced.
+                A task has no fingerprint when one of its dependencies has none. What the fingerprint was computed from
+                (leaving out such dependencies) is kept until the task is recorded, so later runs can explain why it
+                changed.
+
+            Every task is fingerprinted, even when all of its dependencies were up-to-date, since its own input files,
+                definition or environment may have changed on their own. What keeps this cheap is that unchanged files
+                are only stat'ed (see `FileIndex`), and globs and digests shared with other tasks are computed once.
+        '''
+        files: List[Tuple[Path, bytes]] = []
+        input_hash = b""
+        if len(task.input_paths) > 0:
+            files = self.__fingerprinter.matchedFiles(task.name, task.input_paths, task.exclude_paths)
+            input_hash = Fingerprinter.hashFiles(files)
+
+        definition = taskDefinition(task)
+        environment = self.__prober.environment(task.name, task.env_inputs, task.tool_inputs)
+        fields = [input_hash, definition]
+        for name, digest in sorted(environment.items()):
+            fields.extend((name.encode(), digest))
+
+        dependencies: Dict[str, bytes] = {}
+
+        for dep in sorted(task.dependencies, key=lambda dep: dep.name):
+            dep_fingerprint = self.__fingerprints.get(dep.name)
+            if dep_fingerprint is not None:
+                fields.extend((dep.name.encode(), dep_fingerprint))
+                dependencies[dep.name] = dep_fingerprint
+
+        self.__inputs[task.name] = (
+            definition.decode(),
+            environment,
+            dependencies,
+            {relativePath(path): digest for path, digest in files},
+        )
+
+        if len(dependencies) < len(task.dependencies):
+            return None
+
+        return combine(*fields)
+
+    def __recordInputs(self, task: Task) -> None:
+        inputs = self.__inputs.pop(task.name, None)
+        if inputs is not None:
+            self.__database.putTaskInputs(task.name, inputs)
+
+    def __explainTask(self, task: Task) -> Tuple[str, List[Reason]]:
+        '''
+            Will work out whether a task would be found up-to-date, be restored from the artifact cache or be run,
+                following the same steps as `__checkTask` without any of its side effects.
+        '''
+        try:
+            fingerprint = self.__taskFingerprint(task)
+        except BorcaException as e:
+            return Verdict.RUN, [(f"{e}", [])]
+
+        inputs = self.__inputs.pop(task.name)
+        previous = self.__database.getTaskInputs(task.name)
+
+        if fingerprint is None:
+            # the fingerprints of the upstream tasks that would run are unknown, but the rest can still be compared
+            upstream = sorted(dep.name for dep in task.dependencies if dep.name not in inputs[2])
+            reasons: List[Reason] = [(f"upstream task {name} would run first", []) for name in upstream]
+            if previous is not None:
+                dependencies = dict(inputs[2], **{name: previous[2][name] for name in upstream if name in previous[2]})
+                reasons.extend(inputChanges(previous, (inputs[0], inputs[1], dependencies, inputs[3])))
+            return Verdict.RUN, reasons
+
+        if len(task.input_paths) + len(task.output_paths) == 0:
+            # such a task always runs, but downstream tasks can still rely on its definition
+            self.__fingerprints[task.name] = combine(fingerprint, b"")
+            return Verdict.RUN, [("it has neither input_paths nor output_paths, so it is never cached", [])]
+
+        current_task_hash_out = self.__fingerprinter.hashPatterns(task.name, task.output_paths, task.exclude_paths)
+        cached_fingerprint, cached_task_hash_out = self.__database.getTaskHash(task.name)
+
+        if cached_fingerprint == fingerprint and cached_task_hash_out == current_task_hash_out:
+            self.__fingerprints[task.name] = combine(fingerprint, current_task_hash_out)
+            return Verdict.UP_TO_DATE, []
+
+        reasons = []
+        artifact_key = self.__artifactKey(task, fingerprint)
+        stored_outputs = None if artifact_key is None else self.__artifacts.available(task.name, artifact_key)
+
+        if cached_fingerprint == b"":
+            reasons.append(("it has not run before", []))
+        elif cached_fingerprint == fingerprint:
+            current_outputs = self.__fingerprinter.matchedFiles(task.name, task.output_paths, task.exclude_paths)
+            changes = []
+            if stored_outputs is not None:
+                changes = fileChanges(
+                    {relativePath(path): digest for path, digest in stored_outputs},
+                    {relativePath(path): digest for path, digest in current_outputs},
+                    "output",
+                )
+            reasons.extend(changes or [("its output files are missing or were modified", [])])
         else:
-            output_hash_bytes = b""
+            changes = [] if previous is None else inputChanges(previous, inputs)
+            reasons.extend(changes or [("its fingerprint changed", [])])
 
-        return input_hash_bytes, output_hash_bytes
+        if stored_outputs is not None:
+            self.__fingerprints[task.name] = combine(fingerprint, Fingerprinter.hashFiles(stored_outputs))
+            return Verdict.RESTORE, reasons
 
-    def __cacheTask(self, task_name, input_hash: bytes, output_hash: bytes) -> None:
-        if type(input_hash) is bytes:
-            input_cache_file = Path(f"{self.__cache_directory}/{task_name}.in").resolve()
-            input_cache_file.parent.mkdir(parents=True, exist_ok=True)
-            try:
-                input_cache_file.write_bytes(input_hash)
-            except Exception as e:
-                self.__logger.warn(f"Unable to update input cache for task: {task_name}")
+        return Verdict.RUN, reasons
 
-        if type(output_hash) is bytes:
-            output_cache_file = Path(f"{self.__cache_directory}/{task_name}.out").resolve()
-            output_cache_file.parent.mkdir(parents=True, exist_ok=True)
-            try:
-                output_cache_file.write_bytes(output_hash)
-            except Exception as e:
-                self.__logger.warn(f"Unable to update output cache for task: {task_name}")
+    def __artifactKey(self, task: Task, fingerprint: bytes) -> Optional[bytes]:
+        '''
+            Will produce the key a task's outputs are stored under in the artifact cache. Tasks without input patterns
+                have no key, since their fingerprint does not identify what their outputs were built from.
+        '''
+        if len(task.input_paths) == 0 or len(task.output_paths) == 0:
+            return None
+
+        return fingerprint
+
+    def __restoreOutputs(self, task: Task, fingerprint: bytes) -> bool:
+        '''
+            Will attempt to restore a task's outputs from the artifact cache, recording the restored outputs as the
+                task's current state.
+        '''
+        artifact_key = self.__artifactKey(task, fingerprint)
+        if artifact_key is None:
+            return False
+
+        try:
+            with self.__tracer.span(f"restore artifacts {task.name}", "cache") as args:
+                args["restored"] = self.__artifacts.restore(task.name, artifact_key)
+
+            if not args["restored"]:
+                return False
+        except OSError as e:
+            self.__logger.warn(f"Unable to restore the outputs of task {task.name} from the artifact cache: {e}")
+            return False
+
+        self.__fingerprinter.invalidate(task.output_paths)
+        output_hash = self.__fingerprinter.hashPatterns(task.name, task.output_paths, task.exclude_paths)
+        self.__database.putTaskHash(task.name, fingerprint, output_hash)
+        self.__recordInputs(task)
+        self.__fingerprints[task.name] = combine(fingerprint, output_hash)
+        self.__logger.info(f"Task {task.name} restored from the artifact cache")
+
+        return True
@@ -0,0 +1,80 @@
+from typing import Dict, List, Tuple
+import json
+
+from borca.caching import TaskInputs
+from borca.execution.probes import PLATFORM_KEY, ENV_PREFIX, TOOL_PREFIX
+
+# a reason for a task to run: a description along with the paths it concerns (if any)
+Reason = Tuple[str, List[str]]
+
+
+class Verdict:
+    UP_TO_DATE = "up-to-date"
+    RESTORE = "restore"
+    RUN = "run"
+
+
+def fileChanges(previous: Dict[str, bytes], current: Dict[str, bytes], kind: str) -> List[Reason]:
+    '''
+        Will compare two sets of file digests keyed by relative path, describing the files that were added, removed
+            or modified in between.
+    '''
+    reasons: List[Reason] = []
+
+    added = sorted(path for path in current if path not in previous)
+    removed = sorted(path for path in previous if path not in current)
+    modified = sorted(path for path in current if path in previous and previous[path] != current[path])
+
+    if len(added) > 0:
+        reasons.append((f"{kind} files were added", added))
+    if len(removed) > 0:
+        reasons.append((f"{kind} files were removed", removed))
+    if len(modified) > 0:
+        reasons.append((f"{kind} files were modified", modified))
+
+    return reasons
+
+
+def inputChanges(previous: TaskInputs, current: TaskInputs) -> List[Reason]:
+    '''
+        Will describe every difference between what a task's recorded fingerprint was computed from and what its
+            current one is computed from.
+    '''
+    reasons: List[Reason] = []
+
+    previous_definition, current_definition = json.loads(previous[0]), json.loads(current[0])
+    changed_fields = sorted(
+        field
+        for field in set(previous_definition) | set(current_definition)
+        if previous_definition.get(field) != current_definition.get(field)
+    )
+    if "commands" in changed_fields:
+        changed_fields.remove("commands")
+        reasons.append(("its commands changed", []))
+    if len(changed_fields) > 0:
+        reasons.append((f"its configuration changed ({', '.join(changed_fields)})", []))
+
+    # parts of the environment that were only added or removed come with a change of configuration
+    previous_environment, current_environment = previous[1], current[1]
+    for name in sorted(set(previous_environment) & set(current_environment)):
+        if previous_environment[name] == current_environment[name]:
+            continue
+        if name == PLATFORM_KEY:
+            reasons.append(("the platform changed", []))
+        elif name.startswith(ENV_PREFIX):
+            reasons.append((f"environment variable {name[len(ENV_PREFIX) :]} changed", []))
+        elif name.startswith(TOOL_PREFIX):
+            reasons.append((f'the output of tool probe "{name[len(TOOL_PREFIX) :]}" changed', []))
+
+    previous_dependencies, current_dependencies = previous[2], current[2]
+    for name in sorted(set(previous_dependencies) | set(current_dependencies)):
+        if name not in previous_dependencies:
+            reasons.append((f"it now depends on task {name}", []))
+        elif name not in current_dependencies:
+            reasons.append((f"it no longer depends on task {name}", []))
+        elif previous_dependencies[name] != current_dependencies[name]:
+            reasons.append((f"upstream task {name} changed since it last ran", []))
+
+    reasons.extend(fileChanges(previous[3], current[3], "input"))
+
+    return reasons
@@ -0,0 +1,245 @@
+from typing import Dict, FrozenSet, List, Iterable, Optional, Set, Tuple
+from pathlib import Path
+from hashlib import md5
+from threading import Lock
+from concurrent.futures import Future
+import json
+import logging
+import os
+import platform
+import sys
+
+from borca.caching import FileIndex
+from borca.exceptions import BorcaException
+from borca.execution.globbing import GlobFilter, PathMatcher
+from borca.parsing import Task, FileSettings
+from borca.util import getTracer
+
+
+def combine(*fields: bytes) -> bytes:
+    '''
+        Hashes a sequence of byte strings unambiguously, by prefixing each field with its length.
+    '''
+    combined = md5()  # nosec
+    for field in fields:
+        combined.update(len(field).to_bytes(8, "big"))
+        combined.update(field)
+
+    return combined.digest()
+
+
+def taskDefinition(task: Task) -> bytes:
+    '''
+        Serializes the parsed definition of a task canonically, so that only changes to the task itself (and not to
+            unrelated parts of the TOML file) change its fingerprint.
+    '''
+    return json.dumps(task.dict(exclude={"dependencies"}), sort_keys=True, separators=(",", ":")).encode()
+
+
+def relativePath(path: Path) -> str:
+    '''
+        The path of a file relative to the working directory, in the form it is hashed and recorded in.
+    '''
+    return os.path.relpath(path).replace(os.sep, "/")
+
+
+# the patterns and exclusions a glob expansion was made for
+GlobKey = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+# the parts of the environment every task's outcome may depend on
+ENVIRONMENT_FINGERPRINT = combine(sys.platform.encode(), platform.machine().encode())
+
+
+class Fingerprinter:
+    '''
+        Computes task I/O hashes for the duration of a single run. Glob expansions and file digests are memoized and
+            shared between all tasks of the run, so a file matched by several tasks is only hashed once. Each is
+            memoized as a future as soon as one task starts computing it, so tasks running at the same time wait for
+            the result instead of computing it again.
+    '''
+
+    def __init__(
+        self, file_index: FileIndex, logger: logging.Logger, file_settings: Optional[FileSettings] = None
+    ) -> None:
+        self.__file_index = file_index
+        self.__logger = logger
+        self.__file_settings = file_settings or FileSettings()
+        self.__tracer = getTracer()
+        self.__lock = Lock()
+        self.__globs: Dict[GlobKey, "Future[List[Path]]"] = {}
+        # the files of every finished glob expansion
+        self.__members: Dict[GlobKey, FrozenSet[Path]] = {}
+        self.__filters: Dict[GlobKey, GlobFilter] = {}
+        self.__digests: Dict[Path, "Future[bytes]"] = {}
+
+    def expand(self, patterns: List[str], exclude_paths: List[str] = []) -> List[Path]:
+        '''
+            Will gather the files matched by the given patterns in a single walk, sorted by path. Files excluded by the
+                given patterns or by the project's file settings are left out.
+        '''
+        key = (tuple(patterns), tuple(exclude_paths))
+        with self.__lock:
+            future = self.__globs.get(key)
+            owned = future is None
+            if future is None:
+                future = self.__globs[key] = Future()
+
+        if owned:
+            try:
+                with self.__tracer.span(f"glob {' '.join(patterns)}", "glob") as args:
+                    paths = self.__matcher(patterns, exclude_paths).files()
+                    args["matches"] = len(paths)
+            except BaseException as e:
+                self.__abandon(self.__globs, {key: future}, e)
+                raise
+
+            with self.__lock:
+                if self.__globs.get(key) is future:
+                    self.__members[key] = frozenset(paths)
+            future.set_result(paths)
+
+        return future.result()
+
+    def __abandon(self, memo: Dict, futures: Dict, error: BaseException) -> None:
+        '''
+            Hands an error to the tasks waiting for the given futures, and forgets the futures so the next task to need
+                them tries again.
+        '''
+        with self.__lock:
+            for key, future in futures.items():
+                if memo.get(key) is future:
+                    del memo[key]
+
+        for future in futures.values():
+            future.set_exception(error)
+
+    def __filter(self, key: GlobKey) -> GlobFilter:
+        glob_filter = self.__filters.get(key)
+        if glob_filter is None:
+            glob_filter = GlobFilter(list(key[0]), self.__file_settings.exclude_paths + list(key[1]))
+            self.__filters[key] = glob_filter
+        return glob_filter
+
+    def __matcher(self, patterns: List[str], exclude_paths: List[str]) -> PathMatcher:
+        return PathMatcher(
+            patterns, self.__file_settings.exclude_paths + exclude_paths, self.__file_settings.gitignore
+        )
+
+    def fileDigests(self, paths: List[Path]) -> List[bytes]:
+        '''
+            Will produce the digests of the given files, hashing the files not yet seen during this run in parallel.
+        '''
+        owned: Dict[Path, "Future[bytes]"] = {}
+        futures: List["Future[bytes]"] = []
+        with self.__lock:
+            for path in paths:
+                future = self.__digests.get(path)
+                if future is None:
+                    future = self.__digests[path] = owned[path] = Future()
+                futures.append(future)
+
+        # files being hashed for another task are waited for only after hashing those no other task has claimed
+        if len(owned) > 0:
+            try:
+                digests = self.__file_index.digests(list(owned))
+            except BaseException as e:
+                self.__abandon(self.__digests, owned, e)
+                raise
+
+            for future, digest in zip(owned.values(), digests):
+                future.set_result(digest)
+
+        return [future.result() for future in futures]
+
+    def matchedFiles(
+        self, task_name: str, patterns: List[str], exclude_paths: List[str] = []
+    ) -> List[Tuple[Path, bytes]]:
+        '''
+            Will gather the (path, digest) pairs of all files matched by the given patterns, throwing an error when a
+                file of a valid pattern fails to be hashed.
+        '''
+        with self.__tracer.span(f"hash {task_name}", "hash", patterns=patterns) as args:
+            paths = self.expand(patterns, exclude_paths)
+            try:
+                files = list(zip(paths, self.fileDigests(paths)))
+            except OSError as e:
+                raise BorcaException(
+                    f"Unable to compute hash for {e.filename} on task {task_name}, "
+                    "caching for this task will be disabled."
+                )
+
+            args["files"] = len(files)
+            if self.__tracer.enabled:
+                args["bytes"] = sum(path.stat().st_size for path, _ in files)
+
+        return files
+
+    def hashPatterns(self, task_name: str, patterns: List[str], exclude_paths: List[str] = []) -> bytes:
+        '''
+            Will produce a hash byte string for the files matched by the given patterns. This byte string will default
+                to an empty byte string when no patterns are specified.
+        '''
+        if len(patterns) == 0:
+            return b""
+
+        return self.hashFiles(self.matchedFiles(task_name, patterns, exclude_paths))
+
+    @staticmethod
+    def hashFiles(files: List[Tuple[Path, bytes]]) -> bytes:
+        '''
+            Combines the digests of the given files along with their paths (relative to the working directory), in
+                order of path, so neither the order the files were found in nor the location of the project matter.
+        '''
+        fields: List[bytes] = []
+        for path, digest in sorted(files):
+            fields.extend((relativePath(path).encode(), digest))
+
+        return combine(*fields)
+
+    def forget(self, paths: Iterable[Path]) -> None:
+        '''
+            Forgets the digests of the given paths, which were changed since they were hashed. Glob expansions are only
+                forgotten when one of the paths was created in or removed from them, so expansions stay valid across
+                runs as long as files are merely modified.
+        '''
+        # which of the paths are files now, telling those that were created or removed since they were expanded
+        present = {path: path.is_file() for path in paths}
+
+        with self.__lock:
+            for key in list(self.__globs):
+                found = self.__members.get(key)
+                glob_filter = self.__filter(key)
+                if found is None or any(
+                    (path in found) != (is_file and glob_filter.matches(path)) for path, is_file in present.items()
+                ):
+                    del self.__globs[key]
+                    self.__members.pop(key, None)
+
+            for path in present:
+                self.__digests.pop(path, None)
+
+    def invalidate(self, patterns: List[str]) -> None:
+        '''
+            Forgets everything memoized about the files matched by the given patterns, both before and after a task
+                that may have written them has run. Only the glob expansions these files were in, or that they may
+                have been added to, are forgotten along with them.
+        '''
+        if len(patterns) == 0:
+            return
+
+        written: Set[Path] = set(self.__matcher(patterns, []).files())
+        with self.__lock:
+            for key, members in self.__members.items():
+                if not set(key[0]).isdisjoint(patterns):
+                    written.update(members)
+
+            for key in list(self.__globs):
+                # an expansion still being made may or may not have found the written files
+                found = self.__members.get(key)
+                glob_filter = self.__filter(key)
+                if found is None or any(path in found or glob_filter.matches(path) for path in written):
+                    del self.__globs[key]
+                    self.__members.pop(key, None)
+
+            for path in written:
+                self.__digests.pop(path, None)
@@ -0,0 +1,375 @@
+from typing import AbstractSet, Dict, FrozenSet, List, Optional, Pattern, Set, Tuple
+from pathlib import Path
+import os
+import re
+
+# directories that are never walked into, wherever they are found
+ALWAYS_EXCLUDED = frozenset((".borca_cache",))
+
+# a segment of a pattern holding any of these characters is matched against names, while others are taken literally
+WILDCARDS = frozenset("*?[")
+
+# a state of the matcher: the index of a pattern and the index of its next segment to be matched
+State = Tuple[int, int]
+
+
+def translateSegment(segment: str) -> str:
+    '''
+        Translates a single glob segment (a file or directory name) to a regular expression.
+    '''
+    regex = []
+    index = 0
+
+    while index < len(segment):
+        char = segment[index]
+        index += 1
+
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            # a closing bracket right after the opening one (or its negation) is part of the set
+            end = index + 1 if segment[index : index + 1] == "!" else index
+            end = segment.find("]", end + 1)
+            if end == -1:
+                regex.append("\\[")
+                continue
+
+            body = segment[index:end].replace("\\", "\\\\")
+            index = end + 1
+
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            elif body.startswith("^"):
+                body = "\\" + body
+            regex.append(f"[{body}]")
+        else:
+            regex.append(re.escape(char))
+
+    return "".join(regex)
+
+
+def translateGlob(pattern: str) -> str:
+    '''
+        Translates a glob matching whole relative paths to a regular expression, where a `**` segment matches any
+            number of directories and a trailing `**` matches everything below.
+    '''
+    segments = pattern.split("/")
+    regex = []
+
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == "**":
+            regex.append(".*" if last else "(?:[^/]*/)*")
+        else:
+            regex.append(translateSegment(segment) + ("" if last else "/"))
+
+    return "".join(regex)
+
+
+def splitPattern(pattern: str) -> List[str]:
+    '''
+        Splits a glob into its segments, dropping empty and `.` segments. An absolute glob keeps its leading `/`.
+    '''
+    segments = [segment for segment in pattern.replace(os.sep, "/").split("/") if segment not in ("", ".")]
+    if pattern.startswith("/"):
+        segments.insert(0, "/")
+
+    return segments
+
+
+def joinRelative(relative: str, name: str) -> str:
+    if relative == "":
+        return name
+    if relative.endswith("/"):
+        return f"{relative}{name}"
+    return f"{relative}/{name}"
+
+
+class IgnoreRules:
+    '''
+        The rules of the .gitignore files that apply within a directory. As with git, the last matching rule wins and
+            the rules of a nested .gitignore file come after those of its parents.
+    '''
+
+    def __init__(self, rules: Tuple[Tuple[str, Pattern, bool, bool], ...] = ()) -> None:
+        self.__rules = rules
+
+    def extend(self, gitignore_path: str, base: str) -> "IgnoreRules":
+        '''
+            Will return these rules followed by those of the given .gitignore file, whose patterns are relative to
+                the `base` directory (given relative to the working directory).
+        '''
+        try:
+            with open(gitignore_path, encoding="utf-8", errors="replace") as gitignore:
+                lines = gitignore.read().splitlines()
+        except OSError:
+            return self
+
+        prefix = "" if base == "" else base.rstrip("/") + "/"
+        rules = list(self.__rules)
+
+        for line in lines:
+            line = line.rstrip()
+            if line == "" or line.startswith("#"):
+                continue
+
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith("\\"):
+                line = line[1:]
+
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+
+            if "/" in line:
+                regex = translateGlob(line.lstrip("/"))
+            else:
+                # a pattern without a slash matches a name at any depth
+                regex = "(?:.*/)?" + translateGlob(line)
+
+            rules.append((prefix, re.compile(regex), negate, dir_only))
+
+        return IgnoreRules(tuple(rules))
+
+    def ignored(self, relative: str, is_dir: bool) -> bool:
+        result = False
+        for prefix, regex, negate, dir_only in self.__rules:
+            if (dir_only and not is_dir) or not relative.startswith(prefix):
+                continue
+            if regex.fullmatch(relative[len(prefix) :]):
+                result = not negate
+
+        return result
+
+
+class GlobFilter:
+    '''
+        Tells whether a single file would be matched by a set of glob patterns (and not excluded) without walking any
+            directories. Unlike `PathMatcher`, it neither reads .gitignore files nor tells symlinked directories apart,
+            so it may match files a walk would not find, but never the other way around.
+    '''
+
+    def __init__(self, patterns: List[str], exclude_paths: List[str] = []) -> None:
+        # a regular expression per pattern, along with whether the pattern is absolute and whether it is a literal
+        self.__patterns: List[Tuple[Pattern, bool, bool]] = []
+        for pattern in patterns:
+            segments = splitPattern(pattern)
+            if len(segments) == 0:
+                continue
+
+            absolute = segments[0] == "/"
+            regex = translateGlob("/".join(segments[1:] if absolute else segments))
+            literal = all(WILDCARDS.isdisjoint(segment) for segment in segments)
+            self.__patterns.append((re.compile(("/" if absolute else "") + regex), absolute, literal))
+
+        self.__exclude: Optional[Pattern] = None
+        if len(exclude_paths) > 0:
+            self.__exclude = re.compile(
+                "|".join(f"(?:{translateGlob('/'.join(splitPattern(pattern)))})" for pattern in exclude_paths)
+            )
+
+    def matches(self, path: Path) -> bool:
+        relative = os.path.relpath(path).replace(os.sep, "/")
+        absolute = path.as_posix()
+
+        for regex, is_absolute, literal in self.__patterns:
+            form = absolute if is_absolute else relative
+            if regex.fullmatch(form) and not self.__excluded(form, literal):
+                return True
+
+        return False
+
+    def __excluded(self, form: str, literal: bool) -> bool:
+        '''
+            Mirrors the walk of `PathMatcher`, which checks every directory it enters as well as the file itself, while
+                a literal pattern is only checked as a whole.
+        '''
+        if literal:
+            return self.__exclude is not None and self.__exclude.fullmatch(form) is not None
+
+        parts = form.split("/")
+        for depth in range(1, len(parts) + 1):
+            prefix = "/".join(parts[:depth]) or "/"
+            if depth < len(parts) and parts[depth - 1] in ALWAYS_EXCLUDED:
+                return True
+            if self.__exclude is not None and self.__exclude.fullmatch(prefix):
+                return True
+
+        return False
+
+
+class PathMatcher:
+    '''
+        Finds the files matched by a set of glob patterns (relative to the working directory) in a single walk with
+            `os.scandir`. All patterns are compiled into one matcher that tracks which segment of which pattern
+            every directory can still lead to, so directories no pattern can match below are never entered, and
+            neither are directories matched by `exclude_paths` (or ignored by git, when `gitignore` is set).
+    '''
+
+    def __init__(self, patterns: List[str], exclude_paths: List[str] = [], gitignore: bool = False) -> None:
+        self.__cwd = os.getcwd()
+        self.__gitignore = gitignore
+        self.__exclude: Optional[Pattern] = None
+        if len(exclude_paths) > 0:
+            self.__exclude = re.compile(
+                "|".join(f"(?:{translateGlob('/'.join(splitPattern(pattern)))})" for pattern in exclude_paths)
+            )
+
+        self.__literals: List[str] = []
+        self.__segments: List[List[Optional[Pattern]]] = []
+        roots: Dict[Tuple[str, ...], Set[State]] = {}
+
+        for pattern in patterns:
+            segments = splitPattern(pattern)
+            if len(segments) == 0:
+                continue
+
+            literal = 0
+            while literal < len(segments) and WILDCARDS.isdisjoint(segments[literal]):
+                literal += 1
+
+            if literal == len(segments):
+                self.__literals.append("/".join(segments).replace("//", "/"))
+                continue
+
+            # the walk starts in the deepest directory the pattern names literally
+            root = tuple(segments[:literal])
+            roots.setdefault(root, set()).add((len(self.__segments), literal))
+            self.__segments.append(
+                [None if segment == "**" else re.compile(translateSegment(segment)) for segment in segments]
+            )
+
+        # a root below another root is reached by walking the outer one
+        self.__roots: Dict[Tuple[str, ...], FrozenSet[State]] = {}
+        for root in sorted(roots, key=len):
+            outer = next((other for other in self.__roots if root[: len(other)] == other), None)
+            if outer is None:
+                self.__roots[root] = self.__closure(roots[root])
+            else:
+                self.__roots[outer] = self.__closure(self.__roots[outer] | {(p, len(outer)) for p, _ in roots[root]})
+
+    def files(self) -> List[Path]:
+        '''
+            Will gather the absolute paths of all matched files, sorted by path.
+        '''
+        found: Set[str] = set()
+
+        for literal in self.__literals:
+            path = os.path.normpath(os.path.join(self.__cwd, literal))
+            if os.path.isfile(path) and not self.__excluded(literal, False, None):
+                found.add(path)
+
+        for root, states in self.__roots.items():
+            self.__walk(root, states, found)
+
+        return [Path(path) for path in sorted(found)]
+
+    def __excluded(self, relative: str, is_dir: bool, rules: Optional[IgnoreRules]) -> bool:
+        if is_dir:
+            name = relative.rsplit("/", 1)[-1]
+            if name in ALWAYS_EXCLUDED or (self.__gitignore and name == ".git"):
+                return True
+
+        if self.__exclude is not None and self.__exclude.fullmatch(relative):
+            return True
+
+        return rules is not None and rules.ignored(relative, is_dir)
+
+    def __closure(self, states: AbstractSet[State]) -> FrozenSet[State]:
+        '''
+            Adds the states reached by letting every `**` segment match no directories at all.
+        '''
+        closed = set(states)
+        pending = list(states)
+        while pending:
+            pattern, index = pending.pop()
+            if index < len(self.__segments[pattern]) and self.__segments[pattern][index] is None:
+                if (pattern, index + 1) not in closed:
+                    closed.add((pattern, index + 1))
+                    pending.append((pattern, index + 1))
+
+        return frozenset(closed)
+
+    def __enter(self, states: FrozenSet[State], name: str, through_globstar: bool) -> FrozenSet[State]:
+        '''
+            Will return the states of the matcher within a subdirectory of the given name.
+        '''
+        entered = set()
+        for pattern, index in states:
+            segments = self.__segments[pattern]
+            if index >= len(segments):
+                continue
+
+            segment = segments[index]
+            if segment is None:
+                if through_globstar:
+                    entered.add((pattern, index))
+            elif index < len(segments) - 1 and segment.fullmatch(name):
+                entered.add((pattern, index + 1))
+
+        return self.__closure(entered)
+
+    def __matches(self, states: FrozenSet[State], name: str) -> bool:
+        for pattern, index in states:
+            segments = self.__segments[pattern]
+            if index != len(segments) - 1:
+                continue
+
+            # a trailing `**` matches every file below it
+            segment = segments[index]
+            if segment is None or segment.fullmatch(name):
+                return True
+
+        return False
+
+    def __walk(self, root: Tuple[str, ...], states: FrozenSet[State], found: Set[str]) -> None:
+        relative_root = "/".join(root).replace("//", "/")
+        inside = len(root) == 0 or (root[0] not in ("/", ".."))
+
+        # the rules of every .gitignore file above the root apply to it as well
+        rules: Optional[IgnoreRules] = None
+        if self.__gitignore and inside:
+            rules = IgnoreRules()
+            for depth in range(len(root)):
+                base = "/".join(root[:depth])
+                rules = rules.extend(os.path.join(self.__cwd, base, ".gitignore"), base)
+                if self.__excluded("/".join(root[: depth + 1]), True, rules):
+                    return
+        elif any(self.__excluded("/".join(root[: depth + 1]), True, None) for depth in range(len(root))):
+            return
+
+        stack = [(os.path.normpath(os.path.join(self.__cwd, relative_root)), relative_root, states, rules)]
+
+        while stack:
+            directory, relative, states, rules = stack.pop()
+
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = list(iterator)
+            except OSError:
+                continue
+
+            if rules is not None and any(entry.name == ".gitignore" for entry in entries):
+                rules = rules.extend(os.path.join(directory, ".gitignore"), relative)
+
+            for entry in entries:
+                entry_relative = joinRelative(relative, entry.name)
+
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+
+                if self.__excluded(entry_relative, is_dir, rules):
+                    continue
+
+                if is_dir:
+                    # symlinked directories are followed by name, but not by `**`, which could otherwise loop
+                    entered = self.__enter(states, entry.name, not entry.is_symlink())
+                    if len(entered) > 0:
+                        stack.append((entry.path, entry_relative, entered, rules))
+                elif self.__matches(states, entry.name) and entry.is_file():
+                    found.add(entry.path)
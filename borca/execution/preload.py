@@ -0,0 +1,32 @@
+# imported by the warm process of `CallRunner` as it starts, which is how the modules of every call are imported
+# before any worker is forked from it
+import importlib
+import json
+import os
+import sys
+import time
+
+from borca.execution import calls
+
+preload = json.loads(os.environ.pop(calls.PRELOAD_VARIABLE, "{}"))
+
+# the workers forked from here get the environment the warm process was started from
+if "python_path" in preload:
+    if preload["python_path"] is None:
+        os.environ.pop("PYTHONPATH", None)
+    else:
+        os.environ["PYTHONPATH"] = preload["python_path"]
+
+if "root_path" in preload and preload["root_path"] not in sys.path:
+    sys.path.insert(0, preload["root_path"])
+
+# the project's modules imported from here on are checked against this time before every call
+calls.preloaded_ns = time.time_ns()
+
+for module_name in preload.get("modules", []):
+    try:
+        importlib.import_module(module_name)
+    except BaseException:  # nosec
+        # anything raised here would end the warm process, so the worker imports the module again and its error is
+        # shown as the output of the task
+        pass
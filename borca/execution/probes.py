@@ -0,0 +1,129 @@
+from typing import Dict, List, Optional, Tuple
+from threading import Lock
+import logging
+import os
+import shlex
+import shutil
+import subprocess  # nosec
+
+from borca.caching import CacheDatabase
+from borca.caching.database import ProbeEntry
+from borca.exceptions import BorcaException
+from borca.execution.fingerprint import combine, ENVIRONMENT_FINGERPRINT
+
+# a probe taking longer than this (in seconds) is considered broken
+PROBE_TIMEOUT_SECONDS = 60
+
+# the names the parts of a task's environment are recorded under
+PLATFORM_KEY = "platform"
+ENV_PREFIX = "env:"
+TOOL_PREFIX = "tool:"
+
+
+def probeExecutable(command: str, search_path: Optional[str] = None) -> Optional[str]:
+    '''
+        The resolved path of the executable a probe command runs, or None when it can not be told (e.g. for a shell
+            builtin or a command that is not a simple one).
+    '''
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return None
+
+    if len(words) == 0 or "=" in words[0] or any(char in command for char in "|&;<>()$`"):
+        return None
+
+    executable = shutil.which(words[0], path=search_path)
+    return None if executable is None else os.path.realpath(executable)
+
+
+class ToolProber:
+    '''
+        Runs the version probes of the tools tasks declare in `tool_inputs`. The digest of what a probe prints is
+            recorded along with the path, mtime and size of the executable it runs, so it is only run again once that
+            executable was replaced (e.g. by an upgrade) or another one is found on the PATH. Probes whose executable
+            can not be told are run once per run. Variables are read from, and probes run in, the given environment
+            (by default that of this process).
+    '''
+
+    def __init__(
+        self, database: CacheDatabase, logger: logging.Logger, environ: Optional[Dict[str, str]] = None
+    ) -> None:
+        self.__lock = Lock()
+        self.__logger = logger
+        self.__environ = dict(os.environ) if environ is None else environ
+        self.__recorded = database.toolProbes()
+        self.__probed: Dict[str, bytes] = {}
+        self.__updated: Dict[str, ProbeEntry] = {}
+
+    def environment(self, task_name: str, env_inputs: List[str], tool_inputs: List[str]) -> Dict[str, bytes]:
+        '''
+            Will produce the digests of the parts of the environment a task depends on, keyed by name: the platform,
+                the values of its `env_inputs` (where an unset variable differs from an empty one) and the output of
+                its `tool_inputs`.
+        '''
+        environment = {PLATFORM_KEY: ENVIRONMENT_FINGERPRINT}
+
+        for name in env_inputs:
+            value = self.__environ.get(name)
+            environment[ENV_PREFIX + name] = b"" if value is None else combine(value.encode())
+
+        for command in tool_inputs:
+            environment[TOOL_PREFIX + command] = self.digest(task_name, command)
+
+        return environment
+
+    def digest(self, task_name: str, command: str) -> bytes:
+        # probes are rare enough to be run one at a time, which also keeps a probe shared by tasks from running twice
+        with self.__lock:
+            digest = self.__probed.get(command)
+            if digest is not None:
+                return digest
+
+            executable = probeExecutable(command, self.__environ.get("PATH"))
+            current: Optional[Tuple[str, int, int]] = None
+            if executable is not None:
+                try:
+                    stat = os.stat(executable)
+                    current = (executable, stat.st_mtime_ns, stat.st_size)
+                except OSError:
+                    pass
+
+            recorded = self.__recorded.get(command)
+            if recorded is not None and current is not None and recorded[:3] == current:
+                digest = recorded[3]
+            else:
+                digest = self.__probe(task_name, command)
+                if current is not None:
+                    self.__updated[command] = current + (digest,)
+
+            self.__probed[command] = digest
+            return digest
+
+    def __probe(self, task_name: str, command: str) -> bytes:
+        self.__logger.debug(f"Probing tool for task {task_name}: {command}")
+        try:
+            result = subprocess.run(
+                command,
+                shell=True,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                env=self.__environ,
+                timeout=PROBE_TIMEOUT_SECONDS,
+            )  # nosec
+        except (OSError, subprocess.TimeoutExpired) as e:
+            raise BorcaException(
+                f'Unable to probe tool "{command}" on task {task_name} ({e}), caching for this task will be disabled.'
+            )
+
+        # a failing probe (e.g. a tool that is not installed) is part of the environment as well
+        return combine(result.returncode.to_bytes(4, "big", signed=True), result.stdout)
+
+    def save(self, database: CacheDatabase) -> None:
+        '''
+            Hands the probe results updated since the last save over to the database, to be written on its next commit.
+        '''
+        with self.__lock:
+            database.putToolProbes(self.__updated)
+            self.__updated = {}
@@ -0,0 +1,66 @@
+from typing import Dict, List, Tuple
+
+from borca.parsing import Task
+
+# estimated duration (in seconds) of a task that has never been run when no other task has been either
+DEFAULT_DURATION = 1.0
+
+
+def estimateDurations(tasks: List[Task], history: Dict[str, List[float]]) -> Dict[str, float]:
+    '''
+        Estimates each task's duration as the mean of its recorded durations. Tasks without history are assumed to
+            take as long as the average known task.
+    '''
+    known = {name: sum(durations) / len(durations) for name, durations in history.items() if len(durations) > 0}
+    default = sum(known.values()) / len(known) if len(known) > 0 else DEFAULT_DURATION
+
+    return {task.name: known.get(task.name, default) for task in tasks}
+
+
+def dependentsOf(tasks: List[Task]) -> Dict[str, List[Task]]:
+    '''
+        Will gather the dependents of each task, disregarding tasks that are not part of the given tasks.
+    '''
+    dependents: Dict[str, List[Task]] = {task.name: [] for task in tasks}
+    for task in tasks:
+        for dep in task.dependencies:
+            if dep.name in dependents:
+                dependents[dep.name].append(task)
+
+    return dependents
+
+
+def remainingPathLengths(tasks: List[Task], durations: Dict[str, float]) -> Dict[str, float]:
+    '''
+        Will compute, for each task, the estimated length of the longest path from the start of that task to the end
+            of the graph. The tasks must be ordered so every task comes after its dependencies.
+    '''
+    dependents = dependentsOf(tasks)
+    lengths: Dict[str, float] = {}
+
+    for task in reversed(tasks):
+        lengths[task.name] = durations[task.name] + max(
+            (lengths[dependent.name] for dependent in dependents[task.name]), default=0.0
+        )
+
+    return lengths
+
+
+def criticalPath(tasks: List[Task], durations: Dict[str, float]) -> Tuple[List[Task], float]:
+    '''
+        Will find the longest chain of dependent tasks by estimated duration, which bounds the wall time of a run no
+            matter how many tasks are run in parallel.
+    '''
+    if len(tasks) == 0:
+        return [], 0.0
+
+    dependents = dependentsOf(tasks)
+    lengths = remainingPathLengths(tasks, durations)
+
+    task = max(tasks, key=lambda task: lengths[task.name])
+    path = [task]
+    while len(dependents[task.name]) > 0:
+        task = max(dependents[task.name], key=lambda dependent: lengths[dependent.name])
+        path.append(task)
+
+    return path, lengths[path[0].name]
@@ -1,18 +1,32 @@
-from typing import Dict
+from typing import Dict, List, Optional, Set
 from pathlib import Path
 
-import toml
-
-from borca.parsing import Parser
-from borca.execution import Executor
-from borca.util import createLogger
+from borca.parsing import Task, FileSettings, Parser, GraphCache
+from borca.execution import Executor, Verdict, estimateDurations, criticalPath
+from borca.util import createLogger, getTracer
 from borca.exceptions import InvalidTomlPath
 
 
+def formatBytes(size: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1000:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1000  # type: ignore
+    return f"{size:.1f} TB"
+
+
+# number of paths shown for each reason a task would run in a dry run
+EXPLAINED_PATHS = 5
+
+
 class Orchestrator:
     def __init__(self, config: Dict) -> None:
         self.__config = config
         self.__logger = createLogger('borca.Orchestrator', self.__config['verbosity'])
+        self.__tracer = getTracer()
+
+        if self.__config.get("trace"):
+            self.__tracer.enable()
 
         self.__toml = Path(self.__config['toml_path'])
 
@@ -23,17 +37,168 @@ class Orchestrator:
 
         self.__logger.info(f"Using {self.__toml}")
 
-        self.__toml_data = toml.load(str(self.__toml))
+        self.__graph_cache = GraphCache(self.__toml, self.__config, self.__logger)
+
+        with self.__tracer.span("load compiled graph", "config"):
+            compiled = self.__graph_cache.load()
+
+        if compiled is None:
+            parser = self.__parse()
+            self.__graph_cache.store(parser)
+            compiled = parser.orderedTasks(), parser.cacheSettings(), parser.fileSettings()
+
+        self.__tasks, self.__cache_settings, self.__file_settings = compiled
+
+        self.__executor = Executor(self.__config, self.__tasks, self.__cache_settings, self.__file_settings)
+
+    def __parse(self) -> Parser:
+        import toml  # imported here, as runs with an unchanged pyproject.toml never parse it
 
-        self.__parser = Parser(self.__config, self.__toml_data)
+        with self.__tracer.span("load pyproject.toml", "config"):
+            toml_data = toml.loads(self.__graph_cache.text())
 
-        self.__executor = Executor(self.__config, self.__parser.orderedTasks())
+        return Parser(self.__config, toml_data)
+
+    def tasks(self) -> List[Task]:
+        return self.__tasks.copy()
+
+    def fileSettings(self) -> FileSettings:
+        return self.__file_settings
+
+    def run(self, changed_paths: Optional[Set[Path]] = None, environ: Optional[Dict[str, str]] = None) -> None:
+        '''
+            Runs the task graph, once or in watch mode. An orchestrator that is kept around between runs may be given
+                the input files that changed since its last run, so nothing else is fingerprinted again, and the
+                environment to run in when it is not this process's own.
+        '''
+        if self.__config.get("watch"):
+            from borca.watching import Watcher
+
+            Watcher(
+                self.__config, self.__executor, self.__tasks.copy(), self.__file_settings, self.__printSummary
+            ).run()
+        else:
+            self.__printSummary(*self.__executor.run(None, changed_paths, environ))
+
+        if self.__tracer.enabled:
+            self.__writeTrace(Path(self.__config["trace"]))
+
+    def explain(self, every_path: bool = False) -> None:
+        '''
+            Reports which tasks a run would execute and why, without running anything. Unless `every_path` is set,
+                only the tasks that would not be found up-to-date are listed, each with the first few paths of every
+                reason.
+        '''
+        explained = self.__executor.explain()
+        title = "BORCA EXPLAIN" if every_path else "BORCA DRY RUN"
+        labels = {Verdict.RUN: "Would Run", Verdict.RESTORE: "Would Restore", Verdict.UP_TO_DATE: "Up-to-date"}
+
+        print(f"\n======= [{title}] =======")
+        for task, verdict, reasons in explained:
+            if verdict == Verdict.UP_TO_DATE and not every_path:
+                continue
+
+            print(f"{labels[verdict]}: {task.name}")
+            for description, paths in reasons:
+                if len(paths) == 0:
+                    print(f"  - {description}")
+                elif every_path:
+                    print(f"  - {description}:" + "".join(f"\n      {path}" for path in paths))
+                else:
+                    shown = ", ".join(paths[:EXPLAINED_PATHS])
+                    more = f" and {len(paths) - EXPLAINED_PATHS} more" if len(paths) > EXPLAINED_PATHS else ""
+                    print(f"  - {description}: {shown}{more}")
+
+        counts = {verdict: sum(1 for _, outcome, _ in explained if outcome == verdict) for verdict in labels}
+        print(
+            f"Total Tasks: {len(explained)}"
+            f"\nWould Run: {counts[Verdict.RUN]}"
+            f"\nWould Restore: {counts[Verdict.RESTORE]}"
+            f"\nUp-to-date: {counts[Verdict.UP_TO_DATE]}"
+        )
+        print(f"=" * (len(title) + 18))
 
-    def run(self) -> None:
-        total_tasks, completed_tasks, cached_tasks = self.__executor.run()
+        if self.__tracer.enabled:
+            self.__writeTrace(Path(self.__config["trace"]))
 
+    def __printSummary(self, total_tasks: int, completed_tasks: int, cached_tasks: int) -> None:
         print(
             f"\n======= [BORCA SUMMARY] =======",
             f"\nTotal Tasks: {total_tasks}" f"\nCompleted Tasks: {completed_tasks}" f"\nCached Tasks: {cached_tasks}",
             f"\n===============================",
         )
+
+    def stats(self) -> None:
+        tasks = self.__tasks
+        run_count, history = self.__executor.history()
+        durations = estimateDurations(tasks, history)
+        path, best_case = criticalPath(tasks, durations)
+
+        print(f"\n======= [BORCA STATS] =======", f"\nRecorded Runs: {run_count}", f"\nCritical Path:")
+        for task in path:
+            print(f"  {durations[task.name]:9.3f}s  {task.name}")
+        print(
+            f"Best-Case Wall Time: {best_case:.3f}s",
+            f"\nSerial Wall Time: {sum(durations.values()):.3f}s",
+        )
+
+        unknown = [task.name for task in tasks if task.name not in history]
+        if len(unknown) > 0:
+            print(f"Tasks Without History (estimated): {', '.join(unknown)}")
+
+        print(f"=============================")
+
+    def collectGarbage(self, max_size: Optional[int] = None, max_age: Optional[int] = None) -> None:
+        '''
+            Collects the garbage in the cache, with the given limits in place of the configured ones, and reports
+                what was removed followed by the remaining usage of the cache.
+        '''
+        limits = {"max_size": max_size, "max_age": max_age}
+        cache_settings = self.__cache_settings.copy(
+            update={name: limit for name, limit in limits.items() if limit is not None}
+        )
+        report = self.__executor.collectGarbage(set(self.__parse().definedTasks()), cache_settings)
+
+        print(
+            f"\n======= [BORCA CACHE GC] =======",
+            f"\nRemoved Tasks: {report['tasks']}"
+            f"\nRemoved Runs: {report['runs']}"
+            f"\nRemoved File Entries: {report['files']}"
+            f"\nRemoved Outputs: {report['manifests']}"
+            f"\nRemoved Objects: {report['objects']} ({formatBytes(report['freed_bytes'])})",
+            f"\n================================",
+        )
+
+        self.cacheStats()
+
+    def cacheStats(self) -> None:
+        outcomes, manifest_count, object_count, object_bytes = self.__executor.cacheUsage()
+        database_bytes = sum(
+            path.stat().st_size for path in (self.__toml.resolve().parent / ".borca_cache").glob("cache.db*")
+        )
+
+        print(
+            f"\n======= [BORCA CACHE] =======",
+            f"\nStored Outputs: {manifest_count}"
+            f"\nStored Objects: {object_count} ({formatBytes(object_bytes)})"
+            f"\nDatabase: {formatBytes(database_bytes)}",
+        )
+
+        if len(outcomes) > 0:
+            print(f"Hit Rates:")
+        for task_name, counts in sorted(outcomes.items()):
+            hits, total = counts.get("cached", 0), sum(counts.values())
+            print(f"  {hits / total:7.1%}  {task_name} ({hits} of {total} runs)")
+
+        hits = sum(counts.get("cached", 0) for counts in outcomes.values())
+        total = sum(sum(counts.values()) for counts in outcomes.values())
+        print(f"Overall Hit Rate: {hits / total if total else 0:.1%}", f"\n=============================")
+
+    def __writeTrace(self, trace_file: Path) -> None:
+        self.__tracer.write(trace_file)
+        self.__logger.info(f"Wrote trace to {trace_file}")
+
+        for title, category in (("Slowest Tasks", "task"), ("Slowest Hashing", "hash")):
+            print(f"\n{title}:")
+            for name, duration in self.__tracer.slowest(category):
+                print(f"  {duration:9.3f}s  {name}")
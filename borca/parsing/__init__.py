@@ -1,2 +1,3 @@
-from borca.parsing.data_format import Task, BorcaData
-from borca.parsing.parser import Parser
+from borca.parsing.data_format import Task, CacheSettings, FileSettings, BorcaData, parseSize, parseAge
+from borca.parsing.parser import Parser, requestedTasks
+from borca.parsing.graph_cache import GraphCache
@@ -1,25 +1,131 @@
-from typing import List
+from typing import Dict, List, Optional, Union
+import re
 
-from pydantic import BaseModel as PydanticBaseModel
+from pydantic import BaseModel as PydanticBaseModel, root_validator, validator
+
+SIZE_UNITS = {
+    "": 1,
+    "b": 1,
+    "kb": 1000,
+    "mb": 1000**2,
+    "gb": 1000**3,
+    "tb": 1000**4,
+    "kib": 1024,
+    "mib": 1024**2,
+    "gib": 1024**3,
+    "tib": 1024**4,
+}
+
+AGE_UNITS = {"": 1, "s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60, "w": 7 * 24 * 60 * 60}
+
+
+def parseQuantity(value: Union[int, float, str], units: dict, kind: str) -> int:
+    '''
+        Parses a non-negative quantity given as a plain number or as a string with a unit (e.g. "500MB" or "30d").
+    '''
+    if isinstance(value, (int, float)):
+        quantity = float(value)
+    else:
+        match = re.fullmatch(r"\s*([0-9]+(?:\.[0-9]*)?)\s*([a-zA-Z]*)\s*", value)
+        if match is None or match.group(2).lower() not in units:
+            raise ValueError(f'invalid {kind} "{value}" (units are {", ".join(unit for unit in units if unit)})')
+        quantity = float(match.group(1)) * units[match.group(2).lower()]
+
+    if quantity < 0:
+        raise ValueError(f"the {kind} can not be negative")
+
+    return int(quantity)
+
+
+def parseSize(value: Union[int, float, str]) -> int:
+    return parseQuantity(value, SIZE_UNITS, "size")
+
+
+def parseAge(value: Union[int, float, str]) -> int:
+    return parseQuantity(value, AGE_UNITS, "age")
 
 
 class Task(PydanticBaseModel):
     name: str
-    commands: List[str]
+    commands: List[str] = []
+    call: Optional[str] = None
     depends_on: List[str] = []
     input_paths: List[str] = []
     output_paths: List[str] = []
+    exclude_paths: List[str] = []
+    env_inputs: List[str] = []
+    tool_inputs: List[str] = []
 
     # not to be parsed, but for DAG building
     dependencies: set = set()
 
+    @root_validator(pre=True)
+    def commandsOrCall(cls, values: Dict) -> Dict:
+        # a task only grouping others still states so, with `commands = []`
+        if "commands" not in values and "call" not in values:
+            raise ValueError('a task requires either "commands" or "call"')
+        return values
+
+    @validator("call")
+    def validCall(cls, call: Optional[str], values) -> Optional[str]:
+        if len(values.get("commands", [])) > 0:
+            raise ValueError('a task requires either "commands" or "call" (but not both)')
+        if call is not None and re.fullmatch(r"[\w.]+:[\w.]+", call) is None:
+            raise ValueError(f'invalid call "{call}" (must be of the form "package.module:function")')
+        return call
+
     def __hash__(self) -> int:
-        return int("".join([str(ord(character)) for character in self.name]))
+        return hash(self.name)
 
     def __eq__(self, other) -> bool:
         return self.name == other.name
 
 
+class CacheSettings(PydanticBaseModel):
+    backend: str = "local"
+    path: Optional[str] = None
+    # in bytes and seconds once parsed
+    max_size: Optional[int] = None
+    max_age: Optional[int] = None
+
+    @validator("backend")
+    def knownBackend(cls, backend: str) -> str:
+        if backend not in ("local", "directory"):
+            raise ValueError(f'unknown cache backend "{backend}" (must be "local" or "directory")')
+        return backend
+
+    @validator("path", always=True)
+    def directoryPath(cls, path: Optional[str], values) -> Optional[str]:
+        if values.get("backend") == "directory" and path is None:
+            raise ValueError('the "directory" cache backend requires a path')
+        return path
+
+    @validator("max_size", pre=True)
+    def sizeLimit(cls, max_size: Union[int, float, str, None]) -> Optional[int]:
+        return None if max_size is None else parseSize(max_size)
+
+    @validator("max_age", pre=True)
+    def ageLimit(cls, max_age: Union[int, float, str, None]) -> Optional[int]:
+        return None if max_age is None else parseAge(max_age)
+
+
+class FileSettings(PydanticBaseModel):
+    exclude_paths: List[str] = []
+    gitignore: bool = False
+    hash_algorithm: str = "blake2b"
+    git_index: bool = False
+
+    @validator("hash_algorithm")
+    def knownAlgorithm(cls, hash_algorithm: str) -> str:
+        # all guaranteed by hashlib, with a fixed digest size
+        algorithms = ("blake2b", "blake2s", "md5", "sha1", "sha256", "sha512")
+        if hash_algorithm not in algorithms:
+            raise ValueError(f'unknown hash algorithm "{hash_algorithm}" (must be one of {", ".join(algorithms)})')
+        return hash_algorithm
+
+
 class BorcaData(PydanticBaseModel):
     default_task: str
     tasks: List[Task]
+    cache: CacheSettings = CacheSettings()
+    files: FileSettings = FileSettings()
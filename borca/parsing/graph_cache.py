@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+from hashlib import md5
+import json
+import logging
+import os
+import time
+import uuid
+
+from borca import __version__
+from borca.parsing.data_format import Task, CacheSettings, FileSettings
+from borca.parsing.parser import Parser, requestedTasks
+from borca.caching.file_index import RACY_WINDOW_NS
+
+# bumped whenever the layout of the compiled graph changes, so files written by other versions are ignored
+GRAPH_FORMAT = 2
+
+
+def orderKey(roots: List[str]) -> str:
+    '''
+        The key the merged order of the given root tasks is recorded under, which is the task's name for a single root.
+    '''
+    return "\n".join(roots)
+
+
+class GraphCache:
+    '''
+        Keeps the validated and ordered task graph of a pyproject.toml file in `.borca_cache/graph.json`, keyed by the
+            stat data and digest of the file. A run with an unchanged pyproject.toml loads its tasks from there
+            instead of parsing the TOML, validating it and ordering the task graph again.
+    '''
+
+    def __init__(self, toml_path: Path, config: Dict, logger: logging.Logger) -> None:
+        self.__toml_path = toml_path
+        self.__config = config
+        self.__logger = logger
+        self.__graph_path = toml_path.resolve().parent / ".borca_cache" / "graph.json"
+        self.__graph: Dict[str, Any] = {}
+        self.__text: Optional[bytes] = None
+
+    def text(self) -> str:
+        '''
+            The contents of the pyproject.toml file, read at most once per run.
+        '''
+        return self.__contents().decode()
+
+    def __contents(self) -> bytes:
+        if self.__text is None:
+            self.__text = self.__toml_path.read_bytes()
+        return self.__text
+
+    def load(self) -> Optional[Tuple[List[Task], CacheSettings, FileSettings]]:
+        '''
+            Will return the ordered tasks, cache settings and file settings compiled by a previous run, or None when the
+                pyproject.toml file changed since (or the requested task was never ordered).
+        '''
+        try:
+            self.__graph = json.loads(self.__graph_path.read_text())
+            if self.__graph.get("format") != GRAPH_FORMAT or self.__graph.get("version") != __version__:
+                raise ValueError("compiled by another version of borca")
+            size, mtime_ns, inode, recorded_ns = self.__graph["stat"]
+        except (OSError, ValueError, KeyError):
+            self.__graph = {}
+            return None
+
+        stat = self.__toml_path.stat()
+
+        if not (
+            size == stat.st_size
+            and mtime_ns == stat.st_mtime_ns
+            and inode == stat.st_ino
+            and mtime_ns + RACY_WINDOW_NS < recorded_ns
+        ):
+            # the file may have been touched without being changed, which only its contents can tell
+            if md5(self.__contents()).hexdigest() != self.__graph["digest"]:  # nosec
+                self.__graph = {}
+                return None
+
+            self.__write()
+
+        roots = requestedTasks(self.__config)
+        order = self.__graph["orders"].get(orderKey(roots or [self.__graph["default_task"]]))
+        if order is None:
+            return None
+
+        if len(roots) == 0:
+            self.__logger.info(f"Using default task: {self.__graph['default_task']}")
+
+        task_map = {name: Task.construct(**self.__graph["tasks"][name], dependencies=set()) for name in order}
+        for task in task_map.values():
+            task.dependencies.update(task_map[dep_name] for dep_name in task.depends_on)
+
+        self.__logger.debug(f"Loaded the task order from {self.__graph_path}")
+
+        return (
+            [task_map[name] for name in order],
+            CacheSettings.construct(**self.__graph["cache"]),
+            FileSettings.construct(**self.__graph["files"]),
+        )
+
+    def store(self, parser: Parser) -> None:
+        '''
+            Records the tasks ordered by the parser, next to any orders compiled before for other requested tasks
+                from the same pyproject.toml contents.
+        '''
+        digest = md5(self.__contents()).hexdigest()  # nosec
+
+        if self.__graph.get("digest") != digest:
+            self.__graph = {"format": GRAPH_FORMAT, "version": __version__, "digest": digest, "orders": {}, "tasks": {}}
+
+        ordered = parser.orderedTasks()
+        self.__graph["default_task"] = parser.defaultTask()
+        self.__graph["cache"] = parser.cacheSettings().dict()
+        self.__graph["files"] = parser.fileSettings().dict()
+        self.__graph["orders"][orderKey(parser.rootTasks())] = [task.name for task in ordered]
+        self.__graph["tasks"].update({task.name: task.dict(exclude={"dependencies"}) for task in ordered})
+
+        self.__write()
+
+    def __write(self) -> None:
+        stat = self.__toml_path.stat()
+        self.__graph["stat"] = [stat.st_size, stat.st_mtime_ns, stat.st_ino, time.time_ns()]
+
+        temp_file = self.__graph_path.with_name(f".{self.__graph_path.name}.{uuid.uuid4().hex}.borca.tmp")
+        try:
+            self.__graph_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_file.write_text(json.dumps(self.__graph))
+            os.replace(temp_file, self.__graph_path)
+        except OSError as e:
+            self.__logger.warn(f"Unable to write the compiled task graph to {self.__graph_path}: {e}")
+        finally:
+            if temp_file.exists():
+                temp_file.unlink()
@@ -1,13 +1,26 @@
-from typing import Dict, Any, List, MutableMapping
+from typing import Dict, Any, List, MutableMapping, Iterator, Optional, Set, Tuple, Union
 import json
 
 from pydantic import BaseModel as PydanticBaseModel
 
-from borca.parsing import Task, BorcaData
-from borca.util import createLogger
+from borca.parsing import Task, CacheSettings, FileSettings, BorcaData
+from borca.util import createLogger, getTracer
 from borca.exceptions import InvalidToolConfiguration, InvalidTaskgraph
 
 
+def requestedTasks(config: Dict) -> List[str]:
+    '''
+        The names of the tasks requested in the given config, without duplicates. An empty list requests the default
+            task. A single name given as a string (as older callers do) is accepted as well.
+    '''
+    requested: Optional[Union[str, List[str]]] = config.get("task-name")
+    if requested is None:
+        return []
+    if isinstance(requested, str):
+        return [requested]
+    return list(dict.fromkeys(requested))
+
+
 class Parser:
     def __init__(self, config: Dict, toml_data: MutableMapping[str, Any]) -> None:
         self.__logger = createLogger('borca.parsing.Parser', config['verbosity'])
@@ -25,28 +38,41 @@ class Parser:
                 f"Invalid value for the tool.borca field (must be a dictionary but found {type(self.__toml_data['tool']['borca'])})"
             )
 
-        self.__data = BorcaData(**self.__toml_data['tool']['borca'])
+        tracer = getTracer()
+
+        with tracer.span("validate config", "config"):
+            self.__data = BorcaData(**self.__toml_data['tool']['borca'])
 
-        self.__root_task_name = self.__verifyTaskCollection()
-        self.__ordered_tasks = self.__buildTaskOrder()
+        with tracer.span("order tasks", "graph") as args:
+            self.__root_task_names = self.__verifyTaskCollection()
+            self.__ordered_tasks = self.__buildTaskOrder()
+            args["tasks"] = len(self.__ordered_tasks)
 
-    def __verifyTaskCollection(self) -> str:
+    def __verifyTaskCollection(self) -> List[str]:
         names = set([task.name for task in self.__data.tasks])
 
         if len(names) != len(self.__data.tasks):
             raise InvalidToolConfiguration('Found multiple tasks with the same name.')
 
-        root = self.__config.get("task-name")
-        if root is None:
-            root = self.__data.default_task
+        roots = requestedTasks(self.__config)
+        if len(roots) == 0:
+            roots = [self.__data.default_task]
             self.__logger.info(f"Using default task: {self.__data.default_task}")
 
-        if root not in names:
-            raise InvalidToolConfiguration('Default or specified task name was not found in defined tasks.')
+        missing = [root for root in roots if root not in names]
+        if len(missing) > 0:
+            raise InvalidToolConfiguration(
+                f'Default or specified task name was not found in defined tasks: {", ".join(missing)}'
+            )
 
-        return root
+        return roots
 
     def __buildTaskOrder(self) -> List[Task]:
+        '''
+            Orders the tasks reachable from the root tasks so that every task comes after all of its dependencies.
+                This is an iterative depth-first search from each root in turn, visiting every task and dependency edge
+                once, so dependencies shared between the roots appear once in the merged order.
+        '''
 
         # build {name : Task} map
         task_map: Dict[str, Task] = {}
@@ -56,41 +82,72 @@ class Parser:
         # add dependents to each task
         for task in self.__data.tasks:
             for dep_name in task.depends_on:
+                if dep_name not in task_map:
+                    raise InvalidTaskgraph(f'Task "{task.name}" depends on undefined task "{dep_name}"')
                 task.dependencies.add(task_map[dep_name])
 
-        def build(task: Task, visited: List[Task] = [], ordered: List[Task] = []) -> List[Task]:
+        def dependencies(task: Task) -> Iterator[Task]:
+            # follow the declared order (without duplicates) so the resulting order is deterministic
+            return (task_map[dep_name] for dep_name in dict.fromkeys(task.depends_on))
 
-            # print(f"looking at task {task.name}")
+        ordered: List[Task] = []
+        finished: Set[str] = set()
 
-            # Handle leaf node tasks
-            if len(task.dependencies) == 0:
-                if task not in ordered:
-                    # print(f"adding task {task.name}")
-                    ordered.append(task)
+        for root_name in self.__root_task_names:
+            if root_name in finished:
+                continue
+
+            root = task_map[root_name]
+
+            # the stack holds the current path from the root task, so a dependency found on it closes a cycle
+            stack: List[Tuple[Task, Iterator[Task]]] = [(root, dependencies(root))]
+            on_stack: Dict[str, int] = {root.name: 0}
+
+            while stack:
+                task, deps = stack[-1]
 
-            # Handle tasks with dependencies
-            else:
-                for dep in task.dependencies:
-                    if dep in visited:
+                for dep in deps:
+                    if dep.name in finished:
+                        continue
+
+                    if dep.name in on_stack:
+                        cycle = [visiting.name for visiting, _ in stack[on_stack[dep.name] :]] + [dep.name]
                         raise InvalidTaskgraph(
-                            f'Found circular dependency on task "{task.name}" to its dependency "{dep.name}"'
+                            f'Found circular dependency on task "{task.name}" to its dependency "{dep.name}" '
+                            f'({" -> ".join(cycle)})'
                         )
 
-                    visited.append(task)
-                    build(dep, visited)
-                    visited.pop()
+                    on_stack[dep.name] = len(stack)
+                    stack.append((dep, dependencies(dep)))
+                    break
 
-                if task not in ordered:
-                    # print(f"adding task from else {task.name}")
+                else:
+                    stack.pop()
+                    del on_stack[task.name]
+                    finished.add(task.name)
                     ordered.append(task)
 
-            return ordered
-
-        ordered = build(task_map[self.__root_task_name])
-
         self.__logger.debug(f"Task Order: {[task.name for task in ordered]}")
 
         return ordered
 
     def orderedTasks(self) -> List[Task]:
         return self.__ordered_tasks.copy()
+
+    def rootTasks(self) -> List[str]:
+        '''
+            The names of the tasks that were requested (or the default task), which the ordered tasks all lead to.
+        '''
+        return self.__root_task_names.copy()
+
+    def definedTasks(self) -> List[str]:
+        return [task.name for task in self.__data.tasks]
+
+    def defaultTask(self) -> str:
+        return self.__data.default_task
+
+    def cacheSettings(self) -> CacheSettings:
+        return self.__data.cache
+
+    def fileSettings(self) -> FileSettings:
+        return self.__data.files
@@ -1 +1,2 @@
 from borca.util.logging import createLogger
+from borca.util.tracing import Tracer, getTracer
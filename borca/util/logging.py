@@ -12,6 +12,13 @@ def createLogger(name: str, level: int) -> logging.Logger:
         loggingLevel = logging.DEBUG
 
     logger.setLevel(loggingLevel)
+
+    # a logger created again (e.g. by a daemon serving many runs) keeps its handler instead of printing twice
+    if len(logger.handlers) > 0:
+        for handler in logger.handlers:
+            handler.setLevel(loggingLevel)
+        return logger
+
     ch = logging.StreamHandler()
     ch.setLevel(loggingLevel)
     ch.setFormatter(logging.Formatter('[BORCA] %(levelname)s %(name)s - %(message)s'))
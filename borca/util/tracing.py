@@ -0,0 +1,102 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+import json
+import os
+import threading
+import time
+
+
+class Tracer:
+    '''
+        Records timed spans of borca's own work in the Chrome trace-event format, which can be loaded into
+            chrome://tracing or https://ui.perfetto.dev. Recording is disabled until `enable()` is called, in which case
+            spans cost little more than a function call.
+    '''
+
+    def __init__(self) -> None:
+        self.__enabled = False
+        self.__lock = Lock()
+        self.__events: List[Dict[str, Any]] = []
+        self.__tracks: Dict[str, int] = {}
+        self.__origin_ns = time.perf_counter_ns()
+
+    def enable(self) -> None:
+        self.__enabled = True
+
+    @property
+    def enabled(self) -> bool:
+        return self.__enabled
+
+    @contextmanager
+    def span(
+        self, name: str, category: str, track: Optional[str] = None, **args: Any
+    ) -> Iterator[Dict[str, Any]]:
+        '''
+            Times the enclosed block. The yielded dictionary holds the span's arguments and may be extended from
+                within the block, e.g. with counts that are only known once the work is done. Spans are laid out by
+                the thread they ran on, unless they are given a named track (as needed for overlapping coroutines).
+        '''
+        if not self.__enabled:
+            yield args
+            return
+
+        tid = threading.get_ident() if track is None else self.__track(track)
+
+        started_ns = time.perf_counter_ns()
+        try:
+            yield args
+        finally:
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (started_ns - self.__origin_ns) / 1000,
+                "dur": (time.perf_counter_ns() - started_ns) / 1000,
+                "pid": os.getpid(),
+                "tid": tid,
+                "args": args,
+            }
+            with self.__lock:
+                self.__events.append(event)
+
+    def __track(self, track: str) -> int:
+        with self.__lock:
+            if track not in self.__tracks:
+                self.__tracks[track] = len(self.__tracks) + 1
+                self.__events.append(
+                    {
+                        "name": "thread_name",
+                        "ph": "M",
+                        "pid": os.getpid(),
+                        "tid": self.__tracks[track],
+                        "args": {"name": track},
+                    }
+                )
+
+            return self.__tracks[track]
+
+    def slowest(self, category: str, count: int = 5) -> List[Tuple[str, float]]:
+        '''
+            Will gather the names and total durations (in seconds) of the longest spans of a category, adding up the
+                durations of spans sharing a name.
+        '''
+        totals: Dict[str, float] = {}
+        with self.__lock:
+            for event in self.__events:
+                if event.get("cat") == category:
+                    totals[event["name"]] = totals.get(event["name"], 0.0) + event["dur"] / 1e6
+
+        return sorted(totals.items(), key=lambda span: span[1], reverse=True)[:count]
+
+    def write(self, trace_file: Path) -> None:
+        with self.__lock:
+            trace_file.write_text(json.dumps({"traceEvents": self.__events, "displayTimeUnit": "ms"}))
+
+
+_tracer = Tracer()
+
+
+def getTracer() -> Tracer:
+    return _tracer
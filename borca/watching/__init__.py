@@ -0,0 +1 @@
+from borca.watching.watcher import Watcher, Snapshot, takeSnapshot, snapshotChanges
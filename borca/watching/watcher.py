@@ -0,0 +1,155 @@
+from typing import Callable, Dict, List, Set, Tuple
+from pathlib import Path
+import time
+
+from borca.util import createLogger
+from borca.execution import Executor, GlobFilter, PathMatcher
+from borca.parsing import Task, FileSettings
+
+# seconds between polls of the watched files
+POLL_INTERVAL = 0.5
+
+# seconds without further changes before a burst of changes is considered finished
+DEBOUNCE_INTERVAL = 0.3
+
+StatKey = Tuple[int, int, int]
+Snapshot = Dict[str, Dict[Path, StatKey]]
+
+
+def takeSnapshot(patterns: List[str], file_settings: FileSettings) -> Snapshot:
+    '''
+        Will gather the stat data of every file matched by the given patterns, leaving out the files excluded for the
+            whole project.
+    '''
+    snapshot: Snapshot = {}
+    for pattern in patterns:
+        files: Dict[Path, StatKey] = {}
+        for path in PathMatcher([pattern], file_settings.exclude_paths, file_settings.gitignore).files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files[path] = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+        snapshot[pattern] = files
+
+    return snapshot
+
+
+def snapshotChanges(before: Snapshot, after: Snapshot) -> Tuple[Set[str], Set[Path]]:
+    '''
+        Will compare two snapshots of the same patterns, returning the patterns and paths that changed between them.
+    '''
+    changed_patterns: Set[str] = set()
+    changed_paths: Set[Path] = set()
+
+    for pattern, files in after.items():
+        previous = before.get(pattern, {})
+        if previous != files:
+            changed_patterns.add(pattern)
+            changed_paths.update(
+                path for path in previous.keys() | files.keys() if previous.get(path) != files.get(path)
+            )
+
+    return changed_patterns, changed_paths
+
+
+class Watcher:
+    '''
+        Re-runs tasks whenever the files matched by their input patterns change. The parsed task graph and the
+            executor's fingerprint state stay in memory between runs, and each change only re-runs the tasks whose
+            inputs changed along with everything downstream of them.
+    '''
+
+    def __init__(
+        self,
+        config: Dict,
+        executor: Executor,
+        tasks: List[Task],
+        file_settings: FileSettings,
+        report: Callable[[int, int, int], None],
+    ) -> None:
+        self.__logger = createLogger('borca.watching.Watcher', config['verbosity'])
+        self.__executor = executor
+        self.__tasks = tasks
+        self.__file_settings = file_settings
+        self.__report = report
+        self.__patterns = sorted(set(pattern for task in tasks for pattern in task.input_paths))
+
+    def run(self) -> None:
+        snapshot = takeSnapshot(self.__patterns, self.__file_settings)
+        self.__report(*self.__executor.run())
+        snapshot = self.__adoptOutputs(self.__tasks, snapshot)
+
+        self.__logger.info(f"Watching {len(self.__patterns)} input pattern(s) for changes, press Ctrl+C to stop.")
+
+        try:
+            while True:
+                snapshot, changed_patterns, changed_paths = self.__waitForChanges(snapshot)
+                affected = self.__affectedTasks(changed_patterns)
+
+                if len(affected) == 0:
+                    continue
+
+                self.__logger.info(f"Detected changes in {len(changed_paths)} file(s), re-running affected tasks.")
+                self.__report(*self.__executor.run(affected, changed_paths))
+                snapshot = self.__adoptOutputs(affected, snapshot)
+
+        except KeyboardInterrupt:
+            self.__logger.info("Stopped watching.")
+
+    def __waitForChanges(self, snapshot: Snapshot) -> Tuple[Snapshot, Set[str], Set[Path]]:
+        '''
+            Polls until the watched files change and then stop changing for a moment, returning the settled snapshot
+                along with every pattern and path that changed during the burst.
+        '''
+        changed_patterns: Set[str] = set()
+        changed_paths: Set[Path] = set()
+
+        while True:
+            time.sleep(DEBOUNCE_INTERVAL if changed_patterns else POLL_INTERVAL)
+            current = takeSnapshot(self.__patterns, self.__file_settings)
+
+            burst_patterns, burst_paths = snapshotChanges(snapshot, current)
+            changed_paths.update(burst_paths)
+
+            snapshot = current
+
+            if len(burst_patterns) == 0 and len(changed_patterns) > 0:
+                return snapshot, changed_patterns, changed_paths
+
+            changed_patterns.update(burst_patterns)
+
+    def __adoptOutputs(self, tasks: List[Task], snapshot: Snapshot) -> Snapshot:
+        '''
+            Will return the snapshot to compare the next poll against after the given tasks ran, taking in what they
+                wrote to their outputs (which may be the inputs of other tasks) so that is not mistaken for a change.
+                Any other change made during the run is left to be picked up by the next poll.
+        '''
+        output_patterns = [pattern for task in tasks for pattern in task.output_paths]
+        if len(output_patterns) == 0:
+            return snapshot
+
+        outputs = GlobFilter(output_patterns)
+        current = takeSnapshot(self.__patterns, self.__file_settings)
+
+        adopted: Snapshot = {}
+        for pattern, files in snapshot.items():
+            kept = {path: stat for path, stat in files.items() if not outputs.matches(path)}
+            kept.update((path, stat) for path, stat in current.get(pattern, {}).items() if outputs.matches(path))
+            adopted[pattern] = kept
+
+        return adopted
+
+    def __affectedTasks(self, changed_patterns: Set[str]) -> List[Task]:
+        '''
+            Will gather the tasks with a changed input pattern and every task downstream of them, in execution order.
+        '''
+        affected: Set[str] = set()
+
+        for task in self.__tasks:  # NOTE: dependencies always come first in the ordered tasks
+            if any(pattern in changed_patterns for pattern in task.input_paths) or any(
+                dep.name in affected for dep in task.dependencies
+            ):
+                affected.add(task.name)
+
+        return [task for task in self.__tasks if task.name in affected]
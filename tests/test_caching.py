@@ -0,0 +1,153 @@
+import logging
+import os
+import shutil
+import subprocess
+import time
+from hashlib import md5, sha256
+
+import pytest
+
+from borca.caching import CacheDatabase, FileIndex, GitIndex, LocalBackend, ArtifactStore, GarbageCollector
+from borca.caching import file_index
+from borca.parsing import CacheSettings
+
+
+def test_file_index_reuses_digest(tmp_path):
+    tracked = tmp_path / "tracked.txt"
+    tracked.write_text("aaaa")
+    os.utime(tracked, ns=(1_000_000_000, 1_000_000_000))
+
+    database = CacheDatabase(tmp_path / "cache.db")
+    index = FileIndex(database, "md5")
+    assert index.digest(tracked) == md5(b"aaaa").digest()
+    index.save(database)
+    database.commit()
+
+    # same size, mtime and inode, so the stored digest is trusted without reading the file
+    tracked.write_text("bbbb")
+    os.utime(tracked, ns=(1_000_000_000, 1_000_000_000))
+    assert FileIndex(database, "md5").digest(tracked) == md5(b"aaaa").digest()
+
+    os.utime(tracked, ns=(2_000_000_000, 2_000_000_000))
+    assert FileIndex(database, "md5").digest(tracked) == md5(b"bbbb").digest()
+
+
+def test_file_index_rehashes_recent_files(tmp_path):
+    tracked = tmp_path / "tracked.txt"
+    tracked.write_text("aaaa")
+
+    index = FileIndex(CacheDatabase(tmp_path / "cache.db"), "md5")
+    assert index.digest(tracked) == md5(b"aaaa").digest()
+
+    # modified within the racy window of being hashed, so the stat data alone can not be trusted
+    stat = tracked.stat()
+    tracked.write_text("bbbb")
+    os.utime(tracked, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert index.digest(tracked) == md5(b"bbbb").digest()
+
+
+def test_database_commits_once(tmp_path):
+    database = CacheDatabase(tmp_path / "cache.db")
+    database.putTaskHash("docs/build", b"in", b"out", 1.5)
+
+    assert database.getTaskHash("docs/build") == (b"in", b"out")
+    assert CacheDatabase(tmp_path / "cache.db").getTaskHash("docs/build") == (b"", b"")
+
+    database.commit()
+    assert CacheDatabase(tmp_path / "cache.db").getTaskHash("docs/build") == (b"in", b"out")
+
+
+def test_file_index_hashes_in_parallel(tmp_path):
+    paths = []
+    for index in range(20):
+        paths.append(tmp_path / f"file{index}.txt")
+        paths[-1].write_text(f"content {index}")
+        os.utime(paths[-1], ns=(1_000_000_000, 1_000_000_000))
+
+    database = CacheDatabase(tmp_path / "cache.db")
+    index = FileIndex(database, "md5")
+    assert index.digests(paths) == [md5(path.read_bytes()).digest() for path in paths]
+    index.save(database)
+    database.commit()
+
+    # digests are only reused when computed with the same algorithm
+    assert FileIndex(database, "md5").digests(paths[:1]) == [md5(b"content 0").digest()]
+    assert FileIndex(database, "sha256").digests(paths[:1]) == [sha256(b"content 0").digest()]
+
+
+@pytest.mark.skipif(shutil.which("git") is None, reason="requires git")
+@pytest.mark.parametrize("index_version", ["2", "4"])
+def test_file_index_reads_git_index(tmp_path, monkeypatch, index_version):
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=repo, check=True, stdout=subprocess.PIPE).stdout.decode().strip()
+
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    paths = [repo / "src" / f"file{index}.txt" for index in range(3)]
+    for path in paths:
+        path.write_text(f"content of {path.name}")
+        os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    git("init", "-q")
+    git("add", "src")
+    git("update-index", "--index-version", index_version)
+    expected = [bytes.fromhex(git("hash-object", str(path))) for path in paths]
+
+    git_index = GitIndex.find(repo / "src", logging.getLogger(__name__))
+    assert git_index is not None
+
+    # tracked files git knows to be unmodified are never read
+    monkeypatch.setattr(file_index, "hashFile", lambda path, algorithm: pytest.fail(f"{path} was hashed"))
+    index = FileIndex(CacheDatabase(tmp_path / "cache.db"), "md5", git_index)
+    assert index.algorithm == "git-sha1"
+    assert index.digests(paths) == expected
+    monkeypatch.undo()
+
+    # modified and untracked files are hashed from disk as git blobs
+    paths[1].write_text("modified")
+    untracked = repo / "src" / "untracked.txt"
+    untracked.write_text("untracked")
+    index = FileIndex(CacheDatabase(tmp_path / "cache.db"), "md5", git_index)
+    assert index.digests([paths[1], untracked]) == [
+        bytes.fromhex(git("hash-object", str(paths[1]))),
+        bytes.fromhex(git("hash-object", str(untracked))),
+    ]
+
+
+def test_garbage_collection(tmp_path, monkeypatch):
+    database = CacheDatabase(tmp_path / "cache.db")
+    backend = LocalBackend(database, tmp_path / "objects")
+    store = ArtifactStore(backend, tmp_path)
+
+    outputs = {}
+    for name in ("old", "shared", "new"):
+        outputs[name] = tmp_path / f"{name}.txt"
+        outputs[name].write_text(name * 100)
+    digests = {name: md5(path.read_bytes()).digest() for name, path in outputs.items()}
+
+    # the least recently used outputs come first, and the "shared" object is referred to twice
+    for task_name, names in (("build", ["old", "shared"]), ("package", ["shared", "new"]), ("removed", ["new"])):
+        store.store(task_name, b"fingerprint", [(outputs[name], digests[name]) for name in names])
+        database.putTaskHash(task_name, b"fingerprint", b"outputs")
+        database.commit()
+
+    settings = CacheSettings(max_size=1000)
+    report = GarbageCollector(backend, database, settings, "md5").collect({"build", "package"})
+
+    assert report["tasks"] == 1
+    assert report["manifests"] == 1
+    assert report["objects"] == 1 and report["freed_bytes"] == 300
+    assert database.getTaskHash("removed") == (b"", b"")
+    assert [use[0] for use in database.manifestUses()] == ["package"]
+    assert not backend.hasObject(digests["old"])
+    assert backend.hasObject(digests["shared"]) and backend.hasObject(digests["new"])
+
+    # objects that were never referred to may still be waiting for their manifest
+    backend.putObject(md5(b"pending").digest(), outputs["old"])
+    settings = CacheSettings(max_age="1m")
+    monkeypatch.setattr(time, "time", lambda now=time.time(): now + 120)
+
+    report = GarbageCollector(backend, database, settings, "md5").collect()
+    assert report["manifests"] == 1
+    assert report["objects"] == 2
+    assert backend.hasObject(md5(b"pending").digest())
@@ -0,0 +1,74 @@
+from pathlib import Path
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from borca.daemon import socketPath, requestRun, requestStop
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires Unix domain sockets")
+def test_daemon_serves_runs(tmp_path, monkeypatch, capsys):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["cp input.txt output.txt", "echo copied $BORCA_TEST_SEED"]
+input_paths = ["input.txt"]
+output_paths = ["output.txt"]
+env_inputs = ["BORCA_TEST_SEED"]
+'''
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text(toml_text)
+    (tmp_path / "input.txt").write_text("one")
+    monkeypatch.delenv("BORCA_TEST_SEED", raising=False)
+    config = {'task-name': None, 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1, 'jobs': 1}
+
+    # no daemon is running yet, so the command line has to run the tasks itself
+    assert requestRun(config) is None
+
+    env = dict(os.environ, PYTHONPATH=str(Path(__file__).resolve().parents[1]))
+    daemon = subprocess.Popen([sys.executable, "-m", "borca", "daemon"], cwd=tmp_path, env=env)
+    try:
+        for _ in range(100):
+            if socketPath("pyproject.toml").exists():
+                break
+            time.sleep(0.1)
+
+        assert requestRun(config) == 0
+        output = capsys.readouterr()
+        assert "[build] copied" in output.out
+        assert "Completed Tasks: 1" in output.out
+        assert (tmp_path / "output.txt").read_text() == "one"
+
+        assert requestRun(config) == 0
+        assert "Cached Tasks: 1" in capsys.readouterr().out
+
+        # the tasks depend on the environment of the command line, not the one the daemon was started in
+        monkeypatch.setenv("BORCA_TEST_SEED", "2")
+        assert requestRun(config) == 0
+        output = capsys.readouterr()
+        assert "[build] copied 2" in output.out
+        assert "Completed Tasks: 1" in output.out
+        assert requestRun(config) == 0
+        assert "Cached Tasks: 1" in capsys.readouterr().out
+
+        (tmp_path / "input.txt").write_text("two")
+        assert requestRun(config) == 0
+        assert "Completed Tasks: 1" in capsys.readouterr().out
+        assert (tmp_path / "output.txt").read_text() == "two"
+
+        assert requestRun(dict(config, **{'task-name': 'missing'})) == 1
+        assert "was not found" in capsys.readouterr().err
+
+        assert requestStop("pyproject.toml") == 0
+        assert daemon.wait(timeout=10) == 0
+        assert not socketPath("pyproject.toml").exists()
+
+    finally:
+        daemon.kill()
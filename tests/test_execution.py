@@ -0,0 +1,787 @@
+import json
+import multiprocessing.forkserver
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+from borca.caching import file_index
+from borca.execution import Executor
+from borca.parsing import Parser
+from borca.util import Tracer
+import borca.execution.executor
+import borca.execution.fingerprint
+
+import toml
+
+
+def run_tasks(tmp_path, monkeypatch, toml_text, **overrides):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text(toml_text)
+
+    config = {'task-name': None, 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1, 'jobs': 1}
+    config.update(overrides)
+
+    parser = Parser(config, toml.loads(toml_text))
+    return Executor(config, parser.orderedTasks(), parser.cacheSettings(), parser.fileSettings()).run()
+
+
+def test_dependency_order(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build >> log.txt"]
+depends_on = ["test", "lint"]
+
+[[tool.borca.tasks]]
+name = "test"
+commands = ["echo test >> log.txt"]
+depends_on = ["lint"]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["echo lint >> log.txt"]
+'''
+    assert run_tasks(tmp_path, monkeypatch, toml_text, jobs=4) == (3, 3, 0)
+    assert (tmp_path / "log.txt").read_text().split() == ["lint", "test", "build"]
+
+
+def test_parallel_siblings(tmp_path, monkeypatch):
+    # each sibling waits for the other one to start, which only succeeds when they run concurrently
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build"]
+depends_on = ["left", "right"]
+
+[[tool.borca.tasks]]
+name = "left"
+commands = ["touch left; for i in $(seq 50); do [ -f right ] && exit 0; sleep 0.1; done; exit 1"]
+
+[[tool.borca.tasks]]
+name = "right"
+commands = ["touch right; for i in $(seq 50); do [ -f left ] && exit 0; sleep 0.1; done; exit 1"]
+'''
+    assert run_tasks(tmp_path, monkeypatch, toml_text, jobs=2) == (3, 3, 0)
+
+
+def test_failure_stops_dependents(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build >> log.txt"]
+depends_on = ["test"]
+
+[[tool.borca.tasks]]
+name = "test"
+commands = ["exit 1"]
+'''
+    assert run_tasks(tmp_path, monkeypatch, toml_text, jobs=2) == (2, 0, 0)
+    assert not (tmp_path / "log.txt").exists()
+
+
+def test_output_streamed_with_prefix(tmp_path, monkeypatch, capfd, caplog):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo building; echo warning >&2; printf 'no newline'; exit 3"]
+'''
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 0, 0)
+
+    captured = capfd.readouterr()
+    assert captured.out.splitlines() == ["[build] building", "[build] no newline"]
+    assert "[build] warning" in captured.err.splitlines()
+
+    failure = [record.getMessage() for record in caplog.records if record.levelname == "ERROR"]
+    assert len(failure) == 1
+    assert "non-zero exit status 3" in failure[0]
+    # stdout and stderr are read concurrently, so only the lines of each stream keep their relative order
+    assert set(failure[0].splitlines()[-3:]) == {"[build] building", "[build] warning", "[build] no newline"}
+
+
+def test_cached_task(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["cp input.txt output.txt"]
+input_paths = ["input.txt"]
+output_paths = ["output.txt"]
+'''
+    (tmp_path / "input.txt").write_text("one")
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 0, 1)
+
+    (tmp_path / "input.txt").write_text("two")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    assert (tmp_path / "output.txt").read_text() == "two"
+
+
+def test_excluded_inputs_do_not_invalidate(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[tool.borca.files]
+exclude_paths = ["**/__pycache__"]
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["cat src/*.py > output.txt"]
+input_paths = ["src/**"]
+output_paths = ["output.txt"]
+exclude_paths = ["src/*.log"]
+'''
+    (tmp_path / "src" / "__pycache__").mkdir(parents=True)
+    (tmp_path / "src" / "main.py").write_text("one")
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+
+    (tmp_path / "src" / "debug.log").write_text("noise")
+    (tmp_path / "src" / "__pycache__" / "main.pyc").write_text("noise")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 0, 1)
+
+    (tmp_path / "src" / "main.py").write_text("two")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+
+
+def test_shared_inputs_hashed_once(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["cp input.txt output.txt"]
+depends_on = ["lint"]
+input_paths = ["*.txt"]
+output_paths = ["output.txt"]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["echo lint"]
+input_paths = ["*.txt"]
+'''
+    (tmp_path / "input.txt").write_text("one")
+
+    hashed = []
+    original_hash_file = file_index.hashFile
+
+    def counting_hash_file(path, algorithm):
+        hashed.append(path.name)
+        return original_hash_file(path, algorithm)
+
+    monkeypatch.setattr(file_index, "hashFile", counting_hash_file)
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 2, 0)
+    assert sorted(hashed) == ["input.txt", "output.txt"]
+
+
+def test_shared_inputs_hashed_once_in_parallel(tmp_path, monkeypatch):
+    toml_text = "[tool.borca]\ndefault_task = \"all\"\n"
+    toml_text += "[[tool.borca.tasks]]\nname = \"all\"\ncommands = [\"true\"]\n"
+    toml_text += "depends_on = [\"check-0\", \"check-1\", \"check-2\", \"check-3\"]\n"
+    for index in range(4):
+        toml_text += f"[[tool.borca.tasks]]\nname = \"check-{index}\"\ncommands = [\"true\"]\n"
+        toml_text += "input_paths = [\"src/*.txt\"]\n"
+
+    (tmp_path / "src").mkdir()
+    for index in range(200):
+        (tmp_path / "src" / f"{index}.txt").write_text(str(index))
+
+    hashed = []
+    original_hash_file = file_index.hashFile
+
+    def slow_hash_file(path, algorithm):
+        hashed.append(path.name)
+        time.sleep(0.001)
+        return original_hash_file(path, algorithm)
+
+    monkeypatch.setattr(file_index, "hashFile", slow_hash_file)
+
+    # sibling tasks fingerprint their inputs at the same time, but every file is only hashed by one of them
+    assert run_tasks(tmp_path, monkeypatch, toml_text, jobs=4) == (5, 5, 0)
+    assert sorted(hashed) == sorted(f"{index}.txt" for index in range(200))
+
+
+def test_shared_globs_walked_once(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "package"
+
+[[tool.borca.tasks]]
+name = "package"
+commands = ["mkdir -p dist && echo package > dist/package.txt"]
+depends_on = ["lint", "test"]
+input_paths = ["./src/**/*.py"]
+output_paths = ["dist/*.txt"]
+
+[[tool.borca.tasks]]
+name = "test"
+commands = ["echo test"]
+depends_on = ["lint"]
+input_paths = ["./src/**/*.py"]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["echo lint"]
+input_paths = ["./src/**/*.py"]
+'''
+    (tmp_path / "src" / "pkg").mkdir(parents=True)
+    (tmp_path / "src" / "pkg" / "app.py").write_text("app")
+
+    walked = []
+    original_files = borca.execution.fingerprint.PathMatcher.files
+
+    def recording_files(matcher):
+        files = original_files(matcher)
+        walked.append([path.relative_to(tmp_path).as_posix() for path in files])
+        return files
+
+    monkeypatch.setattr(borca.execution.fingerprint.PathMatcher, "files", recording_files)
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (3, 3, 0)
+    # the outputs of package are globbed before and after it runs, but the inputs shared by all tasks only once
+    assert walked.count(["src/pkg/app.py"]) == 1
+
+
+def test_globs_kept_until_files_added_or_removed(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "lint"
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["cat src/*.py >> linted.txt"]
+depends_on = ["docs"]
+input_paths = ["src/*.py"]
+
+[[tool.borca.tasks]]
+name = "docs"
+commands = ["echo docs"]
+input_paths = ["docs/*.md"]
+'''
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text(toml_text)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("a")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "index.md").write_text("docs")
+
+    walked = []
+    original_files = borca.execution.fingerprint.PathMatcher.files
+
+    def recording_files(matcher):
+        files = original_files(matcher)
+        # tasks without outputs expand no patterns at all, which is no walk
+        if len(files) > 0:
+            walked.append([path.relative_to(tmp_path).as_posix() for path in files])
+        return files
+
+    monkeypatch.setattr(borca.execution.fingerprint.PathMatcher, "files", recording_files)
+
+    config = {'task-name': None, 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1, 'jobs': 1}
+    parser = Parser(config, toml.loads(toml_text))
+    executor = Executor(config, parser.orderedTasks(), parser.cacheSettings(), parser.fileSettings())
+
+    assert executor.run() == (2, 2, 0)
+    assert sorted(map(tuple, walked)) == [("docs/index.md",), ("src/a.py",)]
+
+    # a modified file is hashed again, but the globs matching it are not walked again
+    (tmp_path / "src" / "a.py").write_text("changed")
+    assert executor.run(None, {tmp_path / "src" / "a.py"}) == (2, 1, 1)
+    assert len(walked) == 2
+
+    (tmp_path / "src" / "b.py").write_text("b")
+    assert executor.run(None, {tmp_path / "src" / "b.py"}) == (2, 1, 1)
+    (tmp_path / "src" / "b.py").unlink()
+    assert executor.run(None, {tmp_path / "src" / "b.py"}) == (2, 1, 1)
+    assert walked[2:] == [["src/a.py", "src/b.py"], ["src/a.py"]]
+    assert (tmp_path / "linted.txt").read_text() == "achangedchangedbchanged"
+
+
+def test_outputs_restored_from_artifact_cache(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build >> log.txt", "mkdir -p dist && cp input.txt dist/output.txt"]
+input_paths = ["input.txt"]
+output_paths = ["dist/*.txt"]
+'''
+    (tmp_path / "input.txt").write_text("one")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+
+    (tmp_path / "input.txt").write_text("two")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+
+    (tmp_path / "input.txt").write_text("one")
+    (tmp_path / "dist" / "output.txt").unlink()
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 0, 1)
+
+    assert (tmp_path / "dist" / "output.txt").read_text() == "one"
+    assert (tmp_path / "log.txt").read_text().split() == ["build", "build"]
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 0, 1)
+
+
+def test_outputs_shared_through_directory_backend(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[tool.borca.cache]
+backend = "directory"
+path = "../shared"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build >> ../log.txt", "cp input.txt output.txt"]
+input_paths = ["input.txt"]
+output_paths = ["output.txt"]
+'''
+    for worktree in ("first", "second"):
+        (tmp_path / worktree).mkdir()
+        (tmp_path / worktree / "input.txt").write_text("one")
+
+    assert run_tasks(tmp_path / "first", monkeypatch, toml_text) == (1, 1, 0)
+    assert run_tasks(tmp_path / "second", monkeypatch, toml_text) == (1, 0, 1)
+
+    assert (tmp_path / "second" / "output.txt").read_text() == "one"
+    assert (tmp_path / "log.txt").read_text().split() == ["build"]
+    assert not (tmp_path / "second" / ".borca_cache" / "objects").exists()
+
+
+def test_upstream_change_invalidates_downstream(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "package"
+
+[[tool.borca.tasks]]
+name = "package"
+commands = ["echo package >> log.txt"]
+depends_on = ["generate"]
+input_paths = ["package.txt"]
+
+[[tool.borca.tasks]]
+name = "generate"
+commands = ["echo generate >> log.txt", "cp source.txt generated.txt"]
+input_paths = ["source.txt"]
+output_paths = ["generated.txt"]
+'''
+    (tmp_path / "source.txt").write_text("one")
+    (tmp_path / "package.txt").write_text("package")
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 2, 0)
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 0, 2)
+
+    # the package task's own inputs are unchanged, but what it was built from is not
+    (tmp_path / "source.txt").write_text("two")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 2, 0)
+    assert (tmp_path / "log.txt").read_text().split() == ["generate", "package"] * 2
+
+
+def test_config_change_invalidates_only_changed_tasks(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.black]
+line-length = 120
+
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build >> log.txt"]
+depends_on = ["test"]
+input_paths = ["input.txt"]
+
+[[tool.borca.tasks]]
+name = "test"
+commands = ["echo test >> log.txt"]
+depends_on = ["lint"]
+input_paths = ["input.txt"]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["echo lint >> log.txt"]
+input_paths = ["input.txt"]
+'''
+    (tmp_path / "input.txt").write_text("one")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (3, 3, 0)
+
+    toml_text = toml_text.replace("line-length = 120", "line-length = 100")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (3, 0, 3)
+
+    toml_text = toml_text.replace('"echo test >> log.txt"', '"echo test --verbose >> log.txt"')
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (3, 2, 1)
+    assert (tmp_path / "log.txt").read_text().split() == ["lint", "test", "build", "test", "--verbose", "build"]
+
+
+def test_changed_inputs_passed_to_commands(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "lint"
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = [
+    "echo {changed_inputs} >> linted.txt",
+    "cat $BORCA_CHANGED_INPUTS >> listed.txt; echo $BORCA_INCREMENTAL >> listed.txt",
+]
+input_paths = ["src/*.py"]
+'''
+    (tmp_path / "src").mkdir()
+    for name in ("a.py", "b.py", "with space.py"):
+        (tmp_path / "src" / name).write_text(name)
+
+    # nothing is known about the last run, so every input file is given
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    assert (tmp_path / "linted.txt").read_text() == "src/a.py src/b.py src/with space.py\n"
+
+    (tmp_path / "src" / "b.py").write_text("changed")
+    (tmp_path / "src" / "c.py").write_text("c.py")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    assert (tmp_path / "linted.txt").read_text().splitlines()[-1] == "src/b.py src/c.py"
+    assert (tmp_path / "listed.txt").read_text().splitlines()[-3:] == ["src/b.py", "src/c.py", "1"]
+
+    # a changed definition may change what the commands do to every file
+    (tmp_path / "src" / "a.py").write_text("changed")
+    toml_text = toml_text.replace(">> linted.txt", ">> linted.txt;")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    assert (tmp_path / "linted.txt").read_text().splitlines()[-1] == "src/a.py src/b.py src/c.py src/with space.py"
+    assert (tmp_path / "listed.txt").read_text().splitlines()[-1] == "0"
+
+    # without any input files there is nothing to give the first command, which is skipped rather than run bare
+    for path in (tmp_path / "src").iterdir():
+        path.unlink()
+    linted = (tmp_path / "linted.txt").read_text()
+    listed = (tmp_path / "listed.txt").read_text()
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    assert (tmp_path / "linted.txt").read_text() == linted
+    assert (tmp_path / "listed.txt").read_text() == listed + "0\n"
+
+
+def test_environment_and_tools_fingerprinted(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "format"
+
+[[tool.borca.tasks]]
+name = "format"
+commands = ["echo format >> log.txt"]
+input_paths = ["src/*.py"]
+env_inputs = ["BORCA_TEST_SEED"]
+tool_inputs = ["formatter --version"]
+'''
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.py").write_text("a")
+
+    tool = tmp_path / "bin" / "formatter"
+    tool.parent.mkdir()
+    tool.write_text(f"#!/bin/sh\necho probed >> {tmp_path / 'probes.txt'}\necho formatter 1.0\n")
+    tool.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tool.parent}:{os.environ['PATH']}")
+    monkeypatch.delenv("BORCA_TEST_SEED", raising=False)
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 0, 1)
+    # the tool was not replaced, so its probe is not run again
+    assert (tmp_path / "probes.txt").read_text().split() == ["probed"]
+
+    # an empty variable differs from an unset one
+    monkeypatch.setenv("BORCA_TEST_SEED", "")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    monkeypatch.setenv("BORCA_TEST_SEED", "0")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 0, 1)
+
+    monkeypatch.setenv("BORCA_TEST_SEED", "1")
+    assert explain_tasks(tmp_path, toml_text) == [
+        ("format", "run", [("environment variable BORCA_TEST_SEED changed", [])])
+    ]
+    monkeypatch.setenv("BORCA_TEST_SEED", "0")
+
+    # an upgraded tool is probed again, and only a different version runs the task again
+    tool.write_text(tool.read_text().replace("1.0", "2.0"))
+    os.utime(tool, ns=(1_000_000_000, 1_000_000_000))
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    os.utime(tool, ns=(2_000_000_000, 2_000_000_000))
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 0, 1)
+    assert (tmp_path / "probes.txt").read_text().split() == ["probed"] * 3
+    assert (tmp_path / "log.txt").read_text().split() == ["format"] * 4
+
+
+def test_call_tasks(tmp_path, monkeypatch, capsys):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "check"
+
+[[tool.borca.tasks]]
+name = "check"
+call = "checks:passing"
+depends_on = ["lint"]
+input_paths = ["checks.py"]
+
+[[tool.borca.tasks]]
+name = "lint"
+call = "checks:Linter.run"
+input_paths = ["checks.py"]
+'''
+    (tmp_path / "checks.py").write_text(
+'''
+import os, sys
+
+with open("imports.txt", "a") as imports:
+    imports.write(f"{os.getpid()}\\n")
+
+def passing():
+    print("checked", os.environ["BORCA_INCREMENTAL"])
+
+class Linter:
+    @staticmethod
+    def run():
+        print("linting failed", file=sys.stderr)
+        return int(os.environ.get("LINT_STATUS", "0"))
+'''
+    )
+    monkeypatch.setattr(sys, "path", list(sys.path))
+
+    monkeypatch.setenv("LINT_STATUS", "3")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 0, 0)
+    assert "[lint] linting failed" in capsys.readouterr().err
+
+    monkeypatch.setenv("LINT_STATUS", "0")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 2, 0)
+    assert "[check] checked 0" in capsys.readouterr().out
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 0, 2)
+
+    # every call ran in a process of its own, forked from one that had already imported the module
+    assert len(set((tmp_path / "imports.txt").read_text().split())) == 1
+    # while the project's modules were only importable there
+    assert str(tmp_path) not in sys.path
+
+
+def test_call_tasks_run_edited_modules(tmp_path, monkeypatch, capsys):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "report"
+
+[[tool.borca.tasks]]
+name = "report"
+call = "pkg.mod:run"
+input_paths = ["pkg/*.py"]
+'''
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text(toml_text)
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "mod.py").write_text("VERSION = 'ONE'\n\ndef run():\n    print('VERSION', VERSION)\n")
+
+    # the warm process is shared by every runner, so it has to be started for this project
+    multiprocessing.forkserver._forkserver._stop()
+
+    config = {'task-name': None, 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1, 'jobs': 1}
+    parser = Parser(config, toml.loads(toml_text))
+    executor = Executor(config, parser.orderedTasks(), parser.cacheSettings(), parser.fileSettings())
+
+    assert executor.run() == (1, 1, 0)
+    assert "[report] VERSION ONE" in capsys.readouterr().out
+
+    # the warm process imported the module before it was edited (to another size, as bytecode is only checked
+    # against the whole second the source was modified in)
+    (tmp_path / "pkg" / "mod.py").write_text("VERSION = 'SECOND'\n\ndef run():\n    print('VERSION', VERSION)\n")
+    assert executor.run(None, {tmp_path / "pkg" / "mod.py"}) == (1, 1, 0)
+    assert "[report] VERSION SECOND" in capsys.readouterr().out
+
+
+def test_call_task_failing_to_import(tmp_path, monkeypatch, capsys):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "report"
+
+[[tool.borca.tasks]]
+name = "report"
+call = "pkg.mod:run"
+depends_on = ["broken"]
+
+[[tool.borca.tasks]]
+name = "broken"
+call = "pkg.broken:run"
+'''
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+    (tmp_path / "pkg" / "mod.py").write_text("def run():\n    print('reported')\n")
+    (tmp_path / "pkg" / "broken.py").write_text("def run(:\n")
+
+    multiprocessing.forkserver._forkserver._stop()
+
+    # a module the warm process can not import fails its own task, with the error as its output
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 0, 0)
+    assert "[broken] SyntaxError: invalid syntax" in capsys.readouterr().err
+
+    (tmp_path / "pkg" / "broken.py").write_text("def run():\n    pass\n")
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 2, 0)
+    assert "[report] reported" in capsys.readouterr().out
+
+
+def explain_tasks(tmp_path, toml_text):
+    (tmp_path / "pyproject.toml").write_text(toml_text)
+
+    config = {'task-name': None, 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1, 'jobs': 1}
+    parser = Parser(config, toml.loads(toml_text))
+    executor = Executor(config, parser.orderedTasks(), parser.cacheSettings(), parser.fileSettings())
+
+    return [(task.name, verdict, reasons) for task, verdict, reasons in executor.explain()]
+
+
+def test_explain_reasons(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "package"
+
+[[tool.borca.tasks]]
+name = "package"
+commands = ["echo package > package.txt"]
+depends_on = ["generate"]
+input_paths = ["generated.txt"]
+output_paths = ["package.txt"]
+
+[[tool.borca.tasks]]
+name = "generate"
+commands = ["cat source/*.txt > generated.txt"]
+input_paths = ["source/*.txt"]
+output_paths = ["generated.txt"]
+'''
+    (tmp_path / "source").mkdir()
+    (tmp_path / "source" / "a.txt").write_text("a")
+    (tmp_path / "source" / "b.txt").write_text("b")
+    monkeypatch.chdir(tmp_path)
+
+    assert explain_tasks(tmp_path, toml_text) == [
+        ("generate", "run", [("it has not run before", [])]),
+        ("package", "run", [("upstream task generate would run first", [])]),
+    ]
+    assert not (tmp_path / "generated.txt").exists()
+    assert not (tmp_path / ".borca_cache").exists()
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 2, 0)
+    assert explain_tasks(tmp_path, toml_text) == [("generate", "up-to-date", []), ("package", "up-to-date", [])]
+
+    (tmp_path / "source" / "a.txt").write_text("changed")
+    (tmp_path / "source" / "b.txt").unlink()
+    (tmp_path / "source" / "c.txt").write_text("c")
+    toml_text = toml_text.replace("echo package", "echo packaged")
+    assert explain_tasks(tmp_path, toml_text) == [
+        (
+            "generate",
+            "run",
+            [
+                ("input files were added", ["source/c.txt"]),
+                ("input files were removed", ["source/b.txt"]),
+                ("input files were modified", ["source/a.txt"]),
+            ],
+        ),
+        ("package", "run", [("upstream task generate would run first", []), ("its commands changed", [])]),
+    ]
+
+    # the outputs of a task whose inputs are unchanged can be restored from the artifact cache
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (2, 2, 0)
+    (tmp_path / "package.txt").unlink()
+    assert explain_tasks(tmp_path, toml_text) == [
+        ("generate", "up-to-date", []),
+        ("package", "restore", [("output files were removed", ["package.txt"])]),
+    ]
+    assert not (tmp_path / "package.txt").exists()
+
+
+def test_explain_leaves_cache_untouched(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["cp input.txt output.txt"]
+input_paths = ["input.txt"]
+output_paths = ["output.txt"]
+'''
+    (tmp_path / "input.txt").write_text("one")
+    monkeypatch.chdir(tmp_path)
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    database_file = tmp_path / ".borca_cache" / "cache.db"
+    with sqlite3.connect(str(database_file)) as connection:
+        connection.execute("PRAGMA user_version = 1")
+    contents = database_file.read_bytes()
+
+    # a cache of another version is taken to be empty, rather than reset
+    assert explain_tasks(tmp_path, toml_text) == [("build", "run", [("it has not run before", [])])]
+    assert database_file.read_bytes() == contents
+    assert sorted(path.name for path in database_file.parent.iterdir()) == ["cache.db", "objects"]
+
+
+def test_trace_spans(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["cp input.txt output.txt"]
+input_paths = ["input.txt"]
+output_paths = ["output.txt"]
+'''
+    (tmp_path / "input.txt").write_text("one")
+
+    tracer = Tracer()
+    tracer.enable()
+    monkeypatch.setattr(borca.execution.executor, "getTracer", lambda: tracer)
+    monkeypatch.setattr(borca.execution.fingerprint, "getTracer", lambda: tracer)
+
+    assert run_tasks(tmp_path, monkeypatch, toml_text) == (1, 1, 0)
+    tracer.write(tmp_path / "trace.json")
+
+    events = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    assert {event["cat"] for event in events if event["ph"] == "X"} == {"cache", "command", "glob", "hash", "task"}
+    assert {event["args"]["name"] for event in events if event["ph"] == "M"} == {"build"}
+    assert [name for name, _ in tracer.slowest("task")] == ["build"]
+    assert [name for name, _ in tracer.slowest("command")] == ["cp input.txt output.txt"]
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from borca.execution import PathMatcher
+import borca.execution.globbing
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for name in [
+        "setup.py",
+        "src/app.py",
+        "src/pkg/util.py",
+        "src/pkg/data.txt",
+        "src/.hidden.py",
+        "build/gen.py",
+        "node_modules/dep/index.py",
+        ".git/hooks/hook.py",
+        ".borca_cache/objects/object.py",
+    ]:
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text(name)
+
+    return tmp_path
+
+
+def matched(tree, *args, **kwargs):
+    return [path.relative_to(tree).as_posix() for path in PathMatcher(*args, **kwargs).files()]
+
+
+def test_patterns_match_like_pathlib(tree):
+    assert matched(tree, ["*.py"]) == ["setup.py"]
+    assert matched(tree, ["src/*.py"]) == ["src/.hidden.py", "src/app.py"]
+    assert matched(tree, ["src/**/*.py", "src/pkg/*.txt"]) == [
+        "src/.hidden.py",
+        "src/app.py",
+        "src/pkg/data.txt",
+        "src/pkg/util.py",
+    ]
+    assert matched(tree, ["src/pkg/[!d]*", "src/pkg/?ata.txt"]) == ["src/pkg/data.txt", "src/pkg/util.py"]
+    assert matched(tree, ["setup.py", "missing.py", "src"]) == ["setup.py"]
+
+    # unlike pathlib, a trailing `**` matches the files below it rather than only directories
+    assert matched(tree, ["src/pkg/**"]) == ["src/pkg/data.txt", "src/pkg/util.py"]
+
+
+def test_walk_is_pruned(tree, monkeypatch):
+    scanned = []
+    original_scandir = os.scandir
+
+    def recording_scandir(path):
+        scanned.append(os.path.relpath(path, tree))
+        return original_scandir(path)
+
+    monkeypatch.setattr(borca.execution.globbing.os, "scandir", recording_scandir)
+
+    assert matched(tree, ["src/pkg/*.py"]) == ["src/pkg/util.py"]
+    assert scanned == ["src/pkg"]
+
+    scanned.clear()
+    assert matched(tree, ["**/*.py"], ["**/node_modules", "build"]) == [
+        ".git/hooks/hook.py",
+        "setup.py",
+        "src/.hidden.py",
+        "src/app.py",
+        "src/pkg/util.py",
+    ]
+    assert sorted(scanned) == [".", ".git", ".git/hooks", "src", "src/pkg"]
+
+
+def test_gitignore(tree):
+    (tree / ".gitignore").write_text("# generated\nbuild/\n*.txt\nnode_modules\n")
+    (tree / "src" / ".gitignore").write_text("/app.py\n")
+
+    assert matched(tree, ["**/*"], gitignore=True) == [
+        ".gitignore",
+        "setup.py",
+        "src/.gitignore",
+        "src/.hidden.py",
+        "src/pkg/util.py",
+    ]
+
+    # the rules of the .gitignore files above a walk's starting directory apply as well
+    assert matched(tree, ["src/pkg/*"], gitignore=True) == ["src/pkg/util.py"]
+
+
+def test_glob_filter_covers_walk(tree):
+    files = [path for path in tree.rglob("*") if path.is_file()]
+
+    for patterns, exclude_paths in [
+        (["*.py"], []),
+        (["src/**/*.py", "src/pkg/*.txt"], []),
+        (["**/*.py"], ["**/node_modules", "build"]),
+        (["src/pkg/**", "setup.py"], ["src/pkg/util.py"]),
+        (["**"], []),
+    ]:
+        glob_filter = borca.execution.globbing.GlobFilter(patterns, exclude_paths)
+        filtered = [path.relative_to(tree).as_posix() for path in sorted(files) if glob_filter.matches(path)]
+        assert filtered == matched(tree, patterns, exclude_paths)
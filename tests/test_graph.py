@@ -3,7 +3,7 @@ import pytest
 import toml
 
 from borca.parsing import Parser
-from borca.exceptions import InvalidTaskgraph
+from borca.exceptions import InvalidTaskgraph, InvalidToolConfiguration
 
 def test_single():
     toml_text = \
@@ -356,3 +356,130 @@ depends_on = [
     toml_data = toml.loads(toml_text)
     with pytest.raises(InvalidTaskgraph, match=r"Found circular dependency on task \".*\" to its dependency \".*\"") as e:
         task_names = [task.name for task in Parser(config, toml_data).orderedTasks()]
+
+def test_cycle_path_reported():
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = [
+    "poetry build --format wheel"
+]
+depends_on = [
+    "test"
+]
+
+[[tool.borca.tasks]]
+name = "test"
+commands = [
+    "pytest"
+]
+depends_on = [
+    "lint"
+]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = [
+    "mypy borca",
+    "black borca"
+]
+depends_on = [
+    "test"
+]
+
+'''
+    config = {'task-name': 'build', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 2}
+    toml_data = toml.loads(toml_text)
+    with pytest.raises(InvalidTaskgraph, match=r"\(test -> lint -> test\)") as e:
+        task_names = [task.name for task in Parser(config, toml_data).orderedTasks()]
+
+def test_undefined_dependency():
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = [
+    "poetry build --format wheel"
+]
+depends_on = [
+    "tset"
+]
+'''
+    config = {'task-name': 'build', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 2}
+    toml_data = toml.loads(toml_text)
+    with pytest.raises(InvalidTaskgraph, match=r"Task \"build\" depends on undefined task \"tset\"") as e:
+        task_names = [task.name for task in Parser(config, toml_data).orderedTasks()]
+
+def test_deep_chain():
+    tasks = [{'name': f'task-{i}', 'commands': ['true'], 'depends_on': [f'task-{i + 1}']} for i in range(5000)]
+    tasks.append({'name': 'task-5000', 'commands': ['true']})
+
+    config = {'task-name': 'task-0', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1}
+    toml_data = {'tool': {'borca': {'default_task': 'task-0', 'tasks': tasks}}}
+    task_names = [task.name for task in Parser(config, toml_data).orderedTasks()]
+
+    assert task_names == [f'task-{i}' for i in range(5000, -1, -1)]
+
+def test_diamond_ladder():
+    # every rung depends on both tasks of the rung below, which has 2^60 paths from the root to the bottom
+    tasks = [{'name': 'root', 'commands': ['true'], 'depends_on': ['left-0', 'right-0']}]
+    for i in range(60):
+        for side in ('left', 'right'):
+            tasks.append({'name': f'{side}-{i}', 'commands': ['true'], 'depends_on': [f'left-{i + 1}', f'right-{i + 1}']})
+    tasks.append({'name': 'left-60', 'commands': ['true']})
+    tasks.append({'name': 'right-60', 'commands': ['true']})
+
+    config = {'task-name': 'root', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1}
+    toml_data = {'tool': {'borca': {'default_task': 'root', 'tasks': tasks}}}
+    task_names = [task.name for task in Parser(config, toml_data).orderedTasks()]
+
+    assert len(task_names) == 123
+    assert task_names[:2] == ['left-60', 'right-60']
+    assert task_names[-1] == 'root'
+
+def test_multiple_targets():
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["poetry build"]
+depends_on = ["test"]
+
+[[tool.borca.tasks]]
+name = "test"
+commands = ["pytest"]
+depends_on = ["lint"]
+
+[[tool.borca.tasks]]
+name = "docs"
+commands = ["mkdocs build"]
+depends_on = ["lint"]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["black --check ."]
+'''
+    config = {'task-name': ['docs', 'test', 'docs'], 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1}
+    toml_data = toml.loads(toml_text)
+    parser = Parser(config, toml_data)
+
+    # the shared dependency is ordered once, and tasks no target depends on are left out
+    assert [task.name for task in parser.orderedTasks()] == ["lint", "docs", "test"]
+    assert parser.rootTasks() == ["docs", "test"]
+
+    config['task-name'] = []
+    assert [task.name for task in Parser(config, toml_data).orderedTasks()] == ["lint", "test", "build"]
+
+    config['task-name'] = ['lint', 'tset']
+    with pytest.raises(InvalidToolConfiguration, match="tset"):
+        Parser(config, toml_data)
@@ -1,9 +1,12 @@
+import logging
+import os
+
 import pytest
 
 import toml
 import pydantic
 
-from borca.parsing import Parser
+from borca.parsing import Parser, GraphCache
 from borca.exceptions import InvalidToolConfiguration
 
 def test_missing_tasks():
@@ -148,6 +151,25 @@ name = "build"
     with pytest.raises(pydantic.error_wrappers.ValidationError) as e:
         parser = Parser(config, toml_data)
 
+def test_aggregate_task_without_commands():
+    toml_text = \
+'''
+[tool.borca]
+default_task = "all"
+
+[[tool.borca.tasks]]
+name = "all"
+commands = []
+depends_on = ["build"]
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["poetry build"]
+'''
+    config = {'task-name': 'all', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1}
+    tasks = Parser(config, toml.loads(toml_text)).orderedTasks()
+    assert [(task.name, task.commands) for task in tasks] == [("build", ["poetry build"]), ("all", [])]
+
 def test_bad_task_commands_format():
     toml_text = \
 '''
@@ -162,3 +184,97 @@ commands = "poetry build --format wheel"
     toml_data = toml.loads(toml_text)
     with pytest.raises(pydantic.error_wrappers.ValidationError) as e:
         parser = Parser(config, toml_data)
+
+def test_directory_cache_without_path():
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[tool.borca.cache]
+backend = "directory"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = [
+    "poetry build --format wheel"
+]
+'''
+    config = {'task-name': 'build', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1}
+    toml_data = toml.loads(toml_text)
+    with pytest.raises(pydantic.error_wrappers.ValidationError) as e:
+        parser = Parser(config, toml_data)
+
+def test_compiled_graph_cache(tmp_path):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build"]
+depends_on = ["lint"]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["echo lint"]
+input_paths = ["*.py"]
+'''
+    toml_path = tmp_path / "pyproject.toml"
+    toml_path.write_text(toml_text)
+    config = {'task-name': None, 'no_hash': False, 'toml_path': str(toml_path), 'verbosity': 1}
+    logger = logging.getLogger("test")
+
+    def compile(config):
+        graph_cache = GraphCache(toml_path, config, logger)
+        compiled = graph_cache.load()
+        if compiled is None:
+            graph_cache.store(Parser(config, toml.loads(graph_cache.text())))
+        return compiled
+
+    assert compile(config) is None
+    tasks, cache_settings, file_settings = compile(config)
+    assert [task.name for task in tasks] == ["lint", "build"]
+    assert tasks[0].input_paths == ["*.py"]
+    assert tasks[1].dependencies == {tasks[0]}
+    assert cache_settings.backend == "local"
+    assert file_settings.gitignore is False
+
+    # orders of other requested tasks are added next to the existing ones
+    assert compile(dict(config, **{'task-name': 'lint'})) is None
+    assert [task.name for task in compile(dict(config, **{'task-name': 'lint'}))[0]] == ["lint"]
+    assert compile(config) is not None
+
+    # several requested tasks are recorded as a single merged order
+    assert compile(dict(config, **{'task-name': ['lint', 'build']})) is None
+    assert [task.name for task in compile(dict(config, **{'task-name': ['lint', 'build']}))[0]] == ["lint", "build"]
+
+    # touching the file without changing it keeps the compiled graph
+    os.utime(toml_path, ns=(0, 0))
+    assert compile(config) is not None
+
+    toml_path.write_text(toml_text.replace('"echo build"', '"echo built"'))
+    assert compile(config) is None
+    assert compile(config)[0][1].commands == ["echo built"]
+
+def test_call_task_format():
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+call = "tools.build"
+'''
+    config = {'task-name': 'build', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1}
+    with pytest.raises(pydantic.error_wrappers.ValidationError, match="package.module:function"):
+        Parser(config, toml.loads(toml_text))
+
+    toml_text = toml_text.replace('"tools.build"', '"tools:build"\ncommands = ["make"]')
+    with pytest.raises(pydantic.error_wrappers.ValidationError, match="but not both"):
+        Parser(config, toml.loads(toml_text))
+
+    toml_text = toml_text.replace('commands = ["make"]', '')
+    assert Parser(config, toml.loads(toml_text)).orderedTasks()[0].call == "tools:build"
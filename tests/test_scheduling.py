@@ -0,0 +1,82 @@
+import toml
+
+from borca.execution import Executor, estimateDurations, criticalPath
+from borca.execution.scheduling import remainingPathLengths
+from borca.parsing import Parser
+
+toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build >> log.txt"]
+depends_on = ["lint", "test"]
+
+[[tool.borca.tasks]]
+name = "test"
+commands = ["echo test >> log.txt"]
+depends_on = ["compile"]
+
+[[tool.borca.tasks]]
+name = "compile"
+commands = ["echo compile >> log.txt"]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["echo lint >> log.txt"]
+'''
+
+
+def test_critical_path():
+    config = {'task-name': 'build', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1}
+    tasks = Parser(config, toml.loads(toml_text)).orderedTasks()
+
+    durations = estimateDurations(tasks, {'lint': [4.0], 'compile': [2.0, 4.0], 'test': [1.0], 'build': [1.0]})
+    path, length = criticalPath(tasks, durations)
+
+    assert [task.name for task in path] == ['lint', 'build']
+    assert length == 5.0
+
+    durations['compile'] = 10.0
+    path, length = criticalPath(tasks, durations)
+
+    assert [task.name for task in path] == ['compile', 'test', 'build']
+    assert length == 12.0
+    assert remainingPathLengths(tasks, durations)['lint'] == 5.0
+
+
+def test_unknown_tasks_estimated_from_known():
+    config = {'task-name': 'build', 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1}
+    tasks = Parser(config, toml.loads(toml_text)).orderedTasks()
+
+    durations = estimateDurations(tasks, {'lint': [1.0], 'compile': [3.0]})
+
+    assert durations['test'] == durations['build'] == 2.0
+
+
+def test_longest_path_scheduled_first(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text(toml_text)
+
+    config = {'task-name': None, 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1, 'jobs': 1}
+    parser = Parser(config, toml.loads(toml_text))
+
+    # without history every task is estimated the same, so the longer chain goes first
+    executor = Executor(config, parser.orderedTasks(), parser.cacheSettings())
+    assert executor.run() == (4, 4, 0)
+    assert (tmp_path / "log.txt").read_text().split() == ["compile", "lint", "test", "build"]
+
+    run_count, history = executor.history()
+    assert run_count == 1
+    assert sorted(history.keys()) == ["build", "compile", "lint", "test"]
+
+    # with lint known to be slow, it is started before the compile chain
+    monkeypatch.setattr(
+        "borca.caching.CacheDatabase.taskHistory",
+        lambda self: {"lint": [10.0], "compile": [1.0], "test": [1.0], "build": [1.0]},
+    )
+    (tmp_path / "log.txt").unlink()
+    assert executor.run() == (4, 4, 0)
+    assert (tmp_path / "log.txt").read_text().split() == ["lint", "compile", "test", "build"]
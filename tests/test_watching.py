@@ -0,0 +1,103 @@
+import toml
+
+from borca.execution import Executor
+from borca.parsing import Parser
+from borca.watching import Watcher
+import borca.watching.watcher
+
+
+def test_watch_reruns_affected_tasks(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build >> log.txt"]
+depends_on = ["lint", "docs"]
+
+[[tool.borca.tasks]]
+name = "lint"
+commands = ["echo lint >> log.txt"]
+input_paths = ["src/*.py"]
+
+[[tool.borca.tasks]]
+name = "docs"
+commands = ["echo docs >> log.txt"]
+input_paths = ["docs/*.md"]
+'''
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text(toml_text)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "module.py").write_text("one")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "index.md").write_text("docs")
+
+    config = {'task-name': None, 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1, 'jobs': 1}
+    parser = Parser(config, toml.loads(toml_text))
+    executor = Executor(config, parser.orderedTasks(), parser.cacheSettings())
+
+    reports = []
+    polls = []
+
+    def fake_sleep(seconds):
+        polls.append(seconds)
+        if len(polls) == 1:
+            # a burst of saves, the second one arriving within the debounce interval
+            (tmp_path / "src" / "module.py").write_text("two")
+        elif len(polls) == 2:
+            (tmp_path / "src" / "other.py").write_text("new")
+        elif len(reports) == 2:
+            raise KeyboardInterrupt()
+
+    monkeypatch.setattr(borca.watching.watcher.time, "sleep", fake_sleep)
+    Watcher(config, executor, parser.orderedTasks(), parser.fileSettings(), lambda *counts: reports.append(counts)).run()
+
+    assert reports == [(3, 3, 0), (2, 2, 0)]
+    assert (tmp_path / "log.txt").read_text().split() == ["lint", "docs", "build", "lint", "build"]
+
+
+def test_watch_ignores_own_outputs(tmp_path, monkeypatch):
+    toml_text = \
+'''
+[tool.borca]
+default_task = "build"
+
+[[tool.borca.tasks]]
+name = "build"
+commands = ["echo build >> log.txt"]
+depends_on = ["gen"]
+input_paths = ["out/gen.txt"]
+
+[[tool.borca.tasks]]
+name = "gen"
+commands = ["mkdir -p out && cp src/value.txt out/gen.txt"]
+input_paths = ["src/value.txt"]
+output_paths = ["out/gen.txt"]
+'''
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "pyproject.toml").write_text(toml_text)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "value.txt").write_text("one")
+
+    config = {'task-name': None, 'no_hash': False, 'toml_path': 'pyproject.toml', 'verbosity': 1, 'jobs': 1}
+    parser = Parser(config, toml.loads(toml_text))
+    executor = Executor(config, parser.orderedTasks(), parser.cacheSettings())
+
+    reports = []
+    polls = []
+
+    def fake_sleep(seconds):
+        polls.append(seconds)
+        if len(polls) == 1:
+            (tmp_path / "src" / "value.txt").write_text("two")
+        elif len(polls) == 6:
+            raise KeyboardInterrupt()
+
+    monkeypatch.setattr(borca.watching.watcher.time, "sleep", fake_sleep)
+    Watcher(config, executor, parser.orderedTasks(), parser.fileSettings(), lambda *counts: reports.append(counts)).run()
+
+    # what gen wrote to the input of build is not a change of its own
+    assert reports == [(2, 2, 0), (2, 2, 0)]
+    assert (tmp_path / "log.txt").read_text().split() == ["build", "build"]